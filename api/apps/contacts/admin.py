@@ -1,5 +1,13 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import Contact, Telephone
+from .sync import record_deleted, record_deleted_telephones
+from .versioning import bump_version
+
+# Admin writes go through the same versioning as the API so cached reads,
+# ETags and delta sync pick them up. Django runs them inside a transaction.
+# The admin only sees the default database, see apps.contacts.sharding.
+
 
 class TelephoneInline(admin.TabularInline):
     model = Telephone
@@ -11,5 +19,35 @@ class ContactAdmin(admin.ModelAdmin):
     list_filter = ("country", "created_at")
     inlines = [TelephoneInline]
 
+    def save_model(self, request, obj, form, change):
+        obj.sync_version = bump_version(obj.user)
+        super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        record_deleted(obj.user, Contact.objects.filter(pk=obj.pk), bump_version(obj.user))
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for contact in queryset.select_related("user"):
+            self.delete_model(request, contact)
+
+
+class TelephoneAdmin(admin.ModelAdmin):
+
+    def save_model(self, request, obj, form, change):
+        version = bump_version(obj.user)
+        super().save_model(request, obj, form, change)
+        Contact.objects.filter(pk=obj.contact_id).update(sync_version=version, updated_at=timezone.now())
+
+    def delete_model(self, request, obj):
+        version = bump_version(obj.user)
+        record_deleted_telephones(obj.user, [obj], version)
+        super().delete_model(request, obj)
+        Contact.objects.filter(pk=obj.contact_id).update(sync_version=version, updated_at=timezone.now())
+
+    def delete_queryset(self, request, queryset):
+        for telephone in queryset.select_related("user"):
+            self.delete_model(request, telephone)
+
 admin.site.register(Contact, ContactAdmin)
-admin.site.register(Telephone)
+admin.site.register(Telephone, TelephoneAdmin)
@@ -1,6 +1,34 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_migrate
+
+
+def install_search_index(sender, using, **kwargs):
+    """Make sure the contacts search index and its triggers exist after migrating"""
+    from .search import install_search_index
+
+    install_search_index(using)
+
+
+def reserve_id_range(sender, using, **kwargs):
+    """Start a shard's ids in its own range so rows can move between shards"""
+    from .sharding import reserve_id_range
+
+    reserve_id_range(using)
+
+
+def delete_user_contacts(sender, **kwargs):
+    """Delete a deleted user's contacts on their shard"""
+    from .sharding import user_deleted
+
+    user_deleted(sender, **kwargs)
 
 
 class ContactsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.contacts'
+
+    def ready(self):
+        post_migrate.connect(install_search_index, sender=self)
+        post_migrate.connect(reserve_id_range, sender=self)
+        post_delete.connect(delete_user_contacts, sender=settings.AUTH_USER_MODEL)
@@ -0,0 +1,401 @@
+"""
+Load test of the contacts API.
+
+`run_benchmark` drives the list, deep page, search, create, update and delete
+endpoints through a transport: `InProcessTransport` calls the application
+through Django's test client, `HttpTransport` sends real HTTP requests to a
+running server (gunicorn, uvicorn, runserver) from a pool of threads. Each
+scenario reports p50/p95/p99 latency, requests per second, the SQL
+queries per request read from the `Server-Timing` header (see
+core.utils.request_metrics) and the share of responses served from the
+response cache, read from `X-Cache`.
+
+Reads carry a query parameter unique to the request, which the views ignore
+but the response cache keys on, so every read reaches the database. Pass
+`response_cache=True` to measure repeated reads served from the cache.
+
+Data is generated from a seeded random generator (see apps.contacts.seeding),
+so two runs with the same parameters send the same requests against the same
+rows. Results are plain
+JSON carrying the commit and parameters they were measured with, and
+`compare` lines up two of them to spot regressions between commits.
+
+Read scenarios get a few unmeasured warm-up requests first. Update and delete
+work on the contacts the create scenario made, so they run in that order.
+"""
+import json
+import math
+import platform
+import random
+import re
+import subprocess
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from time import perf_counter
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import seeding
+
+SCENARIOS = ["list", "deep_page", "search", "create", "update", "delete"]
+
+# Metrics compared between runs, with whether a higher value is better
+COMPARED_METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "requests_per_second": True,
+    "queries_per_request": False,
+    "cache_hit_ratio": True,
+}
+
+# Query parameter making every read a response cache miss
+CACHE_BUSTER = "nocache"
+
+SERVER_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def fake_contact(rng, number):
+    """A contact payload with one telephone `number`"""
+    city, country, _ = rng.choice(seeding.CITIES)
+    return {
+        "name": rng.choice(seeding.NAMES),
+        "address_line_1": f"{rng.randint(1, 250)} {rng.choice(seeding.STREETS)}",
+        "city": city,
+        "country": country,
+        "postcode": f"{rng.randint(10000, 99999)}",
+        "telephones": [{"number": number}],
+    }
+
+
+def created_number(index):
+    """Telephone number of the contact made by the `index`th create request"""
+    return f"+1666{index:08d}"
+
+
+def search_terms():
+    """Last names, a city and the digits every seeded number starts with"""
+    return [*seeding.LAST_NAMES[:10], seeding.CITIES[0][0], str(seeding.NUMBER_BASE)[:6]]
+
+
+def seed_users(users, contacts_per_user, seed=0):
+    """Create `users` users with `contacts_per_user` contacts each (see apps.contacts.seeding) and return them"""
+    created, _ = seeding.seed(users, users * contacts_per_user, seed, spread="even")
+    return created
+
+
+@contextmanager
+def throwaway_databases(database_file=None):
+    """
+    Run the block against freshly migrated test databases, destroyed afterwards.
+
+    They live in memory unless `database_file` names an SQLite file for the
+    default database.
+    """
+    if database_file:
+        settings.DATABASES["default"].setdefault("TEST", {})["NAME"] = database_file
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=set())
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+class Response:
+    """What a transport reports back about one request"""
+
+    def __init__(self, status, body, server_timing, cache=None):
+        self.status = status
+        self.body = body
+        self.server_timing = server_timing or ""
+        # "HIT" or "MISS" from X-Cache, None when the response cache was not consulted
+        self.cache = cache
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    @property
+    def queries(self):
+        match = SERVER_QUERIES.search(self.server_timing)
+        return int(match.group(1)) if match else None
+
+
+class InProcessTransport:
+    """Calls the API through Django's test client, requests take turns between `users`"""
+
+    concurrency = 1
+    target = "in-process"
+
+    def __init__(self, users):
+        self.client = Client()
+        self.authorizations = [f"Bearer {AccessToken.for_user(user)}" for user in users]
+
+    @property
+    def slots(self):
+        return len(self.authorizations)
+
+    def request(self, slot, method, path, body=None):
+        extra = {"HTTP_AUTHORIZATION": self.authorizations[slot % self.slots]}
+        if body is not None:
+            extra.update(data=json.dumps(body), content_type="application/json")
+        response = self.client.generic(method, path, **extra)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return Response(response.status_code, body, response.get("Server-Timing"), response.get("X-Cache"))
+
+
+class HttpTransport:
+    """Sends HTTP requests to a running server as one user, from `concurrency` threads"""
+
+    slots = 1
+
+    def __init__(self, base_url, access_token, concurrency=1, timeout=30):
+        self.target = base_url.rstrip("/")
+        self.authorization = f"Bearer {access_token}"
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    @classmethod
+    def login(cls, base_url, email, password, **kwargs):
+        """Transport authenticated as `email`, registering the user first when it does not exist"""
+        credentials = {"email": email, "password": password}
+        response = send(f"{base_url.rstrip('/')}/api/auth/login", "POST", credentials)
+        if response.status != 200:
+            send(f"{base_url.rstrip('/')}/api/auth/register", "POST", credentials)
+            response = send(f"{base_url.rstrip('/')}/api/auth/login", "POST", credentials)
+        if response.status != 200:
+            raise ValueError(f"Cannot log in as {email}: HTTP {response.status} {response.body[:200]!r}")
+        return cls(base_url, response.json()["access_token"], **kwargs)
+
+    def request(self, slot, method, path, body=None):
+        return send(self.target + path, method, body, {"Authorization": self.authorization}, self.timeout)
+
+
+def send(url, method, body=None, headers=None, timeout=30):
+    """Send one JSON request with urllib, HTTP errors are returned like any other response"""
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={
+        "Accept": "application/json", **({"Content-Type": "application/json"} if data else {}), **(headers or {}),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return Response(
+                response.status, response.read(), response.headers.get("Server-Timing"), response.headers.get("X-Cache"),
+            )
+    except urllib.error.HTTPError as exc:
+        return Response(exc.code, exc.read(), exc.headers.get("Server-Timing"), exc.headers.get("X-Cache"))
+
+
+def seed_over_http(transport, contacts, seed=0, batch_size=1000):
+    """Create `contacts` contacts through the bulk endpoint, return how many were created"""
+    rng = random.Random(seed)
+    created = 0
+    for start in range(0, contacts, batch_size):
+        items = [
+            fake_contact(rng, seeding.telephone_number(1, n)) for n in range(start, min(start + batch_size, contacts))
+        ]
+        response = transport.request(0, "POST", "/api/contacts/bulk", items)
+        created += (response.json() or {}).get("created", 0)
+    return created
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of sorted `samples`"""
+    if not samples:
+        return None
+    return samples[max(math.ceil(percent / 100 * len(samples)) - 1, 0)]
+
+
+def summarize(latencies, queries, errors, elapsed, cache=()):
+    """Statistics of one scenario, latencies in seconds, `cache` the X-Cache values of the responses that had one"""
+    latencies = sorted(latencies)
+    milliseconds = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": milliseconds(percentile(latencies, 50)),
+        "p95_ms": milliseconds(percentile(latencies, 95)),
+        "p99_ms": milliseconds(percentile(latencies, 99)),
+        "mean_ms": milliseconds(sum(latencies) / len(latencies) if latencies else None),
+        "max_ms": milliseconds(latencies[-1] if latencies else None),
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "cache_hit_ratio": round(cache.count("HIT") / len(cache), 3) if cache else None,
+    }
+
+
+class Workload:
+    """The requests of every scenario, derived from the request index"""
+
+    def __init__(self, transport, seed=0, response_cache=False):
+        self.transport = transport
+        self.seed = seed
+        self.response_cache = response_cache
+        self.terms = search_terms()
+        self.created = []
+        # Unique per run, so a server's cache filled by an earlier run is not hit either
+        self.run = uuid.uuid4().hex[:8]
+        self.reads = 0
+
+    def read(self, path):
+        """`path` made unique to this request unless the response cache is measured too"""
+        if self.response_cache:
+            return path
+        self.reads += 1
+        return f"{path}&{CACHE_BUSTER}={self.run}-{self.reads}"
+
+    def list(self, index):
+        return index, "GET", self.read(f"/api/contacts?page_size={index % 41 + 10}"), None
+
+    def deep_page(self, index):
+        return index, "GET", self.read("/api/contacts?page=last&page_size=50"), None
+
+    def search(self, index):
+        return index, "GET", self.read(f"/api/contacts/search?q={self.terms[index % len(self.terms)].replace(' ', '+')}"), None
+
+    def create(self, index):
+        rng = random.Random(f"{self.seed}-{index}")
+        return index, "POST", "/api/contacts", fake_contact(rng, created_number(index))
+
+    def update(self, index):
+        slot, contact_id = self.created[index % len(self.created)]
+        return slot, "PUT", f"/api/contacts/{contact_id}", {"city": seeding.CITIES[index % len(seeding.CITIES)][0]}
+
+    def delete(self, index):
+        slot, contact_id = self.created[index]
+        return slot, "DELETE", f"/api/contacts/{contact_id}", None
+
+    def requests(self, scenario, count):
+        if scenario == "delete":
+            count = min(count, len(self.created))
+        elif scenario == "update" and not self.created:
+            count = 0
+        return [getattr(self, scenario)(index) for index in range(count)]
+
+    def record(self, scenario, slot, response):
+        if scenario == "create" and response.ok:
+            self.created.append((slot, response.json()["contact"]["id"]))
+
+
+def run_scenario(workload, scenario, count, warmup=0):
+    """Send the requests of `scenario` and return its statistics"""
+    transport = workload.transport
+    if scenario in ("list", "deep_page", "search"):
+        for slot, method, path, body in workload.requests(scenario, warmup):
+            transport.request(slot, method, path, body)
+
+    def timed_request(request):
+        slot, method, path, body = request
+        started = perf_counter()
+        response = transport.request(slot, method, path, body)
+        return perf_counter() - started, slot, response
+
+    requests = workload.requests(scenario, count)
+    started = perf_counter()
+    if transport.concurrency > 1:
+        with ThreadPoolExecutor(max_workers=transport.concurrency) as executor:
+            outcomes = list(executor.map(timed_request, requests))
+    else:
+        outcomes = [timed_request(request) for request in requests]
+    elapsed = perf_counter() - started
+
+    latencies, queries, cache, errors = [], [], [], 0
+    for latency, slot, response in outcomes:
+        latencies.append(latency)
+        if response.queries is not None:
+            queries.append(response.queries)
+        if response.cache:
+            cache.append(response.cache)
+        if not response.ok:
+            errors += 1
+        workload.record(scenario, slot, response)
+    return summarize(latencies, queries, errors, elapsed, cache)
+
+
+def run_benchmark(
+    transport, requests=100, scenarios=None, warmup=5, seed=0, parameters=None, response_cache=False,
+):
+    """Run `scenarios` (default: all, in order) against `transport` and return the results document"""
+    workload = Workload(transport, seed, response_cache)
+    parameters = {"requests": requests, "warmup": warmup, "seed": seed, "response_cache": response_cache, **(parameters or {})}
+    results = {"meta": metadata(transport, parameters), "scenarios": {}}
+    for scenario in scenarios or SCENARIOS:
+        results["scenarios"][scenario] = run_scenario(workload, scenario, requests, warmup)
+    return results
+
+
+def git_commit():
+    """Commit of the working tree, None outside a git checkout"""
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return process.stdout.strip() or None
+
+
+def metadata(transport, parameters):
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": transport.target,
+        "concurrency": transport.concurrency,
+        "database": connection.vendor if transport.target == "in-process" else None,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "parameters": parameters,
+    }
+
+
+def write_results(results, path):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+        file.write("\n")
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(baseline, results):
+    """
+    Changes from `baseline` to `results`, one row per scenario and metric both have.
+
+    `change` is the relative change in percent, `worse` tells whether it is a
+    regression for that metric.
+    """
+    rows = []
+    for scenario, current in results["scenarios"].items():
+        before = baseline["scenarios"].get(scenario)
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append({
+                "scenario": scenario,
+                "metric": metric,
+                "before": old,
+                "after": new,
+                "change": round(change, 1),
+                "worse": change < 0 if higher_is_better else change > 0,
+            })
+    return rows
@@ -0,0 +1,197 @@
+"""
+Batched contact writes.
+
+Shared by the bulk endpoints and the importers: numbers are checked against
+the database with one set-based query per batch and contacts, telephones and
+their search trigrams are written with `bulk_create`. Bulk updates and
+deletes run one statement per table, scoped to the user in SQL.
+"""
+import json
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.utils.error_formatter import format_serializer_errors
+from .models import Contact, Telephone
+from .search import index_telephones
+from .serializers import ContactSerializer, new_telephone
+from .sharding import contacts_db
+from .sync import record_deleted
+from .versioning import bump_version
+
+CONTACT_FIELDS = ["name", "address_line_1", "address_line_2", "city", "country", "postcode"]
+
+
+def max_bulk_contacts():
+    """Largest number of contacts accepted in one bulk request"""
+    return getattr(settings, "CONTACTS_BULK_MAX_ITEMS", 10_000)
+
+
+def in_lookup(values, using):
+    """
+    Value for an `__in` filter matching `values` in a query run on `using`.
+
+    On SQLite the values travel as a single JSON parameter, so batches of any
+    size stay one query instead of being split at the bound parameter limit.
+    """
+    if connections[using].vendor == "sqlite":
+        return RawSQL("SELECT value FROM json_each(%s)", [json.dumps(list(values))])
+    return list(values)
+
+
+def existing_numbers(user, numbers):
+    """Map those of `numbers` the user already has to the id of the contact holding them"""
+    if not numbers:
+        return {}
+    telephones = Telephone.objects.for_user(user)
+    telephones = telephones.filter(number__in=in_lookup(numbers, telephones.db))
+    return dict(telephones.values_list("number", "contact_id"))
+
+
+def submitted_numbers(item):
+    """Telephone numbers of a raw, not yet validated, contact payload"""
+    telephones = item.get("telephones") if isinstance(item, dict) else None
+    if not isinstance(telephones, list):
+        return []
+    return [phone["number"] for phone in telephones if isinstance(phone, dict) and isinstance(phone.get("number"), str)]
+
+
+def validate_contacts(items, request):
+    """
+    Validate raw contact payloads with the `ContactSerializer` rules.
+
+    Returns `(valid, errors)`: `valid` is a list of `(index, validated_data)`
+    and `errors` a list of `(index, message)`. A number is only accepted for
+    the first contact using it, whether it clashes with the database or with
+    an earlier item of the same batch.
+    """
+    numbers = {number for item in items for number in submitted_numbers(item)}
+    known_numbers = existing_numbers(request.user, numbers)
+    serializer = ContactSerializer(context={"request": request, "existing_numbers": known_numbers})
+
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            validated_data = serializer.run_validation(item)
+        except serializers.ValidationError as exc:
+            errors.append((index, format_serializer_errors(exc.detail)["message"]))
+            continue
+        known_numbers.update((phone["number"], None) for phone in validated_data["telephones"])
+        valid.append((index, validated_data))
+    return valid, errors
+
+
+def insert_contacts(user, items):
+    """Insert validated contact data and its telephones in batches, returning the new contacts"""
+    if not items:
+        return []
+    using = contacts_db(user)
+    version = bump_version(user)
+    contacts = Contact.objects.using(using).bulk_create(
+        Contact(user=user, sync_version=version, **{field: item.get(field) for field in CONTACT_FIELDS})
+        for item in items
+    )
+    telephones = Telephone.objects.using(using).bulk_create(
+        new_telephone(user, contact, phone["number"])
+        for contact, item in zip(contacts, items)
+        for phone in item["telephones"]
+    )
+    index_telephones(telephones, using)
+    return contacts
+
+
+class ContactSelectionSerializer(serializers.Serializer):
+    """Selects the contacts a bulk update or delete applies to, by ids or by a filter"""
+
+    FILTER_FIELDS = ["city", "country", "postcode"]
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    filter = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False, allow_empty=False)
+
+    def validate_ids(self, value):
+        limit = max_bulk_contacts()
+        if len(value) > limit:
+            raise serializers.ValidationError(f"at most {limit} ids can be sent in one request.")
+        return value
+
+    def validate_filter(self, value):
+        unknown = sorted(set(value) - set(self.FILTER_FIELDS))
+        if unknown:
+            raise serializers.ValidationError(
+                f"unsupported filter field {unknown[0]}, use one of {', '.join(self.FILTER_FIELDS)}."
+            )
+        return value
+
+    def validate(self, data):
+        if ("ids" in data) == ("filter" in data):
+            raise serializers.ValidationError({"message": "Provide either `ids` or `filter` to select contacts."})
+        return data
+
+    def get_queryset(self, user):
+        """The user's selected contacts"""
+        contacts = Contact.objects.for_user(user)
+        if "ids" in self.validated_data:
+            return contacts.filter(id__in=in_lookup(set(self.validated_data["ids"]), contacts.db))
+        return contacts.filter(*(
+            # Blank fields are stored as NULL or as "", a blank value selects both
+            Q(**{field: value}) if value else Q(**{f"{field}__isnull": True}) | Q(**{field: ""})
+            for field, value in self.validated_data["filter"].items()
+        ))
+
+
+class ContactBulkUpdateSerializer(ContactSelectionSerializer):
+    """Selection plus the contact fields to set on every selected contact"""
+
+    changes = serializers.DictField(allow_empty=False)
+
+    def validate_changes(self, value):
+        unknown = sorted(set(value) - set(CONTACT_FIELDS))
+        if unknown:
+            raise serializers.ValidationError(f"unsupported field {unknown[0]}, use one of {', '.join(CONTACT_FIELDS)}.")
+
+        serializer = ContactSerializer(data=value, partial=True)
+        if not serializer.is_valid():
+            raise serializers.ValidationError(format_serializer_errors(serializer.errors)["message"])
+        return serializer.validated_data
+
+
+def update_contacts(user, contacts, changes):
+    """Apply `changes` to every contact of `contacts` with a single UPDATE, return the row count"""
+    if not contacts.exists():
+        return 0
+    # `.update()` skips auto_now fields, so the modification time is set here
+    return contacts.update(**changes, sync_version=bump_version(user), updated_at=timezone.now())
+
+
+def delete_contacts(user, contacts):
+    """
+    Delete `contacts` and their telephones with one DELETE per table.
+
+    The ORM's cascade would first load every contact and then delete in
+    batches of ids; the raw deletes below instead filter by subquery. They
+    send no `pre_delete`/`post_delete` signals, nothing in the app listens
+    for contacts or telephones being deleted: search index rows are cleaned
+    up by the SQLite triggers, and the delta sync tombstones are written
+    first with one INSERT ... SELECT per table.
+    Returns the number of contacts and telephones deleted.
+    """
+    if not contacts.exists():
+        return 0, 0
+    record_deleted(user, contacts, bump_version(user))
+    using = contacts_db(user)
+    connection = connections[using]
+    selected, params = contacts.values("id").query.get_compiler(using).as_sql()
+    telephone_table = connection.ops.quote_name(Telephone._meta.db_table)
+    contact_table = connection.ops.quote_name(Contact._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {telephone_table} WHERE user_id = %s AND contact_id IN ({selected})", [user.pk, *params]
+        )
+        telephones_deleted = cursor.rowcount
+        cursor.execute(f"DELETE FROM {contact_table} WHERE user_id = %s AND id IN ({selected})", [user.pk, *params])
+        contacts_deleted = cursor.rowcount
+    return contacts_deleted, telephones_deleted
@@ -0,0 +1,106 @@
+"""
+Streaming exports of a user's address book.
+
+Contacts are read with `.iterator(chunk_size=...)`, which also prefetches the
+telephones of each chunk, so memory use depends on the chunk size and not on
+the size of the address book. Every writer turns that stream into an
+iterable of text blocks for `StreamingHttpResponse`.
+"""
+import csv
+import json
+
+from django.conf import settings
+
+from core.utils.routing import read_alias
+
+from .models import Contact
+
+CONTACT_FIELDS = ["id", "name", "address_line_1", "address_line_2", "city", "country", "postcode"]
+CSV_HEADER = [*CONTACT_FIELDS, "telephones"]
+
+# Separates several telephone numbers inside the single CSV column
+CSV_NUMBER_SEPARATOR = ";"
+
+
+def export_chunk_size():
+    """Contacts fetched (and telephones prefetched) per database round trip"""
+    return getattr(settings, "CONTACTS_EXPORT_CHUNK_SIZE", 2000)
+
+
+def export_queryset(user):
+    """Every contact of `user` with its telephones, oldest first"""
+    # Pinned to the read alias, telephones included: the response is streamed after the request's
+    # routing has ended, and one connection reads one consistent snapshot
+    return Contact.objects.using(read_alias()).for_user(user).with_telephones().order_by("id")
+
+
+def iter_contacts(user, chunk_size=None):
+    """`export_queryset` fetched chunk by chunk"""
+    return export_queryset(user).iterator(chunk_size=chunk_size or export_chunk_size())
+
+
+def _in_blocks(lines, size):
+    # One write per line is a lot of tiny chunks for the server, group them
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= size:
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+
+class _LineBuffer:
+    """File-like object handing back what `csv.writer` writes instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(contacts):
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(CSV_HEADER)
+    for contact in contacts:
+        numbers = CSV_NUMBER_SEPARATOR.join(phone.number for phone in contact.telephones.all())
+        yield writer.writerow([*(getattr(contact, field) or "" for field in CONTACT_FIELDS), numbers])
+
+
+def ndjson_lines(contacts):
+    for contact in contacts:
+        data = {field: getattr(contact, field) for field in CONTACT_FIELDS}
+        data["telephones"] = [{"number": phone.number} for phone in contact.telephones.all()]
+        yield json.dumps(data, ensure_ascii=False) + "\n"
+
+
+def _vcard_escape(value):
+    return (value or "").replace("\\", "\\\\").replace("\n", "\\n").replace(",", "\\,").replace(";", "\\;")
+
+
+def vcard_lines(contacts):
+    for contact in contacts:
+        address = ";".join(
+            _vcard_escape(value)
+            for value in ("", contact.address_line_2, contact.address_line_1, contact.city, "", contact.postcode, contact.country)
+        )
+        lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{_vcard_escape(contact.name)}", f"N:{_vcard_escape(contact.name)};;;;"]
+        if address.strip(";"):
+            lines.append(f"ADR;TYPE=HOME:{address}")
+        lines += [f"TEL;TYPE=VOICE:{_vcard_escape(phone.number)}" for phone in contact.telephones.all()]
+        lines.append("END:VCARD")
+        yield "\r\n".join(lines) + "\r\n"
+
+
+# format -> (line writer, content type, file extension)
+EXPORT_FORMATS = {
+    "csv": (csv_lines, "text/csv; charset=utf-8", "csv"),
+    "ndjson": (ndjson_lines, "application/x-ndjson; charset=utf-8", "ndjson"),
+    "vcard": (vcard_lines, "text/vcard; charset=utf-8", "vcf"),
+}
+
+
+def export_contacts(user, export_format, chunk_size=None):
+    """Text blocks of the user's whole address book in `export_format`"""
+    write_lines = EXPORT_FORMATS[export_format][0]
+    chunk_size = chunk_size or export_chunk_size()
+    return _in_blocks(write_lines(iter_contacts(user, chunk_size)), size=min(chunk_size, 500))
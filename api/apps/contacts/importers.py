@@ -0,0 +1,232 @@
+"""
+Streaming imports of CSV and vCard files.
+
+Files are parsed row by row and handled in batches: each batch is validated
+with the same rules as the API, checked against existing numbers with one
+query and written with `bulk_create` in its own transaction. Memory stays
+bounded by the batch size and no transaction holds the SQLite write lock for
+longer than one batch.
+
+Telephone numbers that are invalid or already belong to another contact are
+skipped and reported, the rest of the contact is still imported. A file that
+cannot be read further raises `ImportAborted`, whose report tells what was
+committed before.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from core.utils.error_formatter import format_serializer_errors
+from . import bulk
+from .exporters import CSV_NUMBER_SEPARATOR
+from .serializers import ContactSerializer, validate_telephone_number
+from .sharding import contacts_db
+
+IMPORT_FORMATS = ["csv", "vcard"]
+FILE_EXTENSIONS = {"csv": "csv", "vcf": "vcard", "vcard": "vcard"}
+
+# Only the first issues are kept so a broken file cannot blow up the report
+MAX_REPORTED_ISSUES = 100
+
+
+def import_batch_size():
+    """Rows validated and committed together"""
+    return getattr(settings, "CONTACTS_IMPORT_BATCH_SIZE", 1000)
+
+
+def detect_format(filename):
+    """Import format matching the file extension of `filename`, or None"""
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return FILE_EXTENSIONS.get(extension)
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    failed_rows: int = 0
+    skipped_numbers: int = 0
+    issues: list = field(default_factory=list)
+
+    def add_issue(self, row, message):
+        if len(self.issues) < MAX_REPORTED_ISSUES:
+            self.issues.append({"row": row, "message": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "failed_rows": self.failed_rows,
+            "skipped_numbers": self.skipped_numbers,
+            "issues": self.issues,
+        }
+
+
+class ImportAborted(ValueError):
+    """The file could not be read to the end, `report` covers the rows committed before"""
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+def _contact_item(values, numbers):
+    item = {name: (values.get(name) or "").strip() or None for name in bulk.CONTACT_FIELDS}
+    item["name"] = item["name"] or ""
+    item["telephones"] = [number.strip() for number in numbers if number.strip()]
+    return item
+
+
+def parse_csv(stream):
+    """Yield `(line number, contact)` from CSV text laid out like the CSV export"""
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or "name" not in reader.fieldnames:
+        raise ValueError("The CSV file must have a header row with a name column.")
+    for values in reader:
+        numbers = (values.get("telephones") or "").split(CSV_NUMBER_SEPARATOR)
+        yield reader.line_num, _contact_item(values, numbers)
+
+
+def _vcard_unescape(value):
+    return (
+        value.replace("\\n", "\n").replace("\\N", "\n").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+    )
+
+
+def _vcard_lines(stream):
+    # Undo line folding: a line starting with a space or tab continues the previous one
+    current = None
+    for raw_line in stream:
+        line = raw_line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def parse_vcard(stream):
+    """Yield `(card number, contact)` from vCard 3.0/4.0 text"""
+    card, values, numbers = 0, None, []
+    for line in _vcard_lines(stream):
+        key, _, value = line.partition(":")
+        prop = key.split(";")[0].split(".")[-1].upper()
+
+        if prop == "BEGIN" and value.upper() == "VCARD":
+            card, values, numbers = card + 1, {}, []
+        elif values is None:
+            continue
+        elif prop == "END" and value.upper() == "VCARD":
+            yield card, _contact_item(values, numbers)
+            values = None
+        elif prop == "FN":
+            values["name"] = _vcard_unescape(value)
+        elif prop == "N" and not values.get("name"):
+            family, given = (value.split(";") + [""])[:2]
+            values["name"] = " ".join(part for part in (_vcard_unescape(given), _vcard_unescape(family)) if part)
+        elif prop == "ADR" and "address_line_1" not in values:
+            parts = (value.split(";") + [""] * 7)[:7]
+            _, extended, street, city, _, postcode, country = (_vcard_unescape(part) for part in parts)
+            values.update(address_line_1=street, address_line_2=extended, city=city, postcode=postcode, country=country)
+        elif prop == "TEL":
+            numbers.append(_vcard_unescape(value).removeprefix("tel:"))
+
+
+PARSERS = {"csv": parse_csv, "vcard": parse_vcard}
+
+
+def open_text(binary_file):
+    """Decode an uploaded or opened binary file lazily, line by line"""
+    return io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+
+
+def import_contacts(user, stream, import_format, batch_size=None):
+    """
+    Import every contact of the text `stream` for `user` and return an `ImportReport`.
+
+    Raises `ImportAborted` when the stream cannot be parsed or decoded to the end.
+    """
+    report = ImportReport()
+    batch_size = batch_size or import_batch_size()
+    batch = []
+    try:
+        for row, item in PARSERS[import_format](stream):
+            report.rows += 1
+            batch.append((row, item))
+            if len(batch) >= batch_size:
+                _import_batch(user, batch, report)
+                batch = []
+    except ValueError as exc:
+        # Earlier batches are committed already, the rows read before the error are kept too
+        if batch:
+            _import_batch(user, batch, report)
+        raise ImportAborted(str(exc), report) from exc
+    if batch:
+        _import_batch(user, batch, report)
+    return report
+
+
+def _validate_batch(batch, report):
+    serializer = ContactSerializer()
+    valid = []
+    for row, item in batch:
+        numbers = item.pop("telephones")
+        try:
+            data = serializer.run_validation({**item, "telephones": []})
+        except serializers.ValidationError as exc:
+            report.failed_rows += 1
+            report.add_issue(row, format_serializer_errors(exc.detail)["message"])
+            continue
+
+        accepted = []
+        for number in dict.fromkeys(numbers):
+            try:
+                accepted.append(validate_telephone_number(number))
+            except serializers.ValidationError as exc:
+                report.skipped_numbers += 1
+                report.add_issue(row, f"telephones, {number}: {exc.detail[0]}".lower())
+        valid.append((row, data, accepted))
+    return valid
+
+
+def _claim_numbers(user, valid):
+    taken = set(bulk.existing_numbers(user, {number for _, _, numbers in valid for number in numbers}))
+    items, skipped = [], []
+    for row, data, numbers in valid:
+        data["telephones"] = []
+        for number in numbers:
+            if number in taken:
+                skipped.append((row, number))
+                continue
+            taken.add(number)
+            data["telephones"].append({"number": number})
+        items.append(data)
+    return items, skipped
+
+
+def _import_batch(user, batch, report):
+    valid = _validate_batch(batch, report)
+    for _ in range(2):
+        items, skipped = _claim_numbers(user, valid)
+        try:
+            with transaction.atomic(using=contacts_db(user)):
+                contacts = bulk.insert_contacts(user, items)
+        except IntegrityError:
+            # A number was added by another writer since it was checked, look again once
+            continue
+
+        report.created += len(contacts)
+        report.skipped_numbers += len(skipped)
+        for row, number in skipped:
+            report.add_issue(row, f"telephones, the number {number} is already linked to another contact.")
+        return
+
+    report.failed_rows += len(valid)
+    report.add_issue(batch[0][0], "telephones, numbers in this batch kept changing while importing. please retry.")
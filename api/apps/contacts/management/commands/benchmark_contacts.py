@@ -0,0 +1,117 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.contacts import benchmark, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the contacts API in-process against a throwaway database, or against a running server "
+        "with --url, and report latency percentiles, requests per second and queries per request"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8000 (default: in-process)")
+        parser.add_argument("--email", help="With --url, user to log in as, registered when missing (default: a new user)")
+        parser.add_argument("--password", default=seeding.DEFAULT_PASSWORD, help="With --url, password of --email")
+        parser.add_argument("--users", type=int, default=10, help="In-process, users to seed (default: 10)")
+        parser.add_argument("--contacts", type=int, default=1000, help="Contacts seeded per user (default: 1000)")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario (default: 200)")
+        parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each read scenario (default: 5)")
+        parser.add_argument("--concurrency", type=int, default=1, help="With --url, requests in flight at once (default: 1)")
+        parser.add_argument(
+            "--scenario", action="append", choices=benchmark.SCENARIOS, dest="scenarios",
+            help="Scenario to run, repeat for several (default: all)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the generated data (default: 0)")
+        parser.add_argument(
+            "--response-cache", action="store_true",
+            help="Let repeated reads be answered from the response cache (default: every read reaches the database)",
+        )
+        parser.add_argument(
+            "--database-file",
+            help="In-process, SQLite file for the throwaway database (default: in memory); it is deleted afterwards",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument("--compare", help="Results file of an earlier run to compare against")
+        parser.add_argument(
+            "--max-regression", type=float, default=None,
+            help="With --compare, fail when a metric got worse by more than this many percent",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = benchmark.load_results(options["compare"])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+        parameters = {"contacts": options["contacts"], "scenarios": options["scenarios"] or benchmark.SCENARIOS}
+
+        if options["url"]:
+            results = self.run_over_http(options, parameters)
+        else:
+            results = self.run_in_process(options, parameters)
+
+        self.report(results)
+        if options["output"]:
+            benchmark.write_results(results, options["output"])
+            self.stdout.write(f"Results written to {options['output']}")
+        if baseline is not None:
+            self.report_comparison(benchmark.compare(baseline, results), options["max_regression"])
+
+    def run_in_process(self, options, parameters):
+        with benchmark.throwaway_databases(options["database_file"]):
+            self.stdout.write(f"Seeding {options['users']} users with {options['contacts']} contacts each")
+            users = benchmark.seed_users(options["users"], options["contacts"], options["seed"])
+            return benchmark.run_benchmark(
+                benchmark.InProcessTransport(users), options["requests"], options["scenarios"], options["warmup"],
+                options["seed"], {**parameters, "users": options["users"]}, options["response_cache"],
+            )
+
+    def run_over_http(self, options, parameters):
+        # A new user per run unless told otherwise, so earlier runs' contacts do not skew this one
+        email = options["email"] or f"bench-{int(time.time())}@example.com"
+        try:
+            transport = benchmark.HttpTransport.login(
+                options["url"], email, options["password"], concurrency=options["concurrency"],
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        if options["contacts"]:
+            self.stdout.write(f"Seeding {options['contacts']} contacts for {email}")
+            benchmark.seed_over_http(transport, options["contacts"], options["seed"])
+        return benchmark.run_benchmark(
+            transport, options["requests"], options["scenarios"], options["warmup"], options["seed"],
+            {**parameters, "email": email}, options["response_cache"],
+        )
+
+    def report(self, results):
+        meta = results["meta"]
+        self.stdout.write(f"{meta['target']} at {meta['commit'] or 'unknown commit'}, concurrency {meta['concurrency']}")
+        self.stdout.write(
+            f"{'scenario':<10} {'requests':>8} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} "
+            f"{'queries':>7} {'cache hits':>10}"
+        )
+        for scenario, stats in results["scenarios"].items():
+            self.stdout.write(
+                f"{scenario:<10} {stats['requests']:>8} {stats['errors']:>6} {_cell(stats['p50_ms'])} "
+                f"{_cell(stats['p95_ms'])} {_cell(stats['p99_ms'])} {_cell(stats['requests_per_second'])} "
+                f"{_cell(stats['queries_per_request'], 7)} {_cell(stats.get('cache_hit_ratio'), 10)}"
+            )
+
+    def report_comparison(self, rows, max_regression):
+        regressions = []
+        for row in rows:
+            line = f"{row['scenario']:<10} {row['metric']:<20} {row['before']:>10} -> {row['after']:<10} {row['change']:+.1f}%"
+            if row["worse"] and max_regression is not None and abs(row["change"]) > max_regression:
+                regressions.append(row)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} metrics regressed by more than {max_regression}%.")
+
+
+def _cell(value, width=9):
+    return f"{'-' if value is None else value:>{width}}"
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.contacts.response_cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show the hit and miss counts of the contact response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters after showing them")
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        lookups = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / lookups if lookups else 0
+        self.stdout.write(f"hits: {stats['hits']}\nmisses: {stats['misses']}\nhit ratio: {ratio:.1%}")
+        if options["reset"]:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
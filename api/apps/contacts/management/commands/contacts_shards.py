@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.contacts import sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Migrate the contacts shard databases, pin users to their shard, move a user to another shard or remove "
+        "the rows left on a shard their user is not placed on"
+    )
+
+    def add_arguments(self, parser):
+        actions = parser.add_subparsers(dest="action", required=True)
+        actions.add_parser("migrate", help="Apply migrations to the default database and every shard")
+        actions.add_parser("pin", help="Store the hashed shard of every unpinned user, run before changing the shards")
+        move = actions.add_parser("move", help="Move a user's contacts to another shard")
+        move.add_argument("--user", required=True, help="Email of the user to move")
+        move.add_argument("--to", required=True, choices=sharding.shard_aliases(), help="Shard to move the user to")
+        cleanup = actions.add_parser(
+            "cleanup", help="Delete the rows of deleted users and the copies left by interrupted moves",
+        )
+        cleanup.add_argument("--dry-run", action="store_true", help="Only report the users with stray rows")
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_migrate(self, options):
+        for alias in sharding.contacts_databases():
+            self.stdout.write(f"Migrating {alias}")
+            call_command("migrate", database=alias, interactive=False, verbosity=options["verbosity"])
+        self.stdout.write(self.style.SUCCESS(f"Migrated {len(sharding.contacts_databases())} databases."))
+
+    def handle_pin(self, options):
+        users = get_user_model().objects.filter(contacts_shard="")
+        placements = {}
+        for user_id in users.values_list("pk", flat=True).iterator():
+            placements.setdefault(sharding.hashed_shard(user_id), []).append(user_id)
+        pinned = 0
+        for alias, user_ids in placements.items():
+            pinned += users.filter(pk__in=user_ids).update(contacts_shard=alias)
+        self.stdout.write(self.style.SUCCESS(f"Pinned {pinned} users."))
+
+    def handle_move(self, options):
+        try:
+            user = get_user_model().objects.get(email=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with the email {options['user']}.")
+
+        source = sharding.contacts_db(user)
+        moved = sharding.move_user(user, options["to"])
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} contacts of {user.email} from {source} to {options['to']}."))
+
+    def handle_cleanup(self, options):
+        users = contacts = 0
+        for alias in sharding.contacts_databases():
+            user_ids = sharding.stray_users(alias)
+            if user_ids:
+                self.stdout.write(f"{alias}: {len(user_ids)} users with stray rows ({', '.join(map(str, user_ids[:10]))})")
+            if not options["dry_run"]:
+                contacts += sum(sharding.delete_user_rows(user_id, alias) for user_id in user_ids)
+            users += len(user_ids)
+        if options["dry_run"]:
+            self.stdout.write(f"Found stray rows of {users} users.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted stray rows of {users} users, {contacts} contacts."))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.contacts import benchmark, plans, seeding
+from apps.contacts.sharding import contacts_databases
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, send one request to every contacts endpoint and flag the full scans, "
+        "partition scans and temporary B-trees in the EXPLAIN QUERY PLAN of the SQL they run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20, help="Users to seed (default: %(default)s)")
+        parser.add_argument("--contacts", type=int, default=20_000, help="Contacts seeded (default: %(default)s)")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the generated data (default: %(default)s)")
+        parser.add_argument(
+            "--analyze", action="store_true",
+            help="Run ANALYZE after seeding so the planner has table statistics (production databases have none)",
+        )
+        parser.add_argument("--all", action="store_true", help="Print every plan, not only those with issues")
+        parser.add_argument(
+            "--fail", action="store_true", help="Exit with an error when an issue that is not accepted is found",
+        )
+
+    def handle(self, *args, **options):
+        with benchmark.throwaway_databases():
+            users, _ = seeding.seed(options["users"], options["contacts"], options["seed"])
+            if options["analyze"]:
+                for using in contacts_databases():
+                    with connections[using].cursor() as cursor:
+                        cursor.execute("ANALYZE")
+            # The user with the most contacts shows the plans at their worst
+            user = max(users, key=lambda user: user.telephones.using(seeding.contacts_db(user)).count())
+            try:
+                results = plans.explain_endpoints(user)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        issues = 0
+        for endpoint, endpoint_plans in results.items():
+            flagged = [plan for plan in endpoint_plans if plans.unexpected_issues(plan)]
+            issues += sum(len(plans.unexpected_issues(plan)) for plan in flagged)
+            status = self.style.ERROR(f"{len(flagged)} flagged") if flagged else self.style.SUCCESS("ok")
+            self.stdout.write(f"{endpoint}: {len(endpoint_plans)} statements, {status}")
+            for plan in endpoint_plans if options["all"] else flagged:
+                self.stdout.write(f"  {plan.sql}")
+                self.stdout.write("\n".join(f"    {line}" for line in plan.tree().splitlines()))
+                for issue in plan.issues:
+                    if reason := plans.accepted(plan, issue):
+                        self.stdout.write(f"    -> {issue} (accepted: {reason})")
+                    else:
+                        self.stdout.write(self.style.WARNING(f"    -> {issue}"))
+
+        if issues and options["fail"]:
+            raise CommandError(f"{issues} plan issues found.")
+        self.stdout.write(f"{issues} plan issues found.")
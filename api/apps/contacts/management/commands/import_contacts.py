@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.contacts import importers
+
+
+class Command(BaseCommand):
+    help = "Import contacts for a user from a CSV or vCard file, committing in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or vCard file to import")
+        parser.add_argument("--user", required=True, help="Email of the user the contacts belong to")
+        parser.add_argument(
+            "--format",
+            choices=importers.IMPORT_FORMATS,
+            help="File format (default: taken from the file extension)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Rows validated and committed per transaction (default: CONTACTS_IMPORT_BATCH_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with the email {options['user']}.")
+
+        import_format = options["format"] or importers.detect_format(options["path"])
+        if import_format is None:
+            raise CommandError("Cannot tell the file format from its extension, pass --format.")
+
+        try:
+            with open(options["path"], "rb") as file:
+                report = importers.import_contacts(user, importers.open_text(file), import_format, options["batch_size"])
+        except importers.ImportAborted as exc:
+            raise CommandError(f"{str(exc).rstrip('.')}. {exc.report.created} contacts were imported before the error.")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for issue in report.issues:
+            self.stderr.write(f"Row {issue['row']}: {issue['message']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report.created} of {report.rows} contacts "
+                f"({report.failed_rows} rows failed, {report.skipped_numbers} telephone numbers skipped)."
+            )
+        )
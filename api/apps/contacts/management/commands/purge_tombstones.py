@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.contacts.sync import purge_tombstones, tombstone_retention
+
+
+class Command(BaseCommand):
+    help = "Delete delta sync tombstones older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Keep tombstones of the last DAYS days (default: CONTACTS_TOMBSTONE_RETENTION_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        retention = timedelta(days=options["days"]) if options["days"] is not None else tombstone_retention()
+        deleted = purge_tombstones(timezone.now() - retention)
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} tombstones."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.contacts.search import install_search_index, is_supported, rebuild_phone_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text and telephone number search indexes for contacts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to rebuild the index on (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        if not is_supported(using):
+            raise CommandError(f"The search index requires SQLite, '{using}' is not a SQLite database.")
+
+        install_search_index(using)
+        contacts = rebuild_search_index(using)
+        telephones = rebuild_phone_index(using)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {contacts} contacts and {telephones} telephones."))
@@ -0,0 +1,51 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.contacts import seeding
+
+
+class Command(BaseCommand):
+    help = "Create synthetic users, contacts and telephones in bulk, e.g. to reproduce production volumes locally"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Users to create (default: %(default)s)")
+        parser.add_argument("--contacts", type=int, default=100_000, help="Contacts spread over the users (default: %(default)s)")
+        parser.add_argument(
+            "--spread", choices=seeding.SPREADS, default="lognormal",
+            help="How contacts are spread over users (default: %(default)s)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, also part of the emails (default: %(default)s)")
+        parser.add_argument(
+            "--batch-size", type=int, default=50_000, help="Contacts written per transaction (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--password", default=seeding.DEFAULT_PASSWORD, help="Password of every created user (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["contacts"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--users and --batch-size must be positive and --contacts cannot be negative.")
+
+        started = perf_counter()
+
+        def progress(contacts, telephones):
+            elapsed = perf_counter() - started
+            self.stdout.write(
+                f"{contacts}/{options['contacts']} contacts, {telephones} telephones "
+                f"({contacts / elapsed:,.0f} contacts/s)"
+            )
+
+        try:
+            _, summary = seeding.seed(
+                options["users"], options["contacts"], options["seed"], options["spread"],
+                options["batch_size"], options["password"], progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['users']} users, {summary['contacts']} contacts and {summary['telephones']} "
+            f"telephones in {summary['seconds']}s. Users log in as {seeding.seed_email(options['seed'], 0)} "
+            f"and so on, with the password {options['password']}."
+        ))
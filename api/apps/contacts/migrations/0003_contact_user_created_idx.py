@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0002_alter_contact_address_line_1_alter_contact_city_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='contact_user_created_idx'),
+        ),
+    ]
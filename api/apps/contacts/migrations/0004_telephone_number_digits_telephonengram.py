@@ -0,0 +1,50 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_number_index(apps, schema_editor):
+    """Fill the digits-only numbers and their trigrams for existing telephones"""
+    Telephone = apps.get_model("contacts", "Telephone")
+    TelephoneNgram = apps.get_model("contacts", "TelephoneNgram")
+    using = schema_editor.connection.alias
+
+    telephones = Telephone.objects.using(using).only("user_id", "number")
+    for telephone in telephones.iterator(chunk_size=2000):
+        digits = "".join(char for char in telephone.number if char.isdigit())
+        Telephone.objects.using(using).filter(pk=telephone.pk).update(number_digits=digits)
+        TelephoneNgram.objects.using(using).bulk_create(
+            TelephoneNgram(user_id=telephone.user_id, telephone_id=telephone.pk, gram=gram)
+            for gram in {digits[i:i + 3] for i in range(len(digits) - 2)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0003_contact_user_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telephone',
+            name='number_digits',
+            field=models.CharField(default='', editable=False, max_length=20),
+        ),
+        migrations.CreateModel(
+            name='TelephoneNgram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('telephone', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='ngrams', to='contacts.telephone')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'gram', 'telephone'], name='telephone_ngram_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_number_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def backfill_versions(apps, schema_editor):
+    """Give every user that already has contacts a version, so their reads can be cached"""
+    Contact = apps.get_model("contacts", "Contact")
+    ContactsVersion = apps.get_model("contacts", "ContactsVersion")
+    db_alias = schema_editor.connection.alias
+
+    now = timezone.now()
+    users = Contact.objects.using(db_alias).values_list("user_id", flat=True).distinct()
+    existing = set(ContactsVersion.objects.using(db_alias).values_list("user_id", flat=True))
+    ContactsVersion.objects.using(db_alias).bulk_create(
+        [ContactsVersion(user_id=user_id, version=1, updated_at=now) for user_id in users if user_id not in existing],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0005_contact_updated_at_contactsversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0006_backfill_contactsversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('contact', 'Contact'), ('telephone', 'Telephone')], max_length=10)),
+                ('contact_id', models.PositiveBigIntegerField()),
+                ('number', models.CharField(blank=True, default='', max_length=20)),
+                ('sync_version', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        # Existing contacts count as written at their user's current version
+        migrations.RunSQL(
+            "UPDATE contacts_contact SET sync_version = coalesce("
+            "(SELECT v.version FROM contacts_contactsversion v WHERE v.user_id = contacts_contact.user_id), 0)",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddField(
+            model_name='contactsversion',
+            name='tombstone_floor',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['user', 'sync_version'], name='contact_user_sync_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user', 'sync_version'], name='tombstone_user_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0008_user_fk_without_db_constraint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='telephone',
+            index=models.Index(fields=['user', 'contact'], name='telephone_user_contact_idx'),
+        ),
+    ]
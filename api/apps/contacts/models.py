@@ -1,12 +1,43 @@
+import re
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .sharding import user_using
+
 User = get_user_model()
 
+
+def normalize_number(number):
+    """Strip a telephone number down to its digits, e.g. `(020) 7946` -> `0207946`"""
+    return re.sub(r"\D", "", number)
+
+
+class UserDataQuerySet(models.QuerySet):
+    """Rows owned by a user, read from the database holding that user's contacts"""
+
+    def for_user(self, user):
+        """Rows owned by `user`"""
+        queryset = self.filter(user=user)
+        using = user_using(user)
+        return queryset.using(using) if using else queryset
+
+
+class ContactQuerySet(UserDataQuerySet):
+    """Shared query building blocks for the contacts views"""
+
+    def with_telephones(self):
+        """Prefetch telephone numbers in one query instead of one per contact, from the contacts' database"""
+        return self.prefetch_related(
+            models.Prefetch("telephones", queryset=Telephone.objects.using(self._db).only("contact", "number"))
+        )
+
+
 class Contact(models.Model):
     """Model to store contact information linked to a user"""
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="contacts")
+    # No constraint: with sharding contacts live in another database than users, see apps.contacts.sharding
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="contacts", db_constraint=False)
     name = models.CharField(max_length=255)
     address_line_1 = models.CharField(max_length=255,blank=True, null=True)
     address_line_2 = models.CharField(max_length=255, blank=True, null=True)
@@ -15,6 +46,18 @@ class Contact(models.Model):
     postcode = models.CharField(max_length=20,blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # User's ContactsVersion.version of the last write to this contact, see apps.contacts.sync
+    sync_version = models.PositiveBigIntegerField(default=0)
+
+    objects = ContactQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Supports the newest-first listing and its keyset pagination
+            models.Index(fields=["user", "-created_at", "-id"], name="contact_user_created_idx"),
+            models.Index(fields=["user", "sync_version"], name="contact_user_sync_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.user.email}"
@@ -23,12 +66,87 @@ class Contact(models.Model):
 class Telephone(models.Model):
     """Model to store multiple telephone numbers per contact"""
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="telephones")  
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="telephones", db_constraint=False)
     contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name="telephones")
     number = models.CharField(max_length=20)
+    # Digits-only copy of `number` so searches ignore punctuation and spacing
+    number_digits = models.CharField(max_length=20, default="", editable=False)
+
+    objects = UserDataQuerySet.as_manager()
 
     class Meta:
         unique_together = ("user", "number")  
+        indexes = [
+            # Finds the telephones of a page of contacts without reading all of the user's
+            models.Index(fields=["user", "contact"], name="telephone_user_contact_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.number_digits = normalize_number(self.number)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.number} ({self.contact.name})"
+
+
+class TelephoneNgram(models.Model):
+    """Trigram of a telephone's digits, used to answer partial number searches from an index"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_constraint=False)
+    # Rows are removed by an SQLite trigger when their telephone is deleted, see apps.contacts.search
+    telephone = models.ForeignKey(Telephone, on_delete=models.DO_NOTHING, related_name="ngrams")
+    gram = models.CharField(max_length=3)
+
+    objects = UserDataQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "gram", "telephone"], name="telephone_ngram_lookup_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.gram} ({self.telephone_id})"
+
+
+class ContactsVersion(models.Model):
+    """Per-user counter bumped by every write to the user's contacts, see apps.contacts.versioning"""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="contacts_version", db_constraint=False
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+    # Tombstones up to this version were purged, older sync tokens need a full resync
+    tombstone_floor = models.PositiveBigIntegerField(default=0)
+
+    objects = UserDataQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
+
+
+class Tombstone(models.Model):
+    """Record of a deleted contact or telephone, kept so offline clients can sync deletions"""
+
+    CONTACT = "contact"
+    TELEPHONE = "telephone"
+    KIND_CHOICES = [(CONTACT, "Contact"), (TELEPHONE, "Telephone")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_constraint=False)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Plain values rather than foreign keys, the rows they point to are gone
+    contact_id = models.PositiveBigIntegerField()
+    number = models.CharField(max_length=20, blank=True, default="")
+    sync_version = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField()
+
+    objects = UserDataQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "sync_version"], name="tombstone_user_sync_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.contact_id} {self.number}".strip()
@@ -0,0 +1,161 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+Cursor = namedtuple("Cursor", ["created_at", "id", "reverse"])
+
+
+class ContactPagination(PageNumberPagination):
+    """Custom pagination for contacts"""
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 50
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` for async views, Django's paginator only counts and slices synchronously"""
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+
+class ContactCursorPagination(BasePagination):
+    """
+    Keyset pagination for contacts ordered newest first.
+
+    Cursors are opaque tokens wrapping the `(created_at, id)` of the page edge,
+    so every page is an indexed range scan no matter how deep it is. The total
+    count is only computed when the client asks for it with `?count=true`.
+    """
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    page_size = ContactPagination.page_size
+    page_size_query_param = ContactPagination.page_size_query_param
+    max_page_size = ContactPagination.max_page_size
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_query = self.page_query(queryset, request)
+        self.count = queryset.count() if self.wants_count(request) else None
+        return self.set_page(list(page_query))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` for async views"""
+        page_query = self.page_query(queryset, request)
+        self.count = await queryset.acount() if self.wants_count(request) else None
+        return self.set_page([row async for row in page_query])
+
+    def page_query(self, queryset, request):
+        """Read the cursor from `request` and return the query for its page plus one row"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            ordering = ("-created_at", "-id")
+        elif self.cursor.reverse:
+            ordering = ("created_at", "id")
+            queryset = queryset.filter(
+                Q(created_at__gt=self.cursor.created_at)
+                | Q(created_at=self.cursor.created_at, id__gt=self.cursor.id)
+            )
+        else:
+            ordering = ("-created_at", "-id")
+            queryset = queryset.filter(
+                Q(created_at__lt=self.cursor.created_at)
+                | Q(created_at=self.cursor.created_at, id__lt=self.cursor.id)
+            )
+
+        # Fetch one extra row to find out whether there is another page
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def set_page(self, results):
+        """Keep the page of the fetched `results` and note which links it has"""
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.cursor is not None and self.cursor.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() in ("1", "true", "yes")
+
+    def decode_cursor(self, request):
+        """Return the `Cursor` sent by the client, or None on the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            direction, created_at, pk = urlsafe_b64decode(encoded.encode("ascii")).decode("ascii").split("|")
+            return Cursor(created_at=datetime.fromisoformat(created_at), id=int(pk), reverse=direction == "p")
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        """Return the current url with the cursor pointing at `instance`, a contact or a `.values()` row"""
+        if isinstance(instance, dict):
+            created_at, pk = instance["created_at"], instance["id"]
+        else:
+            created_at, pk = instance.created_at, instance.id
+        token = f"{'p' if reverse else 'n'}|{created_at.isoformat()}|{pk}"
+        encoded = urlsafe_b64encode(token.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Walked backwards past the newest contact, start again from the top
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "previous": self.get_previous_link(), "results": data}
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+def get_contact_paginator(request):
+    """Pick cursor pagination when the client opts in, page numbers otherwise"""
+    if request.query_params.get("pagination") == "cursor" or request.query_params.get("cursor"):
+        return ContactCursorPagination()
+    return ContactPagination()
@@ -0,0 +1,121 @@
+"""
+Query plans of the contacts endpoints.
+
+`explain_endpoints` sends one request to every contacts endpoint as a user
+and returns, per endpoint, the `EXPLAIN QUERY PLAN` of each statement it ran
+(see core.utils.query_plans). `manage.py explain_contacts` prints them and
+the tests keep the endpoints free of full scans.
+
+Some issues come with the query rather than a missing index; `ACCEPTED`
+lists them with the reason, and `unexpected_issues` leaves them out.
+
+The response cache is turned off so every request reaches the database.
+Writes run last, on contacts created for the purpose.
+"""
+import re
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+
+from django.db import DEFAULT_DB_ALIAS
+from django.test import override_settings
+
+from core.utils.query_plans import PARTITION_SCAN, TEMP_BTREE, capture_plans
+from .benchmark import InProcessTransport
+from .models import Contact, Telephone, TelephoneNgram, Tombstone
+from .sharding import contacts_db
+
+# Tables holding many rows per user, reading all of a user's rows is flagged
+PARTITIONS = {model._meta.db_table: "user_id" for model in (Contact, Telephone, TelephoneNgram, Tombstone)}
+
+# (issue kind, pattern of the statement, why no index avoids it)
+ACCEPTED = [
+    (TEMP_BTREE, r"ORDER BY bm25\(", "name and address matches are ranked by relevance, computed per match"),
+    (TEMP_BTREE, r"FROM \"contacts_telephonengram\"",
+     "number matches are counted and ordered across several trigrams, no single index orders them"),
+    (PARTITION_SCAN, r"^SELECT COUNT\(\*\)", "numbered pages need the user's total, the cursor pagination skips it"),
+    (PARTITION_SCAN, r"^SELECT .* FROM \"contacts_contact\" WHERE \"contacts_contact\".\"user_id\" = %s ORDER BY",
+     "the export returns every contact of the user"),
+    (PARTITION_SCAN, r"^UPDATE \"contacts_contact\" SET .* WHERE \(\"contacts_contact\".\"user_id\" = %s AND",
+     "bulk updates by filter are rare and match any combination of fields"),
+]
+
+
+def accepted(plan, issue):
+    """Why `issue` of `plan` is accepted, None if it is not"""
+    for kind, pattern, reason in ACCEPTED:
+        if issue.kind == kind and re.search(pattern, plan.sql):
+            return reason
+    return None
+
+
+def unexpected_issues(plan):
+    """Issues of `plan` an index should avoid"""
+    return [issue for issue in plan.issues if accepted(plan, issue) is None]
+
+
+def _capture(user):
+    """Capture plans on the default database and the user's shard"""
+    stack = ExitStack()
+    plans = [
+        stack.enter_context(capture_plans(using, partitions=PARTITIONS))
+        for using in {DEFAULT_DB_ALIAS, contacts_db(user)}
+    ]
+    return stack, plans
+
+
+def explain_endpoints(user):
+    """
+    `{endpoint: [QueryPlan, ...]}` for every contacts endpoint, in request order.
+
+    `user` needs a contact with a telephone.
+    """
+    telephone = Telephone.objects.for_user(user).order_by("-id").first()
+    if telephone is None:
+        raise ValueError(f"{user} has no contact with a telephone to explain the endpoints with.")
+    contact_id, number = telephone.contact_id, telephone.number
+    name = telephone.contact.name
+    transport = InProcessTransport([user])
+    results = {}
+
+    def request(endpoint, method, path, body=None):
+        stack, plans = _capture(user)
+        with stack:
+            response = transport.request(0, method, path, body)
+        if not response.ok:
+            raise ValueError(f"{endpoint}: {method} {path} answered {response.status}: {response.body[:200]!r}")
+        results[endpoint] = [plan for captured in plans for plan in captured]
+        return response
+
+    with override_settings(CONTACTS_CACHE_TIMEOUT=0):
+        request("list", "GET", "/api/contacts")
+        request("list, last page", "GET", "/api/contacts?page=last&page_size=50")
+        first_page = transport.request(0, "GET", "/api/contacts?pagination=cursor&page_size=5").json()
+        if first_page["next"]:
+            next_page = urlsplit(first_page["next"])
+            request("list, next cursor page", "GET", f"{next_page.path}?{next_page.query}")
+        request("search", "GET", f"/api/contacts/search?q={name.split()[-1]}")
+        request("search, cursor", "GET", f"/api/contacts/search?q={name.split()[-1]}&pagination=cursor")
+        request("search, number", "GET", f"/api/contacts/search?q={telephone.number_digits[-7:]}")
+        request("detail", "GET", f"/api/contacts/{contact_id}")
+        request("changes", "GET", "/api/contacts/changes?since=1")
+        request("export", "GET", "/api/contacts/export/csv")
+
+        created = request("create", "POST", "/api/contacts", {
+            "name": "Plan Check", "city": "Paris", "telephones": [{"number": "+1 999 000 001"}],
+        }).json()["contact"]["id"]
+        request("update", "PUT", f"/api/contacts/{contact_id}", {
+            "name": name, "telephones": [{"number": number}, {"number": "+1 999 000 002"}],
+        })
+        request("update, replace", "PUT", f"/api/contacts/{contact_id}?replace=true", {
+            "telephones": [{"number": number}],
+        })
+        bulk = request("bulk create", "POST", "/api/contacts/bulk", [
+            {"name": "Plan Check", "city": "Paris", "telephones": [{"number": "+1 999 000 003"}]},
+        ]).json()
+        request("bulk update", "PUT", "/api/contacts/bulk", {"ids": [created], "changes": {"country": "France"}})
+        request("bulk update, filter", "PUT", "/api/contacts/bulk", {
+            "filter": {"city": "Paris"}, "changes": {"country": "France"},
+        })
+        request("delete", "DELETE", f"/api/contacts/{created}")
+        request("bulk delete", "DELETE", "/api/contacts/bulk", {"ids": [result["id"] for result in bulk["results"]]})
+    return results
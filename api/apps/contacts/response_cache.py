@@ -0,0 +1,137 @@
+"""
+Per-user cache of contact list and search responses.
+
+Entries are keyed by view, user, the user's `ContactsVersion` and the query
+parameters. Writes bump the version in the same transaction as the data
+(see apps.contacts.versioning), so after a write every older entry simply
+stops being looked up and ages out through the cache's own TTL and culling:
+nothing has to be found or deleted, and a stale page can never be served.
+
+The backend is whichever cache `CONTACTS_CACHE_ALIAS` names in `CACHES`, so
+locmem, file based or shared caches all work. Hits and misses are counted in
+the same cache, see `cache_stats`.
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versioning import acurrent_version, current_version
+
+KEY_PREFIX = "contacts:response"
+STATS_KEYS = {"hits": "contacts:stats:hits", "misses": "contacts:stats:misses"}
+
+
+def get_cache():
+    return caches[getattr(settings, "CONTACTS_CACHE_ALIAS", "default")]
+
+
+def cache_timeout():
+    """Seconds a response stays cached, 0 turns the cache off"""
+    return getattr(settings, "CONTACTS_CACHE_TIMEOUT", 300)
+
+
+def response_key(name, request):
+    """Cache key of the response of view `name` to `request`"""
+    version, changed_at = current_version(request)
+    params = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+    # Pagination links are absolute, so the host is part of the response too
+    digest = hashlib.md5(f"{request.get_host()}?{urlencode(params)}".encode()).hexdigest()
+    return f"{KEY_PREFIX}:{name}:{request.user.pk}:{version}.{changed_at.timestamp()}:{digest}"
+
+
+def _count(stat):
+    cache = get_cache()
+    cache.add(STATS_KEYS[stat], 0, timeout=None)
+    try:
+        cache.incr(STATS_KEYS[stat])
+    except ValueError:
+        # Evicted between add() and incr(), the count restarts
+        cache.add(STATS_KEYS[stat], 1, timeout=None)
+
+
+async def _acount(stat):
+    cache = get_cache()
+    await cache.aadd(STATS_KEYS[stat], 0, timeout=None)
+    try:
+        await cache.aincr(STATS_KEYS[stat])
+    except ValueError:
+        await cache.aadd(STATS_KEYS[stat], 1, timeout=None)
+
+
+def cache_stats():
+    """Hit and miss counts since the counters were last reset"""
+    values = get_cache().get_many(STATS_KEYS.values())
+    return {stat: values.get(key, 0) for stat, key in STATS_KEYS.items()}
+
+
+def reset_cache_stats():
+    get_cache().delete_many(STATS_KEYS.values())
+
+
+def cached_response(name):
+    """
+    Cache the data of successful responses of a view's `get` method.
+
+    Users without a version (nobody wrote to their contacts through the API
+    yet) are not cached, since there is nothing to tell their entries apart.
+    The `X-Cache` header tells whether a response was a hit or a miss. Async
+    methods get an async wrapper using the cache's async API.
+    """
+    def decorator(method):
+        if iscoroutinefunction(method):
+            return _async_cached_response(name, method)
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            timeout = cache_timeout()
+            if not timeout or current_version(request)[1] is None:
+                return method(view, request, *args, **kwargs)
+
+            cache = get_cache()
+            key = response_key(name, request)
+            data = cache.get(key)
+            if data is not None:
+                _count("hits")
+                response = Response(data, status=status.HTTP_200_OK)
+                response["X-Cache"] = "HIT"
+                return response
+
+            _count("misses")
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, timeout)
+            response["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+def _async_cached_response(name, method):
+    @wraps(method)
+    async def wrapper(view, request, *args, **kwargs):
+        timeout = cache_timeout()
+        if not timeout or (await acurrent_version(request))[1] is None:
+            return await method(view, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_key(name, request)
+        data = await cache.aget(key)
+        if data is not None:
+            await _acount("hits")
+            response = Response(data, status=status.HTTP_200_OK)
+            response["X-Cache"] = "HIT"
+            return response
+
+        await _acount("misses")
+        response = await method(view, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(key, response.data, timeout)
+        response["X-Cache"] = "MISS"
+        return response
+    return wrapper
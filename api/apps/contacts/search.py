@@ -0,0 +1,401 @@
+"""
+Contact search indexes.
+
+Text queries are answered by an SQLite FTS5 full-text index over contacts,
+with one row per contact (rowid = contact id) holding the owner, the name, the
+address fields and every telephone number. The trigram tokenizer keeps the
+existing "contains" search semantics while letting SQLite answer queries from
+the index instead of scanning both tables. The owner column holds the user id
+between two "u"s, so a phrase of it matches exactly one user's documents and
+the index finds them without scoring other users' matches.
+
+The index is kept in sync by triggers on `contacts_contact` and
+`contacts_telephone`, so bulk inserts, queryset deletes and cascades are
+covered without any Python involvement. SQLite drops a table's triggers when
+Django rebuilds it during a migration, which is why `install_search_index`
+runs on every `post_migrate` and repairs (and re-fills) anything missing.
+
+Queries that look like a telephone number are answered by the trigram table
+`TelephoneNgram` over the digits-only `Telephone.number_digits`, so "4567" and
+"(020) 79" match regardless of how the number was formatted. Its rows are
+written by `index_telephones` next to every telephone insert and removed by a
+trigger when the telephone is deleted.
+"""
+import json
+import operator
+import re
+from contextlib import contextmanager
+from functools import reduce
+
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Contact, Telephone, TelephoneNgram, normalize_number
+from .sharding import contacts_db, user_using
+
+FTS_TABLE = "contacts_contact_fts"
+
+# The trigram tokenizer cannot match anything shorter than three characters
+MIN_QUERY_LENGTH = 3
+
+NGRAM_SIZE = 3
+
+# FTS5's default number of segments merged at a time, restored after bulk loads
+FTS_AUTOMERGE = 4
+
+# Same characters the telephone validator accepts, with at least one digit
+PHONE_QUERY = re.compile(r"^[\-\+\(\) ]*[0-9][0-9\-\+\(\) ]*$")
+
+FTS_COLUMNS = ["owner", "name", "address", "numbers"]
+
+# Columns a search query is matched against, the owner column only scopes it
+TEXT_COLUMNS = ["name", "address", "numbers"]
+
+# bm25 weights, in column order: owner, name, address, numbers
+RANK_WEIGHTS = (0.0, 10.0, 1.0, 5.0)
+
+DOCUMENT_SELECT = """
+    SELECT c.id, 'u' || c.user_id || 'u', c.name,
+           coalesce(c.address_line_1, '') || ' ' || coalesce(c.address_line_2, '') || ' ' ||
+           coalesce(c.city, '') || ' ' || coalesce(c.country, '') || ' ' || coalesce(c.postcode, ''),
+           coalesce((SELECT group_concat(t.number, ' ') FROM contacts_telephone t WHERE t.contact_id = c.id), '')
+    FROM contacts_contact c
+"""
+
+CREATE_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+    USING fts5({", ".join(FTS_COLUMNS)}, tokenize = 'trigram')
+"""
+
+INSERT_DOCUMENTS = f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) {DOCUMENT_SELECT}"
+
+
+def _refresh_document(contact_id):
+    return (
+        f"DELETE FROM {FTS_TABLE} WHERE rowid = {contact_id}; "
+        f"{INSERT_DOCUMENTS} WHERE c.id = {contact_id};"
+    )
+
+
+TRIGGERS = {
+    "contacts_contact_fts_ai": ("AFTER INSERT ON contacts_contact", _refresh_document("NEW.id")),
+    "contacts_contact_fts_au": (
+        "AFTER UPDATE OF name, address_line_1, address_line_2, city, country, postcode ON contacts_contact",
+        _refresh_document("NEW.id"),
+    ),
+    "contacts_contact_fts_ad": ("AFTER DELETE ON contacts_contact", f"DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;"),
+    "contacts_telephone_fts_ai": ("AFTER INSERT ON contacts_telephone", _refresh_document("NEW.contact_id")),
+    "contacts_telephone_fts_au": (
+        "AFTER UPDATE OF number, contact_id ON contacts_telephone",
+        _refresh_document("OLD.contact_id") + _refresh_document("NEW.contact_id"),
+    ),
+    "contacts_telephone_fts_ad": ("AFTER DELETE ON contacts_telephone", _refresh_document("OLD.contact_id")),
+    "contacts_telephone_ngram_ad": (
+        "AFTER DELETE ON contacts_telephone",
+        "DELETE FROM contacts_telephonengram WHERE telephone_id = OLD.id;",
+    ),
+}
+
+
+def is_supported(using=DEFAULT_DB_ALIAS):
+    """Whether the database behind `using` can host the FTS5 index"""
+    return connections[using].vendor == "sqlite"
+
+
+def install_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Create the FTS table and its triggers if missing or laid out differently.
+
+    Returns True when anything had to be (re)created, in which case the
+    full-text index is rebuilt and orphaned trigrams are dropped, since writes
+    may have happened while the triggers were missing.
+    """
+    if not is_supported(using):
+        return False
+
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        outdated = FTS_TABLE in existing and _fts_columns(cursor) != FTS_COLUMNS
+    if "contacts_contact" not in existing or "contacts_telephone" not in existing:
+        return False
+    if FTS_TABLE in existing and existing.issuperset(TRIGGERS) and not outdated:
+        return False
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if outdated:
+            # Left by an older layout, the triggers write its columns too
+            cursor.execute(f"DROP TABLE {FTS_TABLE}")
+            for name in TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(CREATE_TABLE)
+        _create_triggers(cursor)
+        cursor.execute(
+            "DELETE FROM contacts_telephonengram WHERE telephone_id NOT IN (SELECT id FROM contacts_telephone)"
+        )
+    rebuild_search_index(using)
+    return True
+
+
+def _fts_columns(cursor):
+    cursor.execute(f"SELECT name FROM pragma_table_info('{FTS_TABLE}')")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _create_triggers(cursor):
+    for name, (event, body) in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} FOR EACH ROW BEGIN {body} END")
+
+
+@contextmanager
+def bulk_load(using=DEFAULT_DB_ALIAS):
+    """
+    Suspend the index triggers and full-text merges for the duration of a bulk load.
+
+    The loader indexes what it inserts itself, with `index_contact_range`
+    and `index_telephone_range`, instead of refreshing a contact's document
+    once per inserted row. Writes of other connections meanwhile go
+    unindexed, so only load into a database nothing else writes to.
+    """
+    if not is_supported(using):
+        yield
+        return
+    with connections[using].cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('automerge', 0)")
+    try:
+        yield
+    finally:
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('automerge', {FTS_AUTOMERGE})")
+            _create_triggers(cursor)
+
+
+def index_contact_range(first_id, last_id, using=DEFAULT_DB_ALIAS):
+    """Add the full-text documents of the new contacts with ids from `first_id` to `last_id`"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"{INSERT_DOCUMENTS} WHERE c.id BETWEEN %s AND %s",
+            [first_id, last_id],
+        )
+
+
+def index_telephone_range(first_id, last_id, using=DEFAULT_DB_ALIAS):
+    """Write the trigram rows of the new telephones with ids from `first_id` to `last_id` in one statement"""
+    positions = json.dumps(list(range(1, Telephone._meta.get_field("number_digits").max_length - NGRAM_SIZE + 2)))
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {TelephoneNgram._meta.db_table} (user_id, telephone_id, gram) "
+            f"SELECT t.user_id, t.id, substr(t.number_digits, p.value, {NGRAM_SIZE}) "
+            f"FROM {Telephone._meta.db_table} t, json_each(%s) p "
+            f"WHERE t.id BETWEEN %s AND %s AND p.value <= length(t.number_digits) - {NGRAM_SIZE - 1} "
+            # Only the first occurrence of a trigram, like `number_ngrams`
+            f"AND instr(t.number_digits, substr(t.number_digits, p.value, {NGRAM_SIZE})) = p.value",
+            [positions, first_id, last_id],
+        )
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """Re-fill the whole index from the contacts tables and return the row count"""
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(INSERT_DOCUMENTS)
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def number_ngrams(digits):
+    """Distinct trigrams of a digits-only telephone number"""
+    return {digits[i:i + NGRAM_SIZE] for i in range(len(digits) - NGRAM_SIZE + 1)}
+
+
+def index_telephones(telephones, using=DEFAULT_DB_ALIAS):
+    """Write the trigram rows for freshly inserted `telephones`"""
+    TelephoneNgram.objects.using(using).bulk_create(
+        [
+            TelephoneNgram(user_id=telephone.user_id, telephone_id=telephone.pk, gram=gram)
+            for telephone in telephones
+            for gram in number_ngrams(telephone.number_digits)
+        ],
+        batch_size=2000,
+    )
+
+
+def rebuild_phone_index(using=DEFAULT_DB_ALIAS, chunk_size=2000):
+    """Recompute digits-only numbers and their trigrams, return the number of telephones indexed"""
+    indexed = 0
+    with transaction.atomic(using=using):
+        TelephoneNgram.objects.using(using).all().delete()
+        telephones = Telephone.objects.using(using).only("user_id", "number", "number_digits").order_by("pk")
+        chunk = []
+        for telephone in telephones.iterator(chunk_size=chunk_size):
+            digits = normalize_number(telephone.number)
+            if telephone.number_digits != digits:
+                telephone.number_digits = digits
+                Telephone.objects.using(using).filter(pk=telephone.pk).update(number_digits=digits)
+            chunk.append(telephone)
+            if len(chunk) >= chunk_size:
+                index_telephones(chunk, using)
+                indexed, chunk = indexed + len(chunk), []
+        index_telephones(chunk, using)
+    return indexed + len(chunk)
+
+
+def is_phone_query(query):
+    """Whether `query` looks like (part of) a telephone number"""
+    return bool(PHONE_QUERY.match(query))
+
+
+def matching_telephones(user, query):
+    """
+    Telephones of `user` whose digits contain the digits of `query`.
+
+    Three or more digits are looked up through the trigram index: a telephone
+    is a candidate when it has every trigram of the query, and candidates are
+    then checked for the exact digit sequence. Shorter fragments only need a
+    scan of the user's own numbers.
+    """
+    digits = normalize_number(query)
+    if len(digits) < NGRAM_SIZE:
+        return Telephone.objects.for_user(user).filter(number_digits__contains=digits)
+
+    grams = number_ngrams(digits)
+    candidates = (
+        TelephoneNgram.objects.for_user(user).filter(gram__in=grams)
+        .values("telephone")
+        .annotate(matched=Count("gram", distinct=True))
+        .filter(matched=len(grams))
+        .values("telephone")
+    )
+    # The candidates are the user's own telephones already. The user is checked again through an
+    # expression no index answers, so SQLite looks the few candidates up by primary key instead of
+    # walking every telephone of the user through the (user, contact) index
+    telephones = Telephone.objects.alias(
+        owner=ExpressionWrapper(F("user_id") + 0, output_field=IntegerField())
+    ).filter(owner=user.pk, id__in=candidates, number_digits__contains=digits)
+    using = user_using(user)
+    return telephones.using(using) if using else telephones
+
+
+def can_search(query, using=DEFAULT_DB_ALIAS):
+    """Whether `query` can be answered from the full-text index"""
+    return len(query) >= MIN_QUERY_LENGTH and is_supported(using)
+
+
+def _substring_filter(user, query):
+    return Q(name__icontains=query) | Q(
+        id__in=Telephone.objects.for_user(user).filter(number__icontains=query).values("contact_id")
+    )
+
+
+def search_contact_ids(user, query):
+    """
+    Ids of the user's contacts matching `query`, best match first.
+
+    Telephone number matches come first, followed by full-text matches ranked
+    by relevance. Queries neither index can answer fall back to a substring
+    scan ordered newest first. The ids are read lazily, counting and slicing
+    run as SQL so a paginator only fetches the ids of its page.
+    """
+    telephones = matching_telephones(user, query) if is_phone_query(query) else None
+    if can_search(query, contacts_db(user)):
+        if telephones is None:
+            return ranked_contact_ids(user, query)
+        return ranked_contact_ids(user, query, telephones=telephones)
+
+    if telephones is not None and telephones.exists():
+        return telephones.order_by("-contact_id").values_list("contact_id", flat=True).distinct()
+    contacts = Contact.objects.for_user(user).filter(_substring_filter(user, query))
+    return contacts.order_by("-created_at", "-id").values_list("id", flat=True)
+
+
+def search_filter(user, query):
+    """`Contact` filter matching `query`, for paginating a queryset instead of a ranked list"""
+    conditions = []
+    if is_phone_query(query):
+        conditions.append(Q(id__in=matching_telephones(user, query).values("contact_id")))
+
+    if can_search(query, contacts_db(user)):
+        conditions.append(Q(id__in=matching_contact_ids(user, query)))
+    elif not conditions:
+        conditions.append(_substring_filter(user, query))
+    return reduce(operator.or_, conditions)
+
+
+def _match_expression(user, query):
+    # Quote the whole query as one FTS5 string so user input is never parsed as syntax, and match
+    # it against the text columns only: a query of digits must not match the owner column
+    return 'owner : "u{}u" AND {{{}}} : "{}"'.format(user.pk, " ".join(TEXT_COLUMNS), query.replace('"', '""'))
+
+
+class RankedIds:
+    """
+    Ids selected by the SQL `select` in the order of `order_by`, read slice by slice.
+
+    Django's paginator only calls `count()` and slices out its page, both run
+    as SQL on `using` so just the ids of the page leave the database.
+    """
+
+    def __init__(self, select, params, order_by, using):
+        self.select, self.params, self.order_by, self.using = select, list(params), order_by, using
+
+    def count(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM ({self.select})", self.params)
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        if (item.start or 0) < 0 or (item.stop or 0) < 0 or item.step is not None:
+            raise ValueError("Only slices with a non-negative start and stop and no step are supported.")
+        offset = item.start or 0
+        limit = -1 if item.stop is None else max(item.stop - offset, 0)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"{self.select} ORDER BY {self.order_by} LIMIT %s OFFSET %s", [*self.params, limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+
+def ranked_contact_ids(user, query, using=None, telephones=None):
+    """
+    `RankedIds` of the user's contacts matching `query`, best match first.
+
+    The contacts of `telephones`, a queryset of the user's telephones, come
+    first, newest first, followed by the other full-text matches.
+    """
+    weights = ", ".join(str(weight) for weight in RANK_WEIGHTS)
+    # A raw cursor skips the routers, ask them so searches of unsharded users go to the read alias
+    using = using or user_using(user) or router.db_for_read(Contact)
+    rank = f"bm25({FTS_TABLE}, {weights})"
+    params = [_match_expression(user, query)]
+    if telephones is None:
+        return RankedIds(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", params, f"{rank}, rowid", using)
+
+    matches = f"SELECT rowid AS id, {rank} AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+
+    numbers, number_params = telephones.values("contact_id").query.get_compiler(using).as_sql()
+    # SQLite reads `score` from the row holding min(tier), telephone matches rank by newest contact
+    select = (
+        f"SELECT id FROM ("
+        f"SELECT id, min(tier) AS tier, score FROM ("
+        f"SELECT contact_id AS id, 0 AS tier, -contact_id AS score FROM ({numbers}) "
+        f"UNION ALL SELECT id, 1, score FROM ({matches})"
+        f") GROUP BY id"
+        f")"
+    )
+    return RankedIds(select, [*number_params, *params], "tier, score, id", using)
+
+
+def matching_contact_ids(user, query):
+    """Subquery of the ids of the user's contacts matching `query`, for use with `id__in`"""
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_match_expression(user, query)])
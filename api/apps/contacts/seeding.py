@@ -0,0 +1,239 @@
+"""
+Synthetic contacts at production scale.
+
+`seed` creates users sharing one precomputed password hash and gives them
+contacts and telephones drawn from a seeded random generator, so the same
+arguments always produce the same rows. Address book sizes follow a
+log-normal spread (many small books, a few large ones) unless `spread` is
+"even".
+
+Rows go straight into the tables with `executemany`, one transaction per
+batch, with ids assigned up front so telephones point at their contact
+without reading anything back, and foreign keys are not checked. The search
+triggers are suspended during the load and every batch is indexed with one
+statement per index (see apps.contacts.search). The next batch is generated
+in a thread while SQLite writes the current one. Numbers come from a
+per-user counter, so they are unique per user.
+
+Like the search index this needs SQLite. Only seed a database nothing else
+writes to at the same time.
+"""
+import math
+import queue
+import random
+import threading
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import Contact, ContactsVersion, Telephone, normalize_number
+from .search import bulk_load, index_contact_range, index_telephone_range, is_supported
+from .sharding import contacts_databases, contacts_db
+
+SPREADS = ["lognormal", "even"]
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+               "Amelia", "Oliver", "Sophie", "Lucas", "Chloe", "Hugo", "Emma", "Leon", "Lucia", "Mateo"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+              "Dubois", "Moreau", "Schmidt", "Fischer", "Weber", "Sanchez", "Romero", "Evans", "Walker", "Wright"]
+STREETS = ["High Street", "Station Road", "Church Lane", "Rue de la Paix", "Hauptstrasse", "Calle Mayor",
+           "Main Street", "Park Avenue", "Victoria Road", "Mill Lane"]
+# City, country and the country's calling code
+CITIES = [("London", "United Kingdom", 44), ("Manchester", "United Kingdom", 44), ("Paris", "France", 33),
+          ("Lyon", "France", 33), ("Berlin", "Germany", 49), ("Munich", "Germany", 49), ("Madrid", "Spain", 34),
+          ("Barcelona", "Spain", 34), ("New York", "United States", 1), ("Chicago", "United States", 1)]
+
+NAMES = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+
+# Telephones of a contact, drawn from twenty equally likely slots: 70% one, 25% two, 5% three
+TELEPHONE_SLOTS = [1] * 14 + [2] * 5 + [3]
+
+# Contacts were created over this many seconds before the seeding
+HISTORY_SECONDS = 730 * 24 * 3600
+
+NUMBER_BASE = 7_000_000_000
+
+DEFAULT_PASSWORD = "Seed@1234"
+
+CONTACT_COLUMNS = [
+    "id", "user_id", "name", "address_line_1", "address_line_2", "city", "country", "postcode",
+    "created_at", "updated_at", "sync_version",
+]
+TELEPHONE_COLUMNS = ["id", "user_id", "contact_id", "number", "number_digits"]
+
+
+def telephone_number(calling_code, index):
+    """The `index`th number of a user, e.g. `+44 7000000012`"""
+    return f"+{calling_code} {NUMBER_BASE + index}"
+
+
+def seed_email(seed, index):
+    return f"seed{seed}-{index}@example.com"
+
+
+def contact_counts(users, contacts, rng, spread="lognormal"):
+    """Split `contacts` over `users`, largest remainders rounded up so the total is exact"""
+    if spread == "even":
+        weights = [1.0] * users
+    else:
+        weights = [rng.lognormvariate(0, 1) for _ in range(users)]
+    total = sum(weights)
+    shares = [contacts * weight / total for weight in weights]
+    counts = [math.floor(share) for share in shares]
+    by_remainder = sorted(range(users), key=lambda index: shares[index] - counts[index], reverse=True)
+    for index in by_remainder[:contacts - sum(counts)]:
+        counts[index] += 1
+    return counts
+
+
+def create_users(users, seed=0, password=DEFAULT_PASSWORD, batch_size=10_000):
+    """Create `users` users sharing one password hash and return them in order"""
+    User = get_user_model()
+    if User.objects.filter(email=seed_email(seed, 0)).exists():
+        raise ValueError(f"Users of seed {seed} already exist, pick another seed.")
+    password_hash = make_password(password)
+    return User.objects.bulk_create(
+        [User(email=seed_email(seed, index), password=password_hash) for index in range(users)],
+        batch_size=batch_size,
+    )
+
+
+def generate_rows(members, rng, now, contact_id, telephone_id, batch_size):
+    """
+    Yield `(contacts, telephones)` batches of row tuples for `(user, count)` members.
+
+    One random draw per contact picks every field. `now` is the seeding time
+    as the database stores it, contact and telephone ids count up from the
+    given ones.
+    """
+    now = datetime.fromisoformat(now)
+    contacts, telephones = [], []
+    for user, count in members:
+        user_id, number = user.pk, 0
+        for _ in range(count):
+            draw = rng.getrandbits(96)
+            draw, name = divmod(draw, len(NAMES))
+            draw, place = divmod(draw, len(CITIES))
+            draw, street = divmod(draw, len(STREETS))
+            draw, house = divmod(draw, 250)
+            draw, flat = divmod(draw, 200)
+            draw, postcode = divmod(draw, 90000)
+            draw, slot = divmod(draw, len(TELEPHONE_SLOTS))
+            city, country, calling_code = CITIES[place]
+            created_at = str(now - timedelta(seconds=draw % HISTORY_SECONDS))
+            contacts.append((
+                contact_id, user_id, NAMES[name], f"{house + 1} {STREETS[street]}",
+                # One contact in five has a flat number
+                f"Flat {flat // 5 + 1}" if flat % 5 == 0 else None,
+                city, country, str(postcode + 10000), created_at, created_at, 1,
+            ))
+            for _ in range(TELEPHONE_SLOTS[slot]):
+                value = telephone_number(calling_code, number)
+                telephones.append((telephone_id, user_id, contact_id, value, normalize_number(value)))
+                telephone_id += 1
+                number += 1
+            contact_id += 1
+            if len(contacts) >= batch_size:
+                yield contacts, telephones
+                contacts, telephones = [], []
+    if contacts:
+        yield contacts, telephones
+
+
+def prefetched(iterable, depth=2):
+    """Iterate over `iterable` from a thread, keeping up to `depth` items ready"""
+    items = queue.Queue(maxsize=depth)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put(item)
+        except BaseException as exc:
+            items.put(exc)
+        items.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while (item := items.get()) is not done:
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def _insert(cursor, model, columns, rows):
+    placeholders = ", ".join(["%s"] * len(columns))
+    cursor.executemany(
+        f"INSERT INTO {model._meta.db_table} ({', '.join(columns)}) VALUES ({placeholders})", rows,
+    )
+
+
+def _next_id(cursor, model):
+    cursor.execute(
+        "SELECT max(coalesce((SELECT seq FROM sqlite_sequence WHERE name = %s), 0), "
+        f"coalesce((SELECT max(id) FROM {model._meta.db_table}), 0)) + 1",
+        [model._meta.db_table],
+    )
+    return cursor.fetchone()[0]
+
+
+def load(using, members, rng, batch_size, progress):
+    """Write the contacts and telephones of `(user, count)` members to `using`, one transaction per batch"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        contact_id, telephone_id = _next_id(cursor, Contact), _next_id(cursor, Telephone)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    batches = generate_rows(members, rng, now, contact_id, telephone_id, batch_size)
+
+    # Ids are assigned above, nothing can point at a missing row
+    with bulk_load(using), connection.constraint_checks_disabled():
+        for contacts, telephones in prefetched(batches):
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                _insert(cursor, Contact, CONTACT_COLUMNS, contacts)
+                _insert(cursor, Telephone, TELEPHONE_COLUMNS, telephones)
+                index_contact_range(contacts[0][0], contacts[-1][0], using)
+                index_telephone_range(telephones[0][0], telephones[-1][0], using)
+            progress(len(contacts), len(telephones))
+
+
+def seed(users, contacts, seed=0, spread="lognormal", batch_size=50_000, password=DEFAULT_PASSWORD, progress=None):
+    """
+    Create `users` users holding `contacts` contacts between them.
+
+    `progress(contacts, telephones)` is called with the totals written so far
+    after every batch. Returns the created users and a summary of the rows written.
+    """
+    for using in contacts_databases():
+        if not is_supported(using):
+            raise ValueError(f"Seeding requires SQLite, '{using}' is not a SQLite database.")
+
+    started = perf_counter()
+    rng = random.Random(seed)
+    counts = contact_counts(users, contacts, rng, spread)
+    created_users = create_users(users, seed, password)
+
+    placements = {}
+    for user, count in zip(created_users, counts):
+        placements.setdefault(contacts_db(user), []).append((user, count))
+
+    written = {"contacts": 0, "telephones": 0}
+
+    def report(new_contacts, new_telephones):
+        written["contacts"] += new_contacts
+        written["telephones"] += new_telephones
+        if progress:
+            progress(written["contacts"], written["telephones"])
+
+    for using, members in placements.items():
+        now = timezone.now()
+        ContactsVersion.objects.using(using).bulk_create(
+            [ContactsVersion(user=user, version=1, updated_at=now) for user, _ in members], batch_size=batch_size,
+        )
+        load(using, members, rng, batch_size, report)
+
+    return created_users, {"users": users, **written, "seconds": round(perf_counter() - started, 2)}
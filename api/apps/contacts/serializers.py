@@ -1,6 +1,25 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import Contact, Telephone
+from core.utils.request_metrics import timed
+from .models import Contact, Telephone, normalize_number
+from .search import index_telephones
+from .sharding import contacts_db
+from .versioning import bump_version
 import re
+from contextlib import contextmanager
+
+
+def validate_telephone_number(value):
+    """Telephone number rules shared by the API and the importers"""
+    if not re.match(r"^[0-9\-\+\(\) ]+$", value):
+        raise serializers.ValidationError("Invalid telephone number format. Allowed characters: digits, +, -, (, ), and spaces.")
+
+    # Ensure length is reasonable
+    if len(value) < 7 or len(value) > 15:
+        raise serializers.ValidationError("Telephone number must be between 7 and 15 characters long.")
+    return value
+
+
 class TelephoneSerializer(serializers.ModelSerializer):
     """Serializer for telephone numbers"""
 
@@ -14,12 +33,7 @@ class TelephoneSerializer(serializers.ModelSerializer):
         contact = self.context.get("contact")  
         user = request.user if request else None
 
-        if not re.match(r"^[0-9\-\+\(\) ]+$", value):
-            raise serializers.ValidationError("Invalid telephone number format. Allowed characters: digits, +, -, (, ), and spaces.")
-
-        # Ensure length is reasonable
-        if len(value) < 7 or len(value) > 15:
-            raise serializers.ValidationError("Telephone number must be between 7 and 15 characters long.")
+        validate_telephone_number(value)
 
         if not user or not contact:
             return value 
@@ -35,11 +49,14 @@ class ContactSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contact
         fields = ["id","name", "address_line_1", "address_line_2", "city", "country", "postcode", "telephones"]
+
+    def to_representation(self, instance):
+        with timed("serialize"):
+            return super().to_representation(instance)
     
     def validate_telephones(self, value):
         """Ensure no duplicate numbers in the request, but allow existing ones linked to the contact"""
         request = self.context.get("request")
-        print("init")
         if not request:
             return value
 
@@ -52,46 +69,103 @@ class ContactSerializer(serializers.ModelSerializer):
         if len(numbers_in_request) != len(set(numbers_in_request)):
             raise serializers.ValidationError("Duplicate telephone numbers are not allowed in the same request.")
 
-        # Check if numbers already exist in another contact for this user
-        existing_numbers = Telephone.objects.filter(user=user, number__in=numbers_in_request)
-        for phone in existing_numbers:
-            if phone.contact != contact:  # Allow numbers already linked to this contact
-                raise serializers.ValidationError(f"The number {phone.number} is already linked to another contact.")
+        # Bulk requests look up every number of the batch at once and pass the result in
+        known_numbers = self.context.get("existing_numbers")
+        if known_numbers is not None:
+            for number in numbers_in_request:
+                if number in known_numbers:
+                    raise serializers.ValidationError(f"The number {number} is already linked to another contact.")
+            return value
+
+        # Check if numbers already exist in another contact for this user, in one query
+        existing_numbers = Telephone.objects.for_user(user).filter(number__in=numbers_in_request)
+        for number, contact_id in existing_numbers.values_list("number", "contact_id"):
+            if contact is None or contact_id != contact.pk:  # Allow numbers already linked to this contact
+                raise serializers.ValidationError(f"The number {number} is already linked to another contact.")
 
         return value
-    
+
+    def get_user(self, instance=None):
+        """The requesting user, which owns `instance`, without loading it again"""
+        request = self.context.get("request")
+        return request.user if request else instance.user
+
     def create(self, validated_data):
         """Create a contact and related telephone numbers"""
         telephones_data = validated_data.pop("telephones")
-        user = self.context["request"].user  # Get user from request
-        contact = Contact.objects.create(user=user, **validated_data)
-
-        for phone_data in telephones_data:
-            Telephone.objects.create(user=user, contact=contact, **phone_data)
-
+        user = self.get_user()
+        using = contacts_db(user)
+        with raise_on_number_race(), transaction.atomic(using=using):
+            version = bump_version(user)
+            contact = Contact.objects.using(using).create(user=user, sync_version=version, **validated_data)
+
+            telephones = Telephone.objects.using(using).bulk_create(
+                new_telephone(user, contact, phone_data["number"]) for phone_data in telephones_data
+            )
+            index_telephones(telephones, using)
+
+        # The response renders these telephones without querying them back
+        contact._prefetched_objects_cache = {"telephones": telephones}
         return contact
-    
 
-    
     def update(self, instance, validated_data):
-        """Handle updates for contacts and their telephone numbers"""
+        """
+        Handle updates for contacts and their telephone numbers.
+
+        Submitted numbers are added to the contact. With the
+        `replace_telephones` context flag they replace its numbers: the
+        submitted set is diffed against the stored rows, numbers left out are
+        deleted (with their sync tombstones) and only new numbers inserted,
+        so unchanged rows are never written.
+        """
+        from .sync import record_deleted_telephones  # sync imports this module through representations
+
+        replace = self.context.get("replace_telephones") and "telephones" in validated_data
         telephones_data = validated_data.pop("telephones", [])
+        user = self.get_user(instance)
+        using = contacts_db(user)
+
+        with raise_on_number_race(), transaction.atomic(using=using):
+            instance.sync_version = bump_version(user)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            telephones = list(Telephone.objects.using(using).filter(contact=instance).order_by("id"))
+            existing_numbers = {telephone.number for telephone in telephones}
+            new_numbers = [
+                new_telephone(user, instance, phone_data["number"])
+                for phone_data in telephones_data
+                if phone_data["number"] not in existing_numbers
+            ]
+
+            if replace:
+                submitted = {phone_data["number"] for phone_data in telephones_data}
+                removed = [telephone for telephone in telephones if telephone.number not in submitted]
+                if removed:
+                    record_deleted_telephones(user, removed, instance.sync_version)
+                    Telephone.objects.using(using).filter(pk__in=[telephone.pk for telephone in removed]).delete()
+                    telephones = [telephone for telephone in telephones if telephone.number in submitted]
+
+            Telephone.objects.using(using).bulk_create(new_numbers)
+            index_telephones(new_numbers, using)
+
+        instance._prefetched_objects_cache = {"telephones": telephones + new_numbers}
+        return instance
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
 
+NUMBER_RACE_MESSAGE = "A number in this request was added by another request. please retry."
 
-        user = instance.user
-        existing_numbers = set(instance.telephones.values_list("number", flat=True))
-        new_numbers = []
-        for phone_data in telephones_data:
-            number = phone_data["number"]
-            if number in existing_numbers:
-                continue  
-            new_numbers.append(Telephone(user=user, contact=instance, number=number))
 
-        Telephone.objects.bulk_create(new_numbers)
+@contextmanager
+def raise_on_number_race():
+    """Report a `(user, number)` clash with a concurrent request as a validation error, not a 500"""
+    try:
+        yield
+    except IntegrityError:
+        raise serializers.ValidationError({"telephones": [NUMBER_RACE_MESSAGE]})
 
-        return instance
-    
\ No newline at end of file
+
+def new_telephone(user, contact, number):
+    """Unsaved Telephone for `bulk_create`, which skips `Telephone.save`"""
+    return Telephone(user=user, contact=contact, number=number, number_digits=normalize_number(number))
@@ -0,0 +1,232 @@
+"""
+Placement of users' contacts in shard databases.
+
+With `CONTACTS_SHARDS` listing database aliases, every user's contacts,
+telephones, search trigrams, version and tombstones live in one of them,
+picked by a hash of the user id unless `User.contacts_shard` pins the user
+somewhere else (any shard or "default"). Users and everything else stay in
+the default database. Each shard has its own write lock, so writes of users
+on different shards no longer wait for each other. Without shards,
+everything stays in the default database and nothing here changes a query.
+
+Queries find their shard explicitly: `for_user(user)` querysets and
+`contacts_db(user)` for transactions, bulk inserts and raw SQL. Instances
+remember where they were loaded from, and `ContactsShardRouter` places new
+instances created from a user and keeps relations to users legal across
+databases. Ids of each shard start at a range of their own (see
+`reserve_id_range`), so a user's rows keep their ids when moved by
+`move_user`.
+
+Rows on a database their user is not placed on, left by a deleted user or
+an interrupted move, are removed by `manage.py contacts_shards cleanup`.
+
+The hash depends on the shard list. Run `manage.py contacts_shards pin`
+before changing it, so users stay where their data is.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+APP_LABEL = "contacts"
+
+# Ids of shard n start above n * ID_RANGE
+ID_RANGE = 10 ** 12
+
+# Tables whose ids have to stay unique across shards for rows to move between them
+ID_TABLES = ["contacts_contact", "contacts_telephone", "contacts_telephonengram", "contacts_tombstone"]
+
+
+def shard_aliases():
+    return list(getattr(settings, "CONTACTS_SHARDS", []))
+
+
+def is_sharded():
+    return bool(shard_aliases())
+
+
+def contacts_databases():
+    """Every alias that can hold contacts, the default first"""
+    return [DEFAULT_DB_ALIAS, *(alias for alias in shard_aliases() if alias != DEFAULT_DB_ALIAS)]
+
+
+def hashed_shard(user_id):
+    """Shard the hash of `user_id` picks from `CONTACTS_SHARDS`"""
+    shards = shard_aliases()
+    if not shards:
+        return DEFAULT_DB_ALIAS
+    digest = hashlib.md5(str(user_id).encode(), usedforsecurity=False).hexdigest()
+    return shards[int(digest, 16) % len(shards)]
+
+
+def contacts_db(user):
+    """Alias of the database holding the contacts of `user`"""
+    return getattr(user, "contacts_shard", "") or hashed_shard(user.pk)
+
+
+def user_using(user):
+    """Alias to pass to `.using()` for `user`'s contacts, None leaves the choice to the routers"""
+    alias = contacts_db(user)
+    return None if alias == DEFAULT_DB_ALIAS else alias
+
+
+def reserve_id_range(using):
+    """Start the ids of a shard's tables at the shard's own range"""
+    if using not in shard_aliases() or connections[using].vendor != "sqlite":
+        return
+    start = (shard_aliases().index(using) + 1) * ID_RANGE
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        for table in ID_TABLES:
+            cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s", [start, table, start])
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                [table, start, table],
+            )
+
+
+def _is_contacts_model(model):
+    return model._meta.app_label == APP_LABEL
+
+
+class ContactsShardRouter:
+    """Keeps instance based queries of contacts models on their user's shard"""
+
+    def _db(self, model, hints):
+        if not is_sharded():
+            return None
+        instance = hints.get("instance")
+        if instance is None:
+            return None
+        if not _is_contacts_model(model):
+            # e.g. `contact.user`: users only live in the default database
+            return DEFAULT_DB_ALIAS if _is_contacts_model(type(instance)) else None
+        if isinstance(instance, get_user_model()):
+            return contacts_db(instance)
+        if instance._state.db:
+            return instance._state.db
+        if getattr(instance, "user_id", None):
+            return contacts_db(instance.user)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_sharded():
+            return None
+        user_model = get_user_model()
+        if isinstance(obj1, user_model) and _is_contacts_model(type(obj2)):
+            return True
+        if isinstance(obj2, user_model) and _is_contacts_model(type(obj1)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in shard_aliases() and db != DEFAULT_DB_ALIAS:
+            return app_label == APP_LABEL
+        return None
+
+
+def _user_models():
+    """Models holding a user's contacts data, parents before children"""
+    from .models import Contact, ContactsVersion, Telephone, TelephoneNgram, Tombstone
+
+    return [ContactsVersion, Contact, Telephone, TelephoneNgram, Tombstone]
+
+
+def delete_user_rows(user_id, using):
+    """
+    Delete every contacts row of the user `user_id` on `using`, children first; return the contacts deleted.
+
+    One plain DELETE per table, without loading the rows or sending delete
+    signals: the rows are a deleted user's or copies already moved to another
+    database, nothing listens for them, and the search index triggers clean up
+    after the deleted rows.
+    """
+    from .models import Contact
+
+    connection = connections[using]
+    deleted = 0
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for model in reversed(_user_models()):
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE user_id = %s", [user_id])
+            if model is Contact:
+                deleted = cursor.rowcount
+    return deleted
+
+
+def stray_users(using):
+    """Ids of the users with rows on `using` who are not placed there, deleted users included"""
+    user_ids = set()
+    for model in _user_models():
+        user_ids.update(model.objects.using(using).order_by().values_list("user_id", flat=True).distinct())
+    placed = {
+        user.pk for user in get_user_model().objects.filter(pk__in=user_ids).only("pk", "contacts_shard")
+        if contacts_db(user) == using
+    }
+    return sorted(user_ids - placed)
+
+
+def user_deleted(sender, instance, using, **kwargs):
+    """
+    `post_delete` receiver of users: delete their contacts on their shard.
+
+    The cascade only reaches the database the user is deleted from. Runs once
+    the deletion is committed; `contacts_shards cleanup` catches what a crash
+    in between leaves behind.
+    """
+    alias, user_id = contacts_db(instance), instance.pk
+    if alias != using:
+        transaction.on_commit(lambda: delete_user_rows(user_id, alias), using=using)
+
+
+def move_user(user, target, batch_size=2000):
+    """
+    Move the contacts of `user` to the shard `target` and pin the user there.
+
+    The user's version is bumped on the source first, which holds its write
+    lock until the rows are gone, so no write of the user is lost. Rows keep
+    their ids and sync tokens stay valid. Returns the number of contacts moved.
+    Workers that cached the user (see apps.user_auth.authentication) keep
+    writing to the source until their copy expires, so prefer a shared cache
+    or quiet hours.
+
+    The copy, the pin and the deletes commit one after the other on three
+    databases. Whichever step a crash interrupts, the user's data stays whole
+    on the shard the user is placed on; the extra copy left on the other one
+    is removed by the next move to it or by `contacts_shards cleanup`.
+    """
+    from .models import Contact
+    from .versioning import bump_version
+
+    if target not in shard_aliases():
+        raise ValueError(f"'{target}' is not one of CONTACTS_SHARDS.")
+    source = contacts_db(user)
+    if source == target:
+        return 0
+
+    with transaction.atomic(using=source):
+        bump_version(user)
+        with transaction.atomic(using=target):
+            # Left by an interrupted move to `target`
+            delete_user_rows(user.pk, target)
+            for model in _user_models():
+                rows = model.objects.using(source).filter(user=user).order_by("pk")
+                batch = []
+                for row in rows.iterator(chunk_size=batch_size):
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        model.objects.using(target).bulk_create(batch)
+                        batch = []
+                model.objects.using(target).bulk_create(batch)
+        # Only once the copy is committed, so the user never points at a shard without their data
+        user.contacts_shard = target
+        user.save(update_fields=["contacts_shard"])
+        moved = Contact.objects.using(target).filter(user=user).count()
+        delete_user_rows(user.pk, source)
+    return moved
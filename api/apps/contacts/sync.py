@@ -0,0 +1,198 @@
+"""
+Delta sync for offline clients.
+
+A sync token is the user's `ContactsVersion.version` at the time of a read.
+Writes stamp the contacts they create or change with the version they bumped
+to, and deletes leave a `Tombstone` per contact and telephone stamped the
+same way (see apps.contacts.versioning), so the changes since a token are the
+rows stamped after it, found through the `(user, sync_version)` indexes at a
+cost proportional to the change rather than to the address book.
+
+Changes come in pages of at most `limit` contacts and tombstones, ordered by
+`(sync_version, id)`. While a page is not the last, its token is a
+`SyncCursor` holding the version the sync runs to and where the next page
+starts; the plain version only comes with the last page, so a client
+advances its token once it has every change.
+
+Tombstones are purged after `CONTACTS_TOMBSTONE_RETENTION_DAYS` by
+`manage.py purge_tombstones`. Tokens older than the newest purged tombstone
+of their user can no longer be answered and need a full resync.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.pagination import _positive_int
+
+from .models import Contact, ContactsVersion, Telephone, Tombstone
+from .representations import ROW_FIELDS, represent_contacts
+from .sharding import contacts_databases, contacts_db
+
+
+class SyncTokenExpired(Exception):
+    """The token predates purged tombstones or this database, the client has to resync from scratch"""
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, "CONTACTS_TOMBSTONE_RETENTION_DAYS", 30))
+
+
+def sync_page_size():
+    """Contacts and tombstones returned per page of changes, and the most a client can ask for"""
+    return getattr(settings, "CONTACTS_SYNC_PAGE_SIZE", 1000)
+
+
+def page_limit(value):
+    """Page size a client asked for, capped at `sync_page_size`; the default when missing or invalid"""
+    try:
+        return _positive_int(value, strict=True, cutoff=sync_page_size())
+    except (TypeError, ValueError):
+        return sync_page_size()
+
+
+@dataclass(frozen=True)
+class SyncCursor:
+    """
+    Where a sync stands: the version it runs to, None until the first page is
+    read, and the `(sync_version, id)` the next contacts and tombstones start
+    at. Tombstones starting at `(0, 0)` mark a full sync, which skips them.
+    """
+
+    until: Optional[int]
+    contact: tuple
+    tombstone: tuple
+
+    @property
+    def full(self):
+        return self.tombstone == (0, 0)
+
+    def token(self):
+        return ".".join(str(value) for value in (self.until, *self.contact, *self.tombstone))
+
+
+def parse_token(token):
+    """`SyncCursor` of a sync token, a full sync when missing; raises ValueError when malformed"""
+    if token in (None, ""):
+        token = "0"
+    values = [int(value) for value in token.split(".")]
+    if any(value < 0 for value in values):
+        raise ValueError(token)
+    if len(values) == 5:
+        return SyncCursor(values[0], tuple(values[1:3]), tuple(values[3:5]))
+    if len(values) != 1:
+        raise ValueError(token)
+    if values[0] == 0:
+        return SyncCursor(None, (0, 0), (0, 0))
+    # Everything stamped after the version
+    start = (values[0] + 1, 0)
+    return SyncCursor(None, start, start)
+
+
+def record_deleted(user, contacts, version):
+    """
+    Write tombstones for `contacts` and all their telephones, before they are deleted.
+
+    Runs one INSERT ... SELECT per table so the cost does not depend on how
+    the contacts were selected. Returns the number of contact tombstones.
+    """
+    connection = connections[contacts_db(user)]
+    contact_ids, id_params = contacts.values("id").query.sql_with_params()
+    columns = "user_id, kind, contact_id, number, sync_version, deleted_at"
+    constants = [user.pk, version, connection.ops.adapt_datetimefield_value(timezone.now())]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {Tombstone._meta.db_table} ({columns}) "
+            f"SELECT %s, '{Tombstone.CONTACT}', id, '', %s, %s FROM {Contact._meta.db_table} "
+            f"WHERE user_id = %s AND id IN ({contact_ids})",
+            [*constants, user.pk, *id_params],
+        )
+        recorded = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {Tombstone._meta.db_table} ({columns}) "
+            f"SELECT %s, '{Tombstone.TELEPHONE}', contact_id, number, %s, %s FROM {Telephone._meta.db_table} "
+            f"WHERE user_id = %s AND contact_id IN ({contact_ids})",
+            [*constants, user.pk, *id_params],
+        )
+    return recorded
+
+
+def record_deleted_telephones(user, telephones, version):
+    """Write tombstones for single `telephones` removed from contacts that are kept"""
+    now = timezone.now()
+    Tombstone.objects.using(contacts_db(user)).bulk_create(
+        Tombstone(
+            user=user, kind=Tombstone.TELEPHONE, contact_id=telephone.contact_id, number=telephone.number,
+            sync_version=version, deleted_at=now,
+        )
+        for telephone in telephones
+    )
+
+
+def _page(queryset, start, until, size):
+    """Up to `size` rows from `start` to version `until` in `(sync_version, id)` order, and whether more follow"""
+    version, pk = start
+    rows = queryset.filter(sync_version__gte=version, sync_version__lte=until).exclude(sync_version=version, id__lte=pk)
+    rows = list(rows.order_by("sync_version", "id")[:size + 1])
+    return rows[:size], len(rows) > size
+
+
+def changes_since(user, cursor, limit=None):
+    """
+    `(token, has_more, changed contacts, contact tombstones, telephone tombstones)` from `cursor`.
+
+    Changed contacts come as their API representation, before any tombstone.
+
+    Each page is read in one transaction. Rows changed again while a client
+    pages are stamped past the version the sync runs to, and come with the
+    next sync.
+    """
+    limit = limit or sync_page_size()
+    with transaction.atomic(using=contacts_db(user)):
+        version, floor = (
+            ContactsVersion.objects.for_user(user).values_list("version", "tombstone_floor").first() or (0, 0)
+        )
+        until = version if cursor.until is None else cursor.until
+        if until > version or cursor.contact[0] > until + 1 or (not cursor.full and cursor.tombstone[0] <= floor):
+            raise SyncTokenExpired(cursor)
+
+        rows, has_more = _page(
+            Contact.objects.for_user(user).values(*ROW_FIELDS, "sync_version"), cursor.contact, until, limit
+        )
+        contact_start = (rows[-1]["sync_version"], rows[-1]["id"]) if rows else cursor.contact
+        contacts = represent_contacts(rows, user)
+
+        tombstones, tombstone_start = [], cursor.tombstone
+        if not cursor.full and not has_more:
+            tombstones, has_more = _page(
+                Tombstone.objects.for_user(user).values_list("sync_version", "id", "kind", "contact_id", "number"),
+                cursor.tombstone, until, limit - len(rows),
+            )
+            tombstone_start = tombstones[-1][:2] if tombstones else cursor.tombstone
+
+    deleted_contacts, deleted_telephones = [], []
+    for _, _, kind, contact_id, number in tombstones:
+        if kind == Tombstone.CONTACT:
+            deleted_contacts.append(contact_id)
+        else:
+            deleted_telephones.append({"contact": contact_id, "number": number})
+    token = SyncCursor(until, contact_start, tombstone_start).token() if has_more else str(until)
+    return token, has_more, contacts, deleted_contacts, deleted_telephones
+
+
+def purge_tombstones(before=None):
+    """Delete tombstones older than `before` and raise each user's floor, return the number deleted"""
+    before = before or timezone.now() - tombstone_retention()
+    deleted = 0
+    for using in contacts_databases():
+        expired = Tombstone.objects.using(using).filter(deleted_at__lt=before)
+        versions = ContactsVersion.objects.using(using)
+        with transaction.atomic(using=using):
+            floors = expired.values("user").annotate(floor=Max("sync_version")).values_list("user", "floor")
+            for user_id, floor in floors:
+                versions.filter(user_id=user_id, tombstone_floor__lt=floor).update(tombstone_floor=floor)
+            deleted += expired.delete()[0]
+    return deleted
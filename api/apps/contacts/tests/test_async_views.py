@@ -0,0 +1,112 @@
+import asyncio
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import path
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.contacts.models import Contact, Telephone, Tombstone
+from apps.contacts.views import ContactDetailView, ContactListView, SearchContactsView
+from apps.user_auth.authentication import get_cache
+
+User = get_user_model()
+
+# The views as `backend.asgi` builds them
+with override_settings(ASYNC_VIEWS=True):
+    urlpatterns = [
+        path("api/contacts", ContactListView.as_view()),
+        path("api/contacts/<int:contact_id>", ContactDetailView.as_view()),
+        path("api/contacts/search", SearchContactsView.as_view()),
+    ]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncContactViewTests(APITestCase):
+    """Test cases for the async contact views served through the ASGI handler"""
+
+    def setUp(self):
+        """Set up test data"""
+        get_cache().clear()
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.contact = Contact.objects.create(user=self.user, name="John Doe", city="New York")
+        Telephone.objects.create(user=self.user, contact=self.contact, number="+123456789")
+
+    def test_views_are_async_under_asgi_only(self):
+        """Test Django dispatches the views without a thread under ASGI and as sync views under WSGI"""
+        for view in (ContactListView, ContactDetailView, SearchContactsView):
+            self.assertFalse(iscoroutinefunction(view.as_view()))
+            with self.settings(ASYNC_VIEWS=True):
+                self.assertTrue(iscoroutinefunction(view.as_view()))
+
+    async def test_list(self):
+        """Test the list is paginated and answers If-None-Match with a 304"""
+        response = await self.async_client.get("/api/contacts", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"][0]["telephones"], [{"number": "+123456789"}])
+
+        cursor = await self.async_client.get("/api/contacts?pagination=cursor", headers=self.headers)
+        self.assertEqual(cursor.json()["results"], response.json()["results"])
+
+        etag = response["ETag"]
+        response = await self.async_client.get("/api/contacts", headers={**self.headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_search(self):
+        """Test ranked and cursor search"""
+        for url in ("/api/contacts/search?q=John", "/api/contacts/search?q=John&pagination=cursor"):
+            response = await self.async_client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([contact["id"] for contact in response.json()["results"]], [self.contact.id])
+
+        response = await self.async_client.get("/api/contacts/search", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_create_update_delete(self):
+        """Test a contact can be created, updated and deleted"""
+        response = await self.async_client.post(
+            "/api/contacts", {"name": "Jane Doe", "telephones": [{"number": "+987654321"}]},
+            content_type="application/json", headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        contact_id = response.json()["contact"]["id"]
+
+        response = await self.async_client.put(
+            f"/api/contacts/{contact_id}", {"city": "Paris"}, content_type="application/json", headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["contact"]["city"], "Paris")
+
+        response = await self.async_client.get(f"/api/contacts/{contact_id}", headers=self.headers)
+        self.assertEqual(response.json()["telephones"], [{"number": "+987654321"}])
+
+        response = await self.async_client.delete(f"/api/contacts/{contact_id}", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Contact.objects.filter(id=contact_id).aexists())
+        self.assertTrue(await Tombstone.objects.filter(contact_id=contact_id).aexists())
+
+    async def test_errors(self):
+        """Test validation, missing contacts and missing credentials are answered like the sync views"""
+        response = await self.async_client.post(
+            "/api/contacts", {"telephones": [{"number": "+1"}]}, content_type="application/json", headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("message", response.json())
+
+        response = await self.async_client.get("/api/contacts/999999", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = await self.async_client.get("/api/contacts")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_concurrent_requests(self):
+        """Test concurrent requests on one event loop all get their own answer"""
+        responses = await asyncio.gather(*(
+            self.async_client.get(f"/api/contacts/search?q=John&page_size={size}", headers=self.headers)
+            for size in range(1, 11)
+        ))
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["results"][0]["id"], self.contact.id)
@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+from django.core.cache import caches
+from rest_framework.test import APITestCase
+
+from apps.contacts import benchmark
+from apps.contacts.models import Contact
+
+
+class BenchmarkTests(APITestCase):
+    """Test cases for the contacts API benchmark"""
+
+    def setUp(self):
+        """Set up seeded users"""
+        caches["contacts"].clear()
+        self.users = benchmark.seed_users(2, 30, seed=1)
+
+    def test_run_benchmark(self):
+        """Test every scenario runs without errors and reports its statistics"""
+        results = benchmark.run_benchmark(benchmark.InProcessTransport(self.users), requests=10, warmup=1)
+
+        self.assertEqual(results["meta"]["target"], "in-process")
+        self.assertEqual(results["meta"]["parameters"]["requests"], 10)
+        self.assertEqual(list(results["scenarios"]), benchmark.SCENARIOS)
+        for scenario, stats in results["scenarios"].items():
+            self.assertEqual((stats["requests"], stats["errors"]), (10, 0), scenario)
+            self.assertLessEqual(stats["p50_ms"], stats["p95_ms"])
+            self.assertLessEqual(stats["p95_ms"], stats["p99_ms"])
+            self.assertGreater(stats["queries_per_request"], 0)
+        # Update and delete worked on the created contacts only
+        self.assertEqual(Contact.objects.count(), 60)
+        # Every read reached the database
+        for scenario in ("list", "deep_page", "search"):
+            self.assertEqual(results["scenarios"][scenario]["cache_hit_ratio"], 0.0, scenario)
+            self.assertGreater(results["scenarios"][scenario]["queries_per_request"], 1, scenario)
+
+    def test_run_benchmark_with_response_cache(self):
+        """Test repeated reads are served from the response cache when asked to, and the hits recorded"""
+        results = benchmark.run_benchmark(
+            benchmark.InProcessTransport(self.users), requests=10, warmup=2, scenarios=["deep_page"], response_cache=True,
+        )
+        self.assertTrue(results["meta"]["parameters"]["response_cache"])
+        self.assertEqual(results["scenarios"]["deep_page"]["cache_hit_ratio"], 1.0)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        samples = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(samples, 50), 50)
+        self.assertEqual(benchmark.percentile(samples, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 95), 7)
+        self.assertIsNone(benchmark.percentile([], 50))
+
+    def test_results_round_trip_and_compare(self):
+        """Test results are written as JSON and compared metric by metric"""
+        results = benchmark.run_benchmark(benchmark.InProcessTransport(self.users), requests=3, scenarios=["search"])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            benchmark.write_results(results, path)
+            baseline = benchmark.load_results(path)
+        self.assertEqual(baseline, results)
+
+        slower = {"scenarios": {"search": {**baseline["scenarios"]["search"], "p95_ms": baseline["scenarios"]["search"]["p95_ms"] * 2}}}
+        rows = {row["metric"]: row for row in benchmark.compare(baseline, slower)}
+        self.assertEqual(rows["p95_ms"]["change"], 100.0)
+        self.assertTrue(rows["p95_ms"]["worse"])
+        self.assertFalse(rows["requests_per_second"]["worse"])
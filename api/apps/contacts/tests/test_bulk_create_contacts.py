@@ -0,0 +1,93 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts.models import Contact, Telephone, TelephoneNgram
+from core.utils.query_budget import QueryBudgetMixin
+
+User = get_user_model()
+
+class BulkCreateContactTests(QueryBudgetMixin, APITestCase):
+    """Test cases for creating contacts in bulk via POST request"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        existing = Contact.objects.create(user=self.user, name="Existing Contact")
+        Telephone.objects.create(user=self.user, contact=existing, number="+111111111")
+
+        self.bulk_url = "/api/contacts/bulk"
+
+    def payload(self, count, start=0):
+        return [
+            {"name": f"Contact {i}", "city": "London", "telephones": [{"number": f"+44{i:08d}"}, {"number": f"+33{i:08d}"}]}
+            for i in range(start, start + count)
+        ]
+
+    def test_bulk_create_success(self):
+        """Test every contact and telephone of the batch is created"""
+        response = self.client.post(self.bulk_url, self.payload(3), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual([result["index"] for result in response.data["results"]], [0, 1, 2])
+
+        contact = Contact.objects.get(id=response.data["results"][1]["id"])
+        self.assertEqual(contact.name, "Contact 1")
+        self.assertEqual(contact.city, "London")
+        self.assertEqual(sorted(contact.telephones.values_list("number", flat=True)), ["+3300000001", "+4400000001"])
+        self.assertTrue(TelephoneNgram.objects.filter(telephone__contact=contact).exists())
+
+    def test_bulk_create_reports_invalid_items(self):
+        """Test invalid items are reported by index while valid ones are created"""
+        data = self.payload(2) + [
+            {"telephones": [{"number": "+222222222"}]},
+            {"name": "Taken Number", "telephones": [{"number": "+111111111"}]},
+            {"name": "Repeated Number", "telephones": [{"number": "+4400000000"}]},
+            {"name": "Bad Number", "telephones": [{"number": "abc"}]},
+        ]
+        response = self.client.post(self.bulk_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["failed"], 4)
+
+        results = response.data["results"]
+        self.assertIn("id", results[0])
+        self.assertIn("id", results[1])
+        self.assertEqual(results[2]["message"], "name, this field is required.")
+        self.assertIn("+111111111", results[3]["message"])
+        self.assertIn("+4400000000", results[4]["message"])
+        self.assertIn("telephones", results[5]["message"])
+        self.assertFalse(Contact.objects.filter(name__in=["Taken Number", "Repeated Number", "Bad Number"]).exists())
+
+    def test_bulk_create_nothing_valid(self):
+        """Test a batch without any valid contact is rejected"""
+        response = self.client.post(self.bulk_url, [{"city": "Nowhere"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["created"], 0)
+
+    def test_bulk_create_requires_a_list(self):
+        """Test the body must be a non-empty list"""
+        response = self.client.post(self.bulk_url, {"name": "John Doe"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "Expected a list of contacts.")
+
+    @override_settings(CONTACTS_BULK_MAX_ITEMS=2)
+    def test_bulk_create_limit(self):
+        """Test batches above the configured limit are rejected"""
+        response = self.client.post(self.bulk_url, self.payload(3), format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "A bulk request can contain at most 2 contacts.")
+
+    def test_bulk_create_queries_are_batched(self):
+        """Test the number of queries grows with insert batches, not with contacts"""
+        queries = self.count_queries(lambda: self.client.post(self.bulk_url, self.payload(500), format="json"))
+        self.assertEqual(Contact.objects.filter(user=self.user).count(), 501)
+        self.assertLess(queries, 50)
+
+    def test_bulk_create_unauthenticated(self):
+        """Test bulk creation without authentication"""
+        self.client.logout()
+        response = self.client.post(self.bulk_url, self.payload(1), format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,118 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts.models import Contact, Telephone, TelephoneNgram
+
+User = get_user_model()
+
+class BulkUpdateDeleteContactTests(APITestCase):
+    """Test cases for updating and deleting contacts in bulk"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        self.contacts = [
+            Contact.objects.create(user=self.user, name=f"Contact {i}", city="London" if i < 3 else "Paris")
+            for i in range(5)
+        ]
+        for contact in self.contacts:
+            Telephone.objects.create(user=self.user, contact=contact, number=f"+4400000{contact.id:04d}")
+
+        self.other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        self.other_contact = Contact.objects.create(user=self.other_user, name="Other Contact", city="London")
+        Telephone.objects.create(user=self.other_user, contact=self.other_contact, number="+449999999")
+
+        self.bulk_url = "/api/contacts/bulk"
+
+    def test_bulk_update_by_ids(self):
+        """Test the selected contacts are updated and the count returned"""
+        ids = [self.contacts[0].id, self.contacts[1].id]
+        response = self.client.put(self.bulk_url, {"ids": ids, "changes": {"country": "UK"}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(Contact.objects.filter(country="UK").count(), 2)
+
+    def test_bulk_update_by_filter(self):
+        """Test contacts can be selected by an exact-match filter"""
+        response = self.client.put(
+            self.bulk_url, {"filter": {"city": "London"}, "changes": {"city": "Greater London"}}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 3)
+        self.other_contact.refresh_from_db()
+        self.assertEqual(self.other_contact.city, "London")
+
+    def test_bulk_update_by_blank_filter(self):
+        """Test a blank filter value selects contacts whose field is NULL as well as empty"""
+        Contact.objects.filter(id=self.contacts[0].id).update(city=None)
+        Contact.objects.filter(id=self.contacts[1].id).update(city="")
+        response = self.client.put(
+            self.bulk_url, {"filter": {"city": ""}, "changes": {"city": "Unknown"}}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(Contact.objects.filter(user=self.user, city="Unknown").count(), 2)
+
+    def test_bulk_update_skips_other_users_contacts(self):
+        """Test ids of another user's contacts are never updated"""
+        response = self.client.put(
+            self.bulk_url, {"ids": [self.other_contact.id], "changes": {"name": "Taken Over"}}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 0)
+        self.other_contact.refresh_from_db()
+        self.assertEqual(self.other_contact.name, "Other Contact")
+
+    def test_bulk_update_validation(self):
+        """Test invalid selections and changes are rejected"""
+        response = self.client.put(self.bulk_url, {"changes": {"city": "Rome"}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "Provide either `ids` or `filter` to select contacts.")
+
+        response = self.client.put(
+            self.bulk_url, {"ids": [self.contacts[0].id], "changes": {"telephones": []}}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("unsupported field telephones", response.data["message"])
+
+        response = self.client.put(self.bulk_url, {"ids": [self.contacts[0].id], "changes": {"name": ""}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("name", response.data["message"])
+
+    def test_bulk_delete_by_ids(self):
+        """Test contacts and their telephones are deleted with one statement per table"""
+        ids = [contact.id for contact in self.contacts[:4]] + [self.other_contact.id]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.delete(self.bulk_url, {"ids": ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted"], {"contacts": 4, "telephones": 4})
+
+        deletes = [query["sql"] for query in context.captured_queries if query["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 2)
+        self.assertEqual(list(Contact.objects.filter(user=self.user)), [self.contacts[4]])
+        self.assertTrue(Contact.objects.filter(id=self.other_contact.id).exists())
+        self.assertFalse(TelephoneNgram.objects.filter(telephone__contact_id__in=ids[:4]).exists())
+
+    def test_bulk_delete_by_filter(self):
+        """Test contacts can be deleted by filter without touching other users"""
+        response = self.client.delete(self.bulk_url, {"filter": {"city": "Paris"}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted"]["contacts"], 2)
+        self.assertEqual(Contact.objects.filter(user=self.user).count(), 3)
+
+        response = self.client.get("/api/contacts/search", {"q": "Contact 4"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_bulk_delete_requires_selection(self):
+        """Test a delete without ids or filter is rejected instead of wiping everything"""
+        response = self.client.delete(self.bulk_url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.delete(self.bulk_url, {"filter": {"name": "Contact 1"}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("unsupported filter field name", response.data["message"])
+        self.assertEqual(Contact.objects.count(), 6)
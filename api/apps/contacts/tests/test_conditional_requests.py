@@ -0,0 +1,126 @@
+from io import StringIO
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts import importers
+from apps.contacts.models import Contact, ContactsVersion, Telephone
+
+User = get_user_model()
+
+class ConditionalRequestTests(APITestCase):
+    """Test cases for ETag / Last-Modified handling of contact reads"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        self.client.post("/api/contacts", {"name": "John Doe", "telephones": [{"number": "+123456789"}]}, format="json")
+        self.contact = Contact.objects.get(user=self.user)
+
+        self.list_url = "/api/contacts"
+        self.search_url = "/api/contacts/search?q=John"
+        self.contact_url = f"/api/contacts/{self.contact.id}"
+
+    def assertNotModifiedAfter(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return response
+
+    def test_list_sends_validators(self):
+        """Test the list carries an ETag and Last-Modified"""
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match is answered with an empty 304 in one query"""
+        etag = self.client.get(self.list_url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.assertNotModifiedAfter(self.list_url, etag)
+        self.assertEqual(response.content, b"")
+
+    def test_list_if_modified_since(self):
+        """Test If-Modified-Since is honoured as well"""
+        last_modified = self.client.get(self.list_url)["Last-Modified"]
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_change_the_etag(self):
+        """Test every write path bumps the user's version"""
+        writes = [
+            lambda: self.client.post(self.list_url, {"name": "Jane", "telephones": [{"number": "+555000111"}]}, format="json"),
+            lambda: self.client.put(self.contact_url, {"city": "Paris"}, format="json"),
+            lambda: self.client.post("/api/contacts/bulk", [{"name": "Bulk", "telephones": []}], format="json"),
+            lambda: self.client.put("/api/contacts/bulk", {"ids": [self.contact.id], "changes": {"country": "FR"}}, format="json"),
+            lambda: importers.import_contacts(self.user, StringIO("name\nImported\n"), "csv"),
+            lambda: self.client.delete("/api/contacts/bulk", {"filter": {"city": "Nowhere"}}, format="json"),
+            lambda: self.client.delete(self.contact_url),
+        ]
+        etags = [self.client.get(self.list_url)["ETag"]]
+        for write in writes:
+            write()
+            etags.append(self.client.get(self.list_url)["ETag"])
+
+        # Deleting nothing is not a change
+        self.assertEqual(etags[5], etags[6])
+        self.assertEqual(len(set(etags)), len(etags) - 1)
+        self.assertEqual(ContactsVersion.objects.get(user=self.user).version, 7)
+
+    def test_search_not_modified(self):
+        """Test search responses support conditional requests"""
+        etag = self.client.get(self.search_url)["ETag"]
+        self.assertNotModifiedAfter(self.search_url, etag)
+
+        self.client.put(self.contact_url, {"name": "John Smith"}, format="json")
+        self.assertEqual(self.client.get(self.search_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_search_without_query_is_never_not_modified(self):
+        """Test a rejected search is not turned into a 304"""
+        etag = self.client.get(self.search_url)["ETag"]
+        response = self.client.get("/api/contacts/search", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_contact(self):
+        """Test a single contact can be retrieved"""
+        response = self.client.get(self.contact_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "John Doe")
+        self.assertEqual(response.data["telephones"], [{"number": "+123456789"}])
+
+    def test_get_contact_not_modified(self):
+        """Test the contact ETag follows the contact's own updates"""
+        etag = self.client.get(self.contact_url)["ETag"]
+        self.assertNotModifiedAfter(self.contact_url, etag)
+
+        self.client.put(self.contact_url, {"telephones": [{"number": "+987654321"}]}, format="json")
+        response = self.client.get(self.contact_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_get_contact_of_another_user(self):
+        """Test contacts of other users are not found"""
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        other_contact = Contact.objects.create(user=other_user, name="Jane Doe")
+        Telephone.objects.create(user=other_user, contact=other_contact, number="+555555555")
+
+        response = self.client.get(f"/api/contacts/{other_contact.id}")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", response)
+
+    def test_etag_differs_between_users(self):
+        """Test a second user's empty address book never matches the first user's ETag"""
+        etag = self.client.get(self.list_url)["ETag"]
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        self.client.force_authenticate(user=other_user)
+
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_not_modified_requires_authentication(self):
+        """Test unauthenticated requests are rejected before the ETag is checked"""
+        etag = self.client.get(self.list_url)["ETag"]
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts.models import Contact, ContactsVersion, Tombstone
+from core.utils.query_budget import query_budget
+
+User = get_user_model()
+
+class ContactChangesTests(APITestCase):
+    """Test cases for delta sync with sync tokens and tombstones"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        self.contacts_url = "/api/contacts"
+        self.changes_url = "/api/contacts/changes"
+        self.john = self.create_contact("John Doe", "+123456789")
+        self.jane = self.create_contact("Jane Doe", "+987654321")
+
+    def create_contact(self, name, number):
+        response = self.client.post(self.contacts_url, {"name": name, "telephones": [{"number": number}]}, format="json")
+        return response.data["contact"]["id"]
+
+    def changes(self, since=None):
+        url = self.changes_url if since is None else f"{self.changes_url}?since={since}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_sync(self):
+        """Test a request without a token returns every contact"""
+        data = self.changes()
+        self.assertEqual([contact["id"] for contact in data["contacts"]], [self.john, self.jane])
+        self.assertEqual(data["deleted"], {"contacts": [], "telephones": []})
+        self.assertEqual(data["contacts"][0]["telephones"], [{"number": "+123456789"}])
+
+    def test_nothing_changed(self):
+        """Test a current token returns no changes and the same token"""
+        token = self.changes()["sync_token"]
+        data = self.changes(token)
+        self.assertEqual(data["contacts"], [])
+        self.assertEqual(data["sync_token"], token)
+
+    def test_created_and_updated_contacts(self):
+        """Test only contacts written after the token are returned"""
+        token = self.changes()["sync_token"]
+        self.client.put(f"{self.contacts_url}/{self.john}", {"city": "Paris"}, format="json")
+        new = self.create_contact("New Contact", "+555000111")
+
+        data = self.changes(token)
+        self.assertEqual([contact["id"] for contact in data["contacts"]], [self.john, new])
+        self.assertEqual(data["contacts"][0]["city"], "Paris")
+        self.assertNotEqual(data["sync_token"], token)
+
+    def test_deleted_contact_leaves_tombstones(self):
+        """Test deleting a contact reports the contact and its telephones"""
+        token = self.changes()["sync_token"]
+        self.client.delete(f"{self.contacts_url}/{self.jane}")
+
+        data = self.changes(token)
+        self.assertEqual(data["contacts"], [])
+        self.assertEqual(data["deleted"]["contacts"], [self.jane])
+        self.assertEqual(data["deleted"]["telephones"], [{"contact": self.jane, "number": "+987654321"}])
+
+    def test_bulk_writes_are_synced(self):
+        """Test bulk create, update and delete are picked up"""
+        token = self.changes()["sync_token"]
+        self.client.post(f"{self.contacts_url}/bulk", [{"name": "Bulk", "telephones": []}], format="json")
+        self.client.put(f"{self.contacts_url}/bulk", {"ids": [self.john], "changes": {"country": "UK"}}, format="json")
+        self.client.delete(f"{self.contacts_url}/bulk", {"ids": [self.jane]}, format="json")
+
+        data = self.changes(token)
+        self.assertEqual([contact["name"] for contact in data["contacts"]], ["Bulk", "John Doe"])
+        self.assertEqual(data["deleted"]["contacts"], [self.jane])
+
+    def test_incremental_sync_cost_does_not_depend_on_address_book(self):
+        """Test a delta sync runs the same queries however many contacts are unchanged"""
+        token = self.changes()["sync_token"]
+        Contact.objects.bulk_create(Contact(user=self.user, name=f"Old {i}") for i in range(200))
+        self.create_contact("New Contact", "+555000111")
+
+        with query_budget(7):
+            data = self.changes(token)
+        self.assertEqual(len(data["contacts"]), 1)
+
+    def test_changes_are_paged(self):
+        """Test a sync is split in pages and the plain token only comes with the last one"""
+        token = self.changes()["sync_token"]
+        extra = self.create_contact("Extra", "+555000222")
+        self.client.put(f"{self.contacts_url}/{self.john}", {"name": "John Smith"}, format="json")
+        self.client.delete(f"{self.contacts_url}/{self.jane}")
+
+        pages, since = [], token
+        while True:
+            response = self.client.get(self.changes_url, {"since": since, "limit": 2})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            since = response.data["sync_token"]
+            if not response.data["has_more"]:
+                break
+            if len(pages) == 1:
+                # Changed while paging: stamped past this sync, so it comes with the next one
+                self.client.put(f"{self.contacts_url}/{extra}", {"name": "Extra Changed"}, format="json")
+
+        sizes = [len(page["contacts"]) + len(page["deleted"]["contacts"]) + len(page["deleted"]["telephones"]) for page in pages]
+        self.assertEqual(sizes, [2, 2])
+        self.assertEqual([contact["name"] for page in pages for contact in page["contacts"]], ["Extra", "John Smith"])
+        self.assertEqual([contact for page in pages for contact in page["deleted"]["contacts"]], [self.jane])
+        self.assertEqual(since, str(int(token) + 3))
+        self.assertEqual([contact["name"] for contact in self.changes(since)["contacts"]], ["Extra Changed"])
+
+    def test_full_sync_is_paged(self):
+        """Test a full sync can be paged too"""
+        response = self.client.get(self.changes_url, {"limit": 1})
+        self.assertTrue(response.data["has_more"])
+        response = self.client.get(self.changes_url, {"since": response.data["sync_token"], "limit": 1})
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual([contact["id"] for contact in response.data["contacts"]], [self.jane])
+        self.assertEqual(response.data["sync_token"], self.changes()["sync_token"])
+
+    def test_tokens_are_per_user(self):
+        """Test other users' changes are never returned"""
+        token = self.changes()["sync_token"]
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        self.client.force_authenticate(user=other_user)
+        self.create_contact("Other", "+555000111")
+        self.client.force_authenticate(user=self.user)
+
+        self.assertEqual(self.changes(token)["contacts"], [])
+
+    def test_invalid_token(self):
+        """Test malformed tokens are rejected"""
+        for token in ("abc", "-1", "3.1.2"):
+            response = self.client.get(self.changes_url, {"since": token})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_token_from_the_future(self):
+        """Test tokens ahead of the user's version require a resync"""
+        response = self.client.get(f"{self.changes_url}?since=1000")
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_purged_tombstones_expire_old_tokens(self):
+        """Test tokens older than purged tombstones require a resync"""
+        token = self.changes()["sync_token"]
+        self.client.delete(f"{self.contacts_url}/{self.jane}")
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=31))
+        fresh_token = self.changes()["sync_token"]
+
+        stdout = StringIO()
+        call_command("purge_tombstones", stdout=stdout)
+
+        self.assertIn("Purged 2 tombstones.", stdout.getvalue())
+        self.assertEqual(ContactsVersion.objects.get(user=self.user).tombstone_floor, int(fresh_token))
+        self.assertEqual(self.client.get(f"{self.changes_url}?since={token}").status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.changes(fresh_token)["deleted"]["contacts"], [])
+
+    def test_recent_tombstones_are_kept(self):
+        """Test the purge keeps tombstones within the retention period"""
+        self.client.delete(f"{self.contacts_url}/{self.jane}")
+        call_command("purge_tombstones", stdout=StringIO())
+        self.assertEqual(Tombstone.objects.count(), 2)
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from django.http import StreamingHttpResponse
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts import exporters
+from apps.contacts.models import Contact, Telephone
+from core.utils.query_budget import QueryBudgetMixin
+
+User = get_user_model()
+
+class ExportContactsTests(QueryBudgetMixin, APITestCase):
+    """Test cases for streaming exports of the address book"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        self.contact1 = Contact.objects.create(
+            user=self.user, name="John Doe", address_line_1="123 Street", city="New York", country="USA", postcode="10001"
+        )
+        self.contact2 = Contact.objects.create(user=self.user, name="Doe, Jane")
+        Telephone.objects.create(user=self.user, contact=self.contact1, number="+123456789")
+        Telephone.objects.create(user=self.user, contact=self.contact1, number="+987654321")
+
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        Contact.objects.create(user=other_user, name="Other Contact")
+
+        self.export_url = "/api/contacts/export"
+
+    def export(self, export_format):
+        response = self.client.get(f"{self.export_url}/{export_format}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        """Test the CSV export has a header and one row per contact"""
+        rows = list(csv.DictReader(io.StringIO(self.export("csv"))))
+        self.assertEqual([row["name"] for row in rows], ["John Doe", "Doe, Jane"])
+        self.assertEqual(rows[0]["telephones"], "+123456789;+987654321")
+        self.assertEqual(rows[0]["postcode"], "10001")
+        self.assertEqual(rows[1]["address_line_1"], "")
+
+    def test_export_ndjson(self):
+        """Test each NDJSON line is a contact shaped like the API representation"""
+        lines = [json.loads(line) for line in self.export("ndjson").splitlines()]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]["id"], self.contact1.id)
+        self.assertEqual(lines[0]["telephones"], [{"number": "+123456789"}, {"number": "+987654321"}])
+        self.assertEqual(lines[1]["telephones"], [])
+
+    def test_export_vcard(self):
+        """Test the vCard export escapes values and lists every number"""
+        content = self.export("vcard")
+        self.assertEqual(content.count("BEGIN:VCARD"), 2)
+        self.assertIn("FN:Doe\\, Jane", content)
+        self.assertIn("TEL;TYPE=VOICE:+987654321", content)
+        self.assertIn("ADR;TYPE=HOME:;;123 Street;New York;;10001;USA", content)
+
+    def test_export_headers(self):
+        """Test the export is served as a file download"""
+        response = self.client.get(f"{self.export_url}/vcard", HTTP_ACCEPT="text/vcard")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/vcard; charset=utf-8")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="contacts.vcf"')
+
+    def test_export_unsupported_format(self):
+        """Test unknown formats are rejected"""
+        response = self.client.get(f"{self.export_url}/xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("csv, ndjson, vcard", response.data["message"])
+
+    def test_export_unauthenticated(self):
+        """Test exporting without authentication"""
+        self.client.logout()
+        response = self.client.get(f"{self.export_url}/csv")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(CONTACTS_EXPORT_CHUNK_SIZE=10)
+    def test_export_reads_in_chunks(self):
+        """Test contacts and telephones are read chunk by chunk, not one query per contact"""
+        contacts = Contact.objects.bulk_create(Contact(user=self.user, name=f"Contact {i}") for i in range(48))
+        Telephone.objects.bulk_create(
+            Telephone(user=self.user, contact=contact, number=f"+44{contact.id:08d}") for contact in contacts
+        )
+
+        queries = self.count_queries(lambda: self.export("ndjson"))
+        # 50 contacts in chunks of 10: one contact fetch per chunk plus one telephone prefetch per chunk
+        self.assertLessEqual(queries, 11)
+
+    def test_export_reads_telephones_from_the_read_alias(self):
+        """Test telephones are prefetched on the contacts' alias, not routed once the request has ended"""
+        with mock.patch.object(exporters, "read_alias", return_value="replica"):
+            contacts = exporters.export_queryset(self.user)
+        self.assertEqual(contacts.db, "replica")
+        self.assertEqual([lookup.queryset.db for lookup in contacts._prefetch_related_lookups], ["replica"])
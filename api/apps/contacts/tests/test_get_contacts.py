@@ -70,4 +70,50 @@ class GetContactsTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("count", response.data)  
         self.assertIn("next", response.data)  
-        self.assertIn("previous", response.data)  
\ No newline at end of file
+        self.assertIn("previous", response.data)  
+
+    def test_cursor_pagination_walks_all_contacts(self):
+        """Test following `next` cursors returns every contact exactly once, newest first"""
+        response = self.client.get(f"{self.contacts_url}?pagination=cursor&page_size=2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+        names = [contact["name"] for contact in response.data["results"]]
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["next"])
+        names += [contact["name"] for contact in response.data["results"]]
+
+        self.assertEqual(names, ["Alice Johnson", "Jane Doe", "John Doe"])
+
+    def test_cursor_pagination_previous_link(self):
+        """Test the `previous` cursor returns the page before the current one"""
+        first_page = self.client.get(f"{self.contacts_url}?pagination=cursor&page_size=2")
+        second_page = self.client.get(first_page.data["next"])
+
+        response = self.client.get(second_page.data["previous"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], first_page.data["results"])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_cursor_pagination_optional_count(self):
+        """Test the total count is only included when requested"""
+        response = self.client.get(f"{self.contacts_url}?pagination=cursor&count=true")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+
+    def test_cursor_pagination_invalid_cursor(self):
+        """Test a tampered cursor is rejected"""
+        response = self.client.get(f"{self.contacts_url}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_pagination_in_search_results(self):
+        """Test search results can be paginated with cursors"""
+        response = self.client.get(f"{self.contacts_url}/search?q=John&pagination=cursor&page_size=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([contact["name"] for contact in response.data["results"]], ["Alice Johnson"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([contact["name"] for contact in response.data["results"]], ["John Doe"])
+        self.assertIsNone(response.data["next"])
@@ -0,0 +1,216 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts import importers, search, versioning
+from apps.contacts.models import Contact, Telephone
+
+User = get_user_model()
+
+CSV_FILE = (
+    "id,name,address_line_1,address_line_2,city,country,postcode,telephones\r\n"
+    ",John Doe,123 Street,,New York,USA,10001,+123456789;+987654321\r\n"
+    ",,No Name,,,,,\r\n"
+    ",Jane Doe,,,,,,+555000111;abc\r\n"
+)
+
+VCARD_FILE = (
+    "BEGIN:VCARD\r\n"
+    "VERSION:3.0\r\n"
+    "FN:Doe\\, Jane\r\n"
+    "ADR;TYPE=HOME:;Flat 2;1 Long Road;London;;SW1A 1AA;United Kingdom\r\n"
+    "TEL;TYPE=VOICE:+4420794600\r\n"
+    " 09\r\n"
+    "END:VCARD\r\n"
+    "BEGIN:VCARD\r\n"
+    "VERSION:4.0\r\n"
+    "N:Smith;John;;;\r\n"
+    "END:VCARD\r\n"
+)
+
+
+class ImportContactsTests(APITestCase):
+    """Test cases for importing contacts from CSV and vCard files"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+        self.import_url = "/api/contacts/import"
+
+    def upload(self, name, content, **data):
+        file = SimpleUploadedFile(name, content.encode())
+        return self.client.post(self.import_url, {"file": file, **data}, format="multipart")
+
+    def test_import_csv(self):
+        """Valid rows are imported, invalid rows and numbers are reported"""
+        response = self.upload("contacts.csv", CSV_FILE)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows"], 3)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["failed_rows"], 1)
+        self.assertEqual(response.data["skipped_numbers"], 1)
+        self.assertEqual([issue["row"] for issue in response.data["issues"]], [3, 4])
+
+        john = Contact.objects.get(user=self.user, name="John Doe")
+        self.assertEqual(john.city, "New York")
+        self.assertIsNone(john.address_line_2)
+        self.assertEqual(sorted(john.telephones.values_list("number", flat=True)), ["+123456789", "+987654321"])
+        self.assertEqual(list(Contact.objects.get(name="Jane Doe").telephones.values_list("number", flat=True)), ["+555000111"])
+
+    def test_import_vcard(self):
+        """vCard files are imported with folded lines, escapes and N fallback"""
+        response = self.upload("contacts.vcf", VCARD_FILE)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        jane = Contact.objects.get(user=self.user, name="Doe, Jane")
+        self.assertEqual((jane.address_line_1, jane.address_line_2, jane.city), ("1 Long Road", "Flat 2", "London"))
+        self.assertEqual((jane.postcode, jane.country), ("SW1A 1AA", "United Kingdom"))
+        self.assertEqual(jane.telephones.get().number, "+442079460009")
+        self.assertTrue(Contact.objects.filter(user=self.user, name="John Smith").exists())
+
+    def test_import_round_trips_export(self):
+        """A CSV export can be imported back"""
+        contact = Contact.objects.create(user=self.user, name="John Doe", city="Paris")
+        Telephone.objects.create(user=self.user, contact=contact, number="+123456789")
+        exported = b"".join(self.client.get("/api/contacts/export/csv").streaming_content).decode()
+        Contact.objects.all().delete()
+
+        response = self.upload("export.csv", exported)
+
+        self.assertEqual(response.data["created"], 1)
+        imported = Contact.objects.get(user=self.user)
+        self.assertEqual((imported.name, imported.city), ("John Doe", "Paris"))
+        self.assertEqual(imported.telephones.get().number, "+123456789")
+
+    def test_colliding_numbers_are_skipped(self):
+        """Numbers already stored or repeated in the file are skipped, the contact is kept"""
+        existing = Contact.objects.create(user=self.user, name="Existing")
+        Telephone.objects.create(user=self.user, contact=existing, number="+123456789")
+        content = "name,telephones\nFirst,+123456789;+111222333\nSecond,+111222333\n"
+
+        response = self.upload("contacts.csv", content)
+
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["skipped_numbers"], 2)
+        self.assertEqual(list(Contact.objects.get(name="First").telephones.values_list("number", flat=True)), ["+111222333"])
+        self.assertFalse(Contact.objects.get(name="Second").telephones.exists())
+
+    def test_numbers_of_other_users_do_not_collide(self):
+        """The unique constraint is per user"""
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        other = Contact.objects.create(user=other_user, name="Other")
+        Telephone.objects.create(user=other_user, contact=other, number="+123456789")
+
+        response = self.upload("contacts.csv", "name,telephones\nMine,+123456789\n")
+
+        self.assertEqual(response.data["skipped_numbers"], 0)
+        self.assertTrue(Telephone.objects.filter(user=self.user, number="+123456789").exists())
+
+    def test_imported_contacts_are_searchable(self):
+        """Imported contacts and numbers land in the search indexes"""
+        self.upload("contacts.csv", CSV_FILE)
+        john = Contact.objects.get(name="John Doe")
+
+        self.assertEqual(list(search.search_contact_ids(self.user, "York")), [john.id])
+        self.assertEqual(list(search.search_contact_ids(self.user, "98765")), [john.id])
+
+    def test_import_commits_in_batches(self):
+        """Each batch is written in its own transaction"""
+        content = "name,telephones\n" + "".join(f"Contact {i},+1555000{i:04d}\n" for i in range(25))
+        versioning.bump_version(self.user)
+        with self.assertNumQueries(5 * 8):
+            report = importers.import_contacts(self.user, StringIO(content), "csv", batch_size=5)
+
+        self.assertEqual(report.created, 25)
+        self.assertEqual(Telephone.objects.filter(user=self.user).count(), 25)
+
+    def test_file_format_parameter(self):
+        """The format can be given explicitly when the name has no extension"""
+        response = self.upload("contacts", "name\nJohn\n", file_format="csv")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 1)
+
+    def test_unsupported_format(self):
+        """Unknown formats are rejected"""
+        response = self.upload("contacts.xlsx", "name\nJohn\n")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "Unsupported import format, use one of csv, vcard.")
+
+    def test_csv_without_name_column(self):
+        """A CSV file must have a name column"""
+        response = self.upload("contacts.csv", "city\nParis\n")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Contact.objects.exists())
+
+    @override_settings(CONTACTS_IMPORT_BATCH_SIZE=50)
+    def test_file_breaking_partway_reports_committed_batches(self):
+        """A file that cannot be decoded to the end reports the contacts committed before the error"""
+        rows = "".join(f"Contact {i},+1555000{i:04d}\n" for i in range(1000))
+        file = SimpleUploadedFile("contacts.csv", b"name,telephones\n" + rows.encode() + b"Broken \xff\n")
+        response = self.client.post(self.import_url, {"file": file}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("can't decode", response.data["message"])
+        self.assertGreater(response.data["created"], 0)
+        self.assertLess(response.data["created"], 1000)
+        self.assertEqual(response.data["created"], response.data["rows"])
+        self.assertEqual(Contact.objects.filter(user=self.user).count(), response.data["created"])
+
+    def test_missing_file(self):
+        """The file field is required"""
+        response = self.client.post(self.import_url, {}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=10)
+    def test_large_uploads_are_read_from_disk(self):
+        """Uploads spooled to a temporary file are imported too"""
+        response = self.upload("contacts.csv", CSV_FILE)
+
+        self.assertEqual(response.data["created"], 2)
+
+    def test_import_requires_authentication(self):
+        """Unauthenticated users cannot import contacts"""
+        self.client.force_authenticate(user=None)
+        response = self.upload("contacts.csv", CSV_FILE)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ImportContactsCommandTests(APITestCase):
+    """Test cases for the import_contacts management command"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        file = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        file.write(CSV_FILE)
+        file.close()
+        self.path = file.name
+        self.addCleanup(os.remove, self.path)
+
+    def test_command_imports_file(self):
+        """The command imports the file for the given user"""
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_contacts", self.path, user="test@example.com", batch_size=1, stdout=stdout, stderr=stderr)
+
+        self.assertEqual(Contact.objects.filter(user=self.user).count(), 2)
+        self.assertIn("Imported 2 of 3 contacts", stdout.getvalue())
+        self.assertIn("Row 3:", stderr.getvalue())
+
+    def test_command_unknown_user(self):
+        """The command fails for an unknown user"""
+        with self.assertRaises(CommandError):
+            call_command("import_contacts", self.path, user="nobody@example.com")
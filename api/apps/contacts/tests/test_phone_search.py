@@ -0,0 +1,87 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts.models import Contact, Telephone, TelephoneNgram
+
+User = get_user_model()
+
+class PhoneSearchTests(APITestCase):
+    """Test cases for partial telephone number search"""
+
+    def setUp(self):
+        """Set up test data through the API so the number index is maintained"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        self.contacts_url = "/api/contacts"
+        self.create_contact("London Office", ["(020) 7946-0958"])
+        self.create_contact("Mobile Friend", ["+44 7700 900123", "+1 212 555 4567"])
+
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        other_contact = Contact.objects.create(user=other_user, name="Other Person")
+        Telephone.objects.create(user=other_user, contact=other_contact, number="020 7946 0958")
+
+    def create_contact(self, name, numbers):
+        response = self.client.post(
+            self.contacts_url, {"name": name, "telephones": [{"number": number} for number in numbers]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["contact"]["id"]
+
+    def search(self, query, **params):
+        response = self.client.get(f"{self.contacts_url}/search", {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [contact["name"] for contact in response.data["results"]]
+
+    def test_digits_are_normalized(self):
+        """Test telephones store a digits-only copy of the number"""
+        telephone = Telephone.objects.get(user=self.user, number="(020) 7946-0958")
+        self.assertEqual(telephone.number_digits, "02079460958")
+
+    def test_search_ignores_formatting(self):
+        """Test fragments match regardless of punctuation and spacing"""
+        self.assertEqual(self.search("4567"), ["Mobile Friend"])
+        self.assertEqual(self.search("(020) 79"), ["London Office"])
+        self.assertEqual(self.search("7946-09"), ["London Office"])
+        self.assertEqual(self.search("946 0958"), ["London Office"])
+
+    def test_search_requires_digits_in_order(self):
+        """Test having every trigram of the query is not enough without the digit sequence"""
+        self.assertEqual(self.search("4567 212"), [])
+
+    def test_short_fragment_search(self):
+        """Test fragments shorter than a trigram still match"""
+        self.assertEqual(self.search("58"), ["London Office"])
+
+    def test_number_matches_are_paginated_before_text_matches(self):
+        """Test pages of a ranked search come out of one ordering, number matches first"""
+        self.create_contact("Suite 4567", [])
+        self.assertEqual(self.search("4567"), ["Mobile Friend", "Suite 4567"])
+
+        response = self.client.get(f"{self.contacts_url}/search", {"q": "4567", "page_size": 1, "page": 2})
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual([contact["name"] for contact in response.data["results"]], ["Suite 4567"])
+
+    def test_phone_search_with_cursor_pagination(self):
+        """Test number matches can be paginated with cursors"""
+        self.assertEqual(self.search("09", pagination="cursor"), ["Mobile Friend", "London Office"])
+
+    def test_update_indexes_new_numbers(self):
+        """Test numbers added on update become searchable"""
+        contact_id = self.create_contact("Later Update", ["0161 496 0000"])
+        response = self.client.put(
+            f"{self.contacts_url}/{contact_id}", {"telephones": [{"number": "0113 496 0777"}]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.search("0777"), ["Later Update"])
+
+    def test_deleting_a_contact_removes_its_trigrams(self):
+        """Test the number index does not keep rows for deleted telephones"""
+        contact = Contact.objects.get(user=self.user, name="Mobile Friend")
+        self.assertTrue(TelephoneNgram.objects.filter(telephone__contact=contact).exists())
+        telephone_ids = list(contact.telephones.values_list("id", flat=True))
+
+        response = self.client.delete(f"{self.contacts_url}/{contact.id}")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(TelephoneNgram.objects.filter(telephone_id__in=telephone_ids).exists())
+        self.assertEqual(self.search("4567"), [])
@@ -1,7 +1,10 @@
+from unittest import mock
+
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from apps.contacts.models import Contact, Telephone
+from apps.contacts.serializers import NUMBER_RACE_MESSAGE, ContactSerializer
 
 User = get_user_model()
 
@@ -77,4 +80,25 @@ class CreateContactTests(APITestCase):
         self.client.post(self.create_url, data, format="json")
         response = self.client.post(self.create_url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("telephones", response.data["message"]) 
\ No newline at end of file
+        self.assertIn("telephones", response.data["message"])
+
+    def test_create_contact_query_count(self):
+        """Test creating a contact costs the same queries however many numbers it has"""
+        self.client.post(self.create_url, {"name": "First", "telephones": [{"number": "+100000000"}]}, format="json")
+        for count, name in ((1, "One"), (10, "Ten")):
+            telephones = [{"number": f"+2{count:02d}{n:06d}"} for n in range(count)]
+            with self.assertNumQueries(8):
+                response = self.client.post(self.create_url, {"name": name, "telephones": telephones}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data["contact"]["telephones"], telephones)
+
+    def test_create_contact_number_race(self):
+        """Test a number taken by a concurrent request is a 400, not a 500"""
+        data = {"name": "Race", "telephones": [{"number": "+123456789"}]}
+        self.client.post(self.create_url, data, format="json")
+        # The second request passes validation as if the first one had not committed yet
+        with mock.patch.object(ContactSerializer, "validate_telephones", lambda serializer, value: value):
+            response = self.client.post(self.create_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], f"telephones, {NUMBER_RACE_MESSAGE}".lower())
+        self.assertEqual(Contact.objects.filter(name="Race").count(), 1)
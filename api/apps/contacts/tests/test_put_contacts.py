@@ -1,7 +1,13 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from apps.contacts.models import Contact, Telephone
+from apps.contacts.models import Contact, Telephone, Tombstone
+from apps.contacts.serializers import NUMBER_RACE_MESSAGE, ContactSerializer
 
 User = get_user_model()
 
@@ -51,4 +57,69 @@ class UpdateContactTests(APITestCase):
         invalid_contact_url = "/api/contacts/9999/"  
         data = {"name": "Non-existent Contact"}
         response = self.client.put(invalid_contact_url, data, format="json")
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND) 
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_contact_query_count(self):
+        """Test updating a contact costs the same queries however many numbers it adds"""
+        self.client.put(self.contact_url, {"name": "First"}, format="json")
+        for count in (1, 10):
+            telephones = [{"number": f"+3{count:02d}{n:06d}"} for n in range(count)]
+            with self.assertNumQueries(10):
+                response = self.client.put(self.contact_url, {"name": f"Name {count}", "telephones": telephones}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["contact"]["telephones"][-count:], telephones)
+
+    def test_update_contact_number_race(self):
+        """Test a number taken by a concurrent request is a 400, not a 500"""
+        another_contact = Contact.objects.create(user=self.user, name="Jane Doe")
+        Telephone.objects.create(user=self.user, contact=another_contact, number="+555555555")
+
+        with mock.patch.object(ContactSerializer, "validate_telephones", lambda serializer, value: value):
+            response = self.client.put(self.contact_url, {"name": "Raced", "telephones": [{"number": "+555555555"}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], f"telephones, {NUMBER_RACE_MESSAGE}".lower())
+        self.contact.refresh_from_db()
+        self.assertEqual(self.contact.name, "John Doe")
+
+    def test_update_contact_keeps_unsubmitted_phones(self):
+        """Test a plain update only adds numbers"""
+        response = self.client.put(self.contact_url, {"telephones": [{"number": "+987654321"}]}, format="json")
+        self.assertEqual(response.data["contact"]["telephones"], [{"number": "+123456789"}, {"number": "+987654321"}])
+
+    def test_replace_contact_phones(self):
+        """Test replace mode deletes left out numbers, adds new ones and keeps the rest untouched"""
+        Telephone.objects.create(user=self.user, contact=self.contact, number="+222222222")
+        data = {"telephones": [{"number": "+123456789"}, {"number": "+333333333"}]}
+        response = self.client.put(f"{self.contact_url}?replace=true", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["contact"]["telephones"], data["telephones"])
+
+        numbers = dict(Telephone.objects.filter(contact=self.contact).values_list("number", "id"))
+        self.assertEqual(set(numbers), {"+123456789", "+333333333"})
+        self.assertEqual(numbers["+123456789"], self.phone.id)
+        self.assertEqual(
+            list(Tombstone.objects.filter(user=self.user).values_list("kind", "number")),
+            [(Tombstone.TELEPHONE, "+222222222")],
+        )
+        self.assertEqual(self.client.get("/api/contacts/search?q=222222").data["results"], [])
+
+    def test_replace_single_number_writes_one_row(self):
+        """Test changing one number in replace mode deletes and inserts a single telephone row"""
+        for number in ("+222222222", "+333333333"):
+            Telephone.objects.create(user=self.user, contact=self.contact, number=number)
+        data = {"telephones": [{"number": "+123456789"}, {"number": "+222222222"}, {"number": "+444444444"}]}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.put(f"{self.contact_url}?replace=true", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        telephone_writes = [
+            query["sql"].split(" ", 1)[0] for query in context.captured_queries
+            if query["sql"].startswith(("INSERT INTO \"contacts_telephone\"", "DELETE FROM \"contacts_telephone\"", "UPDATE \"contacts_telephone\""))
+        ]
+        self.assertEqual(telephone_writes, ["DELETE", "INSERT"])
+        self.assertFalse(Telephone.objects.filter(contact=self.contact, number="+333333333").exists())
+
+    def test_replace_without_phones_keeps_numbers(self):
+        """Test replace mode leaves the numbers alone when no telephones are submitted"""
+        response = self.client.put(f"{self.contact_url}?replace=true", {"name": "Renamed"}, format="json")
+        self.assertEqual(response.data["contact"]["telephones"], [{"number": "+123456789"}])
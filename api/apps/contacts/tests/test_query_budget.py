@@ -0,0 +1,60 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts.models import Contact, Telephone
+from core.utils.query_budget import QueryBudgetExceeded, QueryBudgetMixin, query_budget
+
+User = get_user_model()
+
+class ContactQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """Test cases guarding the contacts endpoints against N+1 queries"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        contacts = Contact.objects.bulk_create(
+            Contact(user=self.user, name=f"John {i}") for i in range(60)
+        )
+        Telephone.objects.bulk_create(
+            Telephone(user=self.user, contact=contact, number=f"+44{contact.id:07d}{suffix}")
+            for contact in contacts for suffix in (1, 2)
+        )
+
+        self.contacts_url = "/api/contacts"
+
+    def test_list_query_count_is_constant(self):
+        """Test listing runs version, count, page and telephone prefetch queries only"""
+        count = self.assertQueryCountConstant(
+            lambda size: self.client.get(f"{self.contacts_url}?page_size={size}"), sizes=(5, 50)
+        )
+        self.assertEqual(count, 4)
+
+    def test_cursor_list_query_count_is_constant(self):
+        """Test cursor pagination skips the count query"""
+        count = self.assertQueryCountConstant(
+            lambda size: self.client.get(f"{self.contacts_url}?pagination=cursor&page_size={size}"), sizes=(5, 50)
+        )
+        self.assertEqual(count, 3)
+
+    def test_search_query_count_is_constant(self):
+        """Test search results prefetch telephones"""
+        self.assertQueryCountConstant(
+            lambda size: self.client.get(f"{self.contacts_url}/search?q=John&page_size={size}"), sizes=(5, 50)
+        )
+
+    def test_list_returns_telephones_within_budget(self):
+        """Test a full page of contacts is served within the query budget"""
+        with query_budget(4):
+            response = self.client.get(f"{self.contacts_url}?page_size=50")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertEqual(len(response.data["results"][0]["telephones"]), 2)
+
+    def test_query_budget_fails_when_exceeded(self):
+        """Test the budget helper reports the offending queries"""
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                list(Contact.objects.all())
+                list(Telephone.objects.all())
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from apps.contacts import plans, seeding
+from apps.contacts.models import Contact, Telephone
+from core.utils.query_plans import (
+    FULL_INDEX_SCAN, FULL_SCAN, PARTITION_SCAN, TEMP_BTREE, QueryPlan, capture_plans, plan_issues,
+)
+
+User = get_user_model()
+
+
+class QueryPlanTests(APITestCase):
+    """Test cases for the query plan advisor"""
+
+    def test_plan_issues(self):
+        """Test full scans, partition scans and temp B-trees are flagged, index searches are not"""
+        steps = [
+            (2, 0, "SCAN contacts_contact"),
+            (3, 0, "SCAN contacts_contact USING INDEX contact_user_sync_idx"),
+            (4, 0, "SEARCH contacts_telephone USING INDEX contacts_telephone_user_id (user_id=?)"),
+            (5, 0, "SEARCH contacts_telephone USING INDEX telephone_user_contact_idx (user_id=? AND contact_id=?)"),
+            (6, 0, "SEARCH contacts_contactsversion USING INDEX sqlite_autoindex_contacts_contactsversion_1 (user_id=?)"),
+            (7, 0, "SCAN contacts_contact_fts VIRTUAL TABLE INDEX 0:M4"),
+            (8, 0, "SCAN 3 CONSTANT ROWS"),
+            (9, 0, "USE TEMP B-TREE FOR ORDER BY"),
+        ]
+        issues = plan_issues(steps, {"contacts_telephone": "user_id"})
+        self.assertEqual(
+            [(issue.kind, issue.table) for issue in issues],
+            [(FULL_SCAN, "contacts_contact"), (FULL_INDEX_SCAN, "contacts_contact"),
+             (PARTITION_SCAN, "contacts_telephone"), (TEMP_BTREE, "")],
+        )
+
+    def test_limited_statements_are_not_partition_scans(self):
+        """Test a statement with a LIMIT reading the user's rows in index order is not flagged"""
+        steps = [(2, 0, "SEARCH contacts_contact USING INDEX contact_user_created_idx (user_id=?)")]
+        partitions = {"contacts_contact": "user_id"}
+        self.assertEqual(QueryPlan("SELECT id FROM contacts_contact LIMIT 5", (), steps, partitions).issues, [])
+        self.assertEqual(len(QueryPlan("SELECT id FROM contacts_contact", (), steps, partitions).issues), 1)
+
+    def test_telephones_of_a_page_use_the_user_contact_index(self):
+        """Test the telephone prefetch reads the page's contacts only, not all of the user's telephones"""
+        user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        contact = Contact.objects.create(user=user, name="John Doe")
+        Telephone.objects.create(user=user, contact=contact, number="+44 7946 0958")
+        self.client.force_authenticate(user=user)
+
+        with capture_plans(partitions=plans.PARTITIONS) as captured:
+            self.client.get("/api/contacts")
+
+        prefetch = next(plan for plan in captured if '"contacts_telephone"."contact_id" IN' in plan.sql)
+        self.assertIn("telephone_user_contact_idx (user_id=? AND contact_id=?)", prefetch.tree())
+        self.assertNotIn("TEMP B-TREE", prefetch.tree())
+
+    def test_endpoints_have_no_unexpected_issues(self):
+        """Test no contacts endpoint runs a full scan, partition scan or sort an index should avoid"""
+        users, _ = seeding.seed(3, 300, seed=3)
+        user = max(users, key=lambda user: Telephone.objects.for_user(user).count())
+
+        for endpoint, endpoint_plans in plans.explain_endpoints(user).items():
+            for plan in endpoint_plans:
+                self.assertEqual(plans.unexpected_issues(plan), [], f"{endpoint}: {plan.sql}\n{plan.tree()}")
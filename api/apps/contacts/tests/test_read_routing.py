@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from apps.contacts import search
+from apps.contacts.models import Contact
+from core.utils.routing import ReadReplicaMiddleware
+from core.utils.sqlite import production_database, replica_database
+
+class ReadRoutingTests(SimpleTestCase):
+    """Test cases for routing reads of GET requests to the read-only alias"""
+
+    def route(self, method, before_read=None):
+        """Alias a read of `Contact` would use during a `method` request"""
+        def view(request):
+            if before_read:
+                before_read()
+            return router.db_for_read(Contact)
+
+        return ReadReplicaMiddleware(view)(getattr(RequestFactory(), method.lower())("/api/contacts"))
+
+    @override_settings(DATABASE_READ_ALIAS="replica")
+    def test_get_reads_from_replica(self):
+        """Test GET and HEAD reads use the read alias and other methods the primary"""
+        self.assertEqual(self.route("GET"), "replica")
+        self.assertEqual(self.route("HEAD"), "replica")
+        self.assertEqual(self.route("POST"), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.route("PUT"), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_READ_ALIAS="replica")
+    def test_search_reads_from_replica(self):
+        """Test the ranked full-text search of a GET request runs its raw query on the read alias"""
+        with mock.patch.object(search, "connections") as connections_:
+            self.route("GET", lambda: search.ranked_contact_ids(get_user_model()(pk=1), "john").count())
+            connections_.__getitem__.assert_called_once_with("replica")
+
+            connections_.reset_mock()
+            self.route("POST", lambda: search.ranked_contact_ids(get_user_model()(pk=1), "john").count())
+            connections_.__getitem__.assert_called_once_with(DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_READ_ALIAS="replica")
+    def test_number_search_reads_from_replica(self):
+        """Test the telephone lookup of a number search is left to the routers for unsharded users"""
+        user = get_user_model()(pk=1)
+        self.assertEqual(self.route("GET", lambda: search.matching_telephones(user, "0958").db), "replica")
+        self.assertEqual(self.route("POST", lambda: search.matching_telephones(user, "0958").db), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_READ_ALIAS="replica")
+    def test_reads_after_a_write_stick_to_primary(self):
+        """Test a request reads its own writes"""
+        self.assertEqual(router.db_for_write(Contact), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.route("GET", lambda: router.db_for_write(Contact)), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.route("GET"), "replica")
+
+    @override_settings(DATABASE_READ_ALIAS="replica")
+    def test_reads_in_transactions_stay_on_primary(self):
+        """Test reads inside a transaction see its snapshot"""
+        with mock.patch.object(connections[DEFAULT_DB_ALIAS], "in_atomic_block", True):
+            self.assertEqual(self.route("GET"), DEFAULT_DB_ALIAS)
+
+    def test_without_read_alias(self):
+        """Test nothing is rerouted unless a read alias is configured"""
+        self.assertEqual(self.route("GET"), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_read(Contact), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_READ_ALIAS="replica")
+    def test_replica_is_not_migrated(self):
+        """Test migrations only run on the primary"""
+        self.assertFalse(router.allow_migrate("replica", "contacts"))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, "contacts"))
+
+    def test_replica_connection_is_read_only(self):
+        """Test the replica alias reads the primary's file and refuses writes"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "db.sqlite3")
+        with sqlite3.connect(path) as db:
+            db.execute("CREATE TABLE counter (n INTEGER)")
+            db.execute("INSERT INTO counter VALUES (1)")
+
+        # What the SQLite backend does when it opens each alias
+        primary, replica = production_database(path), replica_database(path)
+        with sqlite3.connect(primary["NAME"]) as db:
+            db.executescript(primary["OPTIONS"]["init_command"])
+        db = sqlite3.connect(replica["NAME"], uri=replica["OPTIONS"]["uri"])
+        self.addCleanup(db.close)
+        db.executescript(replica["OPTIONS"]["init_command"])
+
+        self.assertEqual(db.execute("SELECT n FROM counter").fetchall(), [(1,)])
+        with self.assertRaises(sqlite3.OperationalError):
+            db.execute("INSERT INTO counter VALUES (2)")
@@ -0,0 +1,103 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts.models import Contact, Telephone
+from apps.contacts.representations import contact_rows, represent_contacts
+from apps.contacts.serializers import ContactSerializer
+from core.utils.renderers import ORJSONRenderer
+
+User = get_user_model()
+
+class ContactRepresentationTests(APITestCase):
+    """Test cases for the serializer-free read path"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        full = Contact.objects.create(
+            user=self.user, name="John Doe", address_line_1="123 Street", address_line_2="Flat 4",
+            city="New York", country="USA", postcode="10001",
+        )
+        Telephone.objects.create(user=self.user, contact=full, number="+123456789")
+        Telephone.objects.create(user=self.user, contact=full, number="+987654321")
+        sparse = Contact.objects.create(user=self.user, name="Zoë «Ünïcode»\u2028Doe")
+        Telephone.objects.create(user=self.user, contact=sparse, number="(020) 7946 0009")
+        Contact.objects.create(user=self.user, name="No Numbers", city="")
+
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        other = Contact.objects.create(user=other_user, name="Other Doe")
+        Telephone.objects.create(user=other_user, contact=other, number="+555555555")
+
+        self.contacts = Contact.objects.for_user(self.user).order_by("-created_at", "-id")
+
+    def serialized(self, contacts):
+        return ContactSerializer(contacts.with_telephones(), many=True).data
+
+    def test_matches_serializer(self):
+        """Test the representation matches ContactSerializer field for field"""
+        self.assertEqual(represent_contacts(contact_rows(self.contacts)), self.serialized(self.contacts))
+
+    def test_empty_page(self):
+        """Test an empty page needs no telephone query"""
+        with self.assertNumQueries(0):
+            self.assertEqual(represent_contacts(contact_rows(self.contacts.none())), [])
+
+    def test_list_response_matches_serializer(self):
+        """Test the list endpoint renders the same JSON as the serializer would"""
+        response = self.client.get("/api/contacts?page_size=50")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], list(self.serialized(self.contacts)))
+        self.assertEqual(
+            ORJSONRenderer().render(response.data["results"]),
+            JSONRenderer().render(self.serialized(self.contacts)),
+        )
+
+    def test_cursor_list_matches_serializer(self):
+        """Test cursor pages render the same contacts and keep working across pages"""
+        first = self.client.get("/api/contacts?pagination=cursor&page_size=2").json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(first["results"] + second["results"], list(self.serialized(self.contacts)))
+
+    def test_search_matches_serializer(self):
+        """Test ranked and cursor search results match the serializer output"""
+        expected = list(self.serialized(self.contacts.filter(name__icontains="Doe")))
+        ranked = self.client.get("/api/contacts/search?q=Doe&page_size=50").json()["results"]
+        cursor = self.client.get("/api/contacts/search?q=Doe&pagination=cursor&page_size=50").json()["results"]
+
+        self.assertCountEqual(ranked, expected)
+        self.assertEqual(cursor, expected)
+
+    def test_renderer_matches_drf(self):
+        """Test the orjson renderer produces the bytes DRF's JSON renderer would"""
+        data = {
+            "message": gettext_lazy("Contact created successfully"),
+            "amount": Decimal("1.50"),
+            "when": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2025, 1, 2),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "numbers": ("+123", None, True, 1.5),
+            1: "non-string key",
+            "text": "Zoë\u2028«line»\u2029",
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_renderer_is_used_for_api_responses(self):
+        """Test API responses are rendered by the orjson renderer"""
+        response = self.client.get("/api/contacts")
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    def test_timestamps_are_rendered_like_drf(self):
+        """Test timezone-aware datetimes keep DRF's format"""
+        now = timezone.now()
+        self.assertEqual(ORJSONRenderer().render({"now": now}), JSONRenderer().render({"now": now}))
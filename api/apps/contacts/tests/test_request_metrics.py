@@ -0,0 +1,69 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.contacts.models import Contact, Telephone
+
+User = get_user_model()
+
+class RequestMetricsTests(APITestCase):
+    """Test cases for the Server-Timing header and the slow request log"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers["Authorization"])
+        contact = Contact.objects.create(user=self.user, name="John Doe")
+        Telephone.objects.create(user=self.user, contact=contact, number="+123456789")
+
+    def timings(self, response):
+        return {
+            entry.split(";")[0]: entry for entry in response["Server-Timing"].split(", ")
+        }
+
+    def test_server_timing_header(self):
+        """Test responses report the SQL, auth, serialization, render and total time"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/contacts/search?q=John")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {"db", "auth", "serialize", "render", "total"})
+        self.assertIn(f'desc="{len(context)} queries"', timings["db"])
+        for entry in timings.values():
+            self.assertRegex(entry, r";dur=\d+\.\d")
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0, REQUEST_METRICS_SLOW_QUERIES=2)
+    def test_slow_request_log(self):
+        """Test requests over the threshold are logged as JSON with their slowest statements"""
+        with self.assertLogs("request_metrics", "WARNING") as logs:
+            response = self.client.get("/api/contacts/search?q=John")
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["event"], "slow_request")
+        self.assertEqual(entry["view"], "apps.contacts.views.SearchContactsView")
+        self.assertEqual(entry["path"], "/api/contacts/search")
+        self.assertEqual(entry["status"], status.HTTP_200_OK)
+        self.assertEqual(str(entry["queries"]), re.search(r'desc="(\d+) queries"', response["Server-Timing"])[1])
+        self.assertEqual(len(entry["slowest_queries"]), 2)
+        self.assertGreaterEqual(entry["slowest_queries"][0]["ms"], entry["slowest_queries"][1]["ms"])
+        self.assertIn("auth_ms", entry)
+
+    def test_fast_requests_are_not_logged(self):
+        """Test nothing is logged without a threshold"""
+        with self.assertNoLogs("request_metrics"):
+            self.client.get("/api/contacts")
+
+    async def test_async_requests(self):
+        """Test requests served by the ASGI handler are measured too"""
+        response = await self.async_client.get("/api/contacts?page_size=10", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('desc="0 queries"', response["Server-Timing"])
+        self.assertIn("serialize", self.timings(response))
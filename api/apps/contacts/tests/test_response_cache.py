@@ -0,0 +1,125 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts.models import Contact, Telephone
+from apps.contacts.response_cache import cache_stats, reset_cache_stats
+
+User = get_user_model()
+
+class ResponseCacheTests(APITestCase):
+    """Test cases for the per-user cache of contact list and search responses"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        self.client.post("/api/contacts", {"name": "John Doe", "telephones": [{"number": "+123456789"}]}, format="json")
+        self.contact = Contact.objects.get(user=self.user)
+
+        self.list_url = "/api/contacts"
+        self.search_url = "/api/contacts/search?q=John"
+        reset_cache_stats()
+
+    def test_second_read_is_a_hit(self):
+        """Test a repeated list request is served from the cache without touching the contacts"""
+        first = self.client.get(self.list_url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.list_url)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_query_params_are_part_of_the_key(self):
+        """Test different pages and searches get their own entries"""
+        self.client.get(self.list_url)
+        self.assertEqual(self.client.get(f"{self.list_url}?page_size=1")["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(self.search_url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/contacts/search?q=Doe")["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/contacts/search?q=Doe")["X-Cache"], "HIT")
+
+    def test_writes_invalidate_the_cache(self):
+        """Test no stale page is served after create, update or delete"""
+        self.client.get(self.list_url)
+
+        self.client.post(self.list_url, {"name": "Jane Doe", "telephones": [{"number": "+555000111"}]}, format="json")
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 2)
+
+        self.client.put(f"/api/contacts/{self.contact.id}", {"name": "John Smith"}, format="json")
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn("John Smith", [contact["name"] for contact in response.data["results"]])
+
+        self.client.delete(f"/api/contacts/{self.contact.id}")
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 1)
+
+    def test_search_is_invalidated(self):
+        """Test cached search results follow writes"""
+        self.assertEqual(self.client.get(self.search_url).data["count"], 1)
+        self.client.put(f"/api/contacts/{self.contact.id}", {"name": "Jim Doe"}, format="json")
+        self.assertEqual(self.client.get(self.search_url).data["count"], 0)
+
+    def test_users_do_not_share_entries(self):
+        """Test a cached page of one user is never served to another"""
+        self.client.get(self.list_url)
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        self.client.force_authenticate(user=other_user)
+        self.client.post(self.list_url, {"name": "Other", "telephones": []}, format="json")
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual([contact["name"] for contact in response.data["results"]], ["Other"])
+
+    def test_errors_are_not_cached(self):
+        """Test only successful responses are stored"""
+        url = f"{self.list_url}?pagination=cursor&cursor=broken"
+        self.client.get(url)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(cache_stats(), {"hits": 0, "misses": 2})
+
+    def test_users_without_version_are_not_cached(self):
+        """Test users who never wrote through the API are read straight from the database"""
+        other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        other_contact = Contact.objects.create(user=other_user, name="Other")
+        Telephone.objects.create(user=other_user, contact=other_contact, number="+555000111")
+        self.client.force_authenticate(user=other_user)
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Cache", response)
+
+    @override_settings(CONTACTS_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        """Test a zero timeout turns the cache off"""
+        self.client.get(self.list_url)
+        self.assertNotIn("X-Cache", self.client.get(self.list_url))
+
+    @override_settings(
+        CACHES={"contacts": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+        CONTACTS_CACHE_ALIAS="contacts",
+    )
+    def test_other_backends(self):
+        """Test the cache alias can point at any backend"""
+        self.client.get(self.list_url)
+        self.assertEqual(self.client.get(self.list_url)["X-Cache"], "MISS")
+
+    def test_stats_command(self):
+        """Test the counters are reported and can be reset"""
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        stdout = StringIO()
+        call_command("contacts_cache_stats", reset=True, stdout=stdout)
+
+        self.assertIn("hits: 1", stdout.getvalue())
+        self.assertIn("hit ratio: 50.0%", stdout.getvalue())
+        self.assertEqual(cache_stats(), {"hits": 0, "misses": 0})
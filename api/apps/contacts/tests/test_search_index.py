@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from apps.contacts.models import Contact, Telephone
+from apps.contacts.search import FTS_TABLE, install_search_index
+
+User = get_user_model()
+
+class SearchIndexTests(APITestCase):
+    """Test cases for the full-text contact search index"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.client.force_authenticate(user=self.user)
+
+        self.contact1 = Contact.objects.create(user=self.user, name="Baker Street", address_line_1="1 Main Road")
+        self.contact2 = Contact.objects.create(user=self.user, name="Jane Doe", address_line_1="221B Baker Street")
+        Telephone.objects.create(user=self.user, contact=self.contact1, number="+44 20 7946 0001")
+
+        self.other_user = User.objects.create_user(email="other@example.com", password="Test@1234")
+        Contact.objects.create(user=self.other_user, name="Baker Other")
+
+        self.search_url = "/api/contacts/search"
+
+    def search(self, query, **params):
+        response = self.client.get(self.search_url, {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [contact["name"] for contact in response.data["results"]]
+
+    def test_name_matches_rank_above_address_matches(self):
+        """Test contacts matching on name are returned before address matches"""
+        self.assertEqual(self.search("baker"), ["Baker Street", "Jane Doe"])
+
+    def test_search_is_scoped_to_user(self):
+        """Test another user's contacts never show up in results"""
+        self.assertNotIn("Baker Other", self.search("Baker"))
+
+    def test_search_by_telephone_fragment(self):
+        """Test a number fragment finds its contact"""
+        self.assertEqual(self.search("7946"), ["Baker Street"])
+
+    def test_index_follows_telephone_changes(self):
+        """Test adding and removing telephones keeps the index in sync"""
+        phone = Telephone.objects.create(user=self.user, contact=self.contact2, number="+1 555 0199")
+        self.assertEqual(self.search("555 01"), ["Jane Doe"])
+
+        phone.delete()
+        self.assertEqual(self.search("555 01"), [])
+
+    def test_index_follows_contact_changes(self):
+        """Test renaming and deleting contacts keeps the index in sync"""
+        self.contact2.name = "Jane Smithson"
+        self.contact2.save()
+        self.assertEqual(self.search("smithson"), ["Jane Smithson"])
+
+        self.contact2.delete()
+        self.assertEqual(self.search("smithson"), [])
+
+    def test_owner_column_is_not_searched(self):
+        """Test a query spelling the owner token of the user matches none of their contacts"""
+        self.assertEqual(self.search(f"u{self.user.pk}u"), [])
+
+    def test_search_with_query_syntax_characters(self):
+        """Test FTS operators in the query are searched for literally"""
+        self.assertEqual(self.search('"Baker OR'), [])
+
+    def test_cursor_pagination_uses_index(self):
+        """Test cursor mode returns the index matches newest first"""
+        self.assertEqual(self.search("Baker", pagination="cursor"), ["Jane Doe", "Baker Street"])
+
+    def test_missing_triggers_are_repaired(self):
+        """Test reinstalling the index restores dropped triggers and catches up on writes"""
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER contacts_contact_fts_ai")
+        Contact.objects.create(user=self.user, name="Unindexed Contact")
+
+        self.assertTrue(install_search_index())
+        self.assertEqual(self.search("Unindexed"), ["Unindexed Contact"])
+
+    def test_outdated_index_layout_is_rebuilt(self):
+        """Test an index created with other columns is replaced along with its triggers"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {FTS_TABLE}")
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(user_id UNINDEXED, name, address, numbers, tokenize = 'trigram')"
+            )
+
+        self.assertTrue(install_search_index())
+        self.assertEqual(self.search("Baker"), ["Baker Street", "Jane Doe"])
+        self.assertFalse(install_search_index())
+
+    def test_rebuild_command(self):
+        """Test the management command re-fills the index"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 3 contacts and 1 telephones.", out.getvalue())
+        self.assertEqual(self.search("Baker"), ["Baker Street", "Jane Doe"])
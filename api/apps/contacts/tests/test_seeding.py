@@ -0,0 +1,75 @@
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.contacts import seeding
+from apps.contacts.models import Contact, ContactsVersion, Telephone, TelephoneNgram
+from apps.contacts.search import TRIGGERS, number_ngrams
+
+User = get_user_model()
+
+
+class SeedingTests(APITestCase):
+    """Test cases for the synthetic data seeding"""
+
+    def test_contact_counts(self):
+        """Test contacts are split exactly, unevenly unless asked otherwise"""
+        counts = seeding.contact_counts(50, 1003, random.Random(0))
+        self.assertEqual(sum(counts), 1003)
+        self.assertGreater(max(counts), 3 * min(counts))
+        self.assertEqual(set(seeding.contact_counts(4, 12, random.Random(0), "even")), {3})
+
+    def test_rows_are_deterministic(self):
+        """Test the same seed generates the same rows"""
+        members = [(User(pk=1), 20), (User(pk=2), 5)]
+        rows = lambda: list(seeding.generate_rows(members, random.Random(7), "2026-01-01 00:00:00", 1, 1, 10))
+        self.assertEqual(rows(), rows())
+        self.assertEqual([len(contacts) for contacts, _ in rows()], [10, 10, 5])
+
+    def test_seed(self):
+        """Test users, contacts, telephones and their search indexes are written"""
+        progress = []
+        users, summary = seeding.seed(3, 120, seed=5, batch_size=50, progress=lambda *totals: progress.append(totals))
+
+        self.assertEqual(summary["contacts"], 120)
+        self.assertEqual(Contact.objects.count(), 120)
+        self.assertEqual(Telephone.objects.count(), summary["telephones"])
+        self.assertEqual(progress[-1], (120, summary["telephones"]))
+        self.assertTrue(users[0].check_password(seeding.DEFAULT_PASSWORD))
+        self.assertEqual(users[0].password, users[1].password)
+        self.assertEqual(set(ContactsVersion.objects.values_list("version", flat=True)), {1})
+        for user in users:
+            numbers = Telephone.objects.filter(user=user).values_list("number", flat=True)
+            self.assertEqual(len(numbers), len(set(numbers)))
+
+        telephone = Telephone.objects.filter(user=users[0]).first()
+        self.assertEqual(
+            set(TelephoneNgram.objects.filter(telephone=telephone).values_list("gram", flat=True)),
+            number_ngrams(telephone.number_digits),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            self.assertTrue(set(TRIGGERS).issubset(row[0] for row in cursor.fetchall()))
+
+        self.client.force_authenticate(user=users[0])
+        contact = telephone.contact
+        for query in (contact.name, telephone.number):
+            response = self.client.get("/api/contacts/search", {"q": query, "page_size": 50})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn(contact.id, [result["id"] for result in response.json()["results"]])
+
+    def test_command(self):
+        """Test the command reports progress and refuses to seed the same users twice"""
+        out = StringIO()
+        call_command("seed_contacts", users=2, contacts=10, seed=9, stdout=out)
+        self.assertIn("Created 2 users, 10 contacts", out.getvalue())
+        self.assertIn("10/10 contacts", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("seed_contacts", users=2, contacts=10, seed=9, stdout=StringIO())
@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, override_settings
+
+from apps.contacts import sharding
+from apps.contacts.models import Contact, Telephone
+from apps.contacts.sharding import ContactsShardRouter
+
+SHARDS = ["contacts_shard_0", "contacts_shard_1"]
+
+# Runs against real shard files, the test runner only creates databases for the aliases configured here
+WORKER = """
+import io, json, os, sys
+from unittest import mock
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings.development")
+import django
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+from apps.contacts import sharding
+from apps.contacts.models import Contact
+
+setup_test_environment()
+call_command("contacts_shards", "migrate", verbosity=0)
+User = get_user_model()
+users = [User.objects.create_user(email=f"user{n}@example.com", password="Test@1234") for n in range(8)]
+client = APIClient()
+for user in users:
+    client.force_authenticate(user=user)
+    for n in range(2):
+        response = client.post("/api/contacts", {"name": f"Jane {n}", "telephones": [{"number": f"+4420794600{n}"}]}, format="json")
+        assert response.status_code == 201, response.content
+    client.delete(f"/api/contacts/{response.json()['contact']['id']}")
+
+user = users[0]
+client.force_authenticate(user=user)
+token = client.get("/api/contacts/changes").json()["sync_token"]
+source = sharding.contacts_db(user)
+target = next(alias for alias in sharding.shard_aliases() if alias != source)
+before = client.get("/api/contacts").json()["results"]
+moved = sharding.move_user(user, target)
+user.refresh_from_db()
+
+deleted = users[1]
+deleted_id, deleted_shard = deleted.pk, sharding.contacts_db(deleted)
+deleted.delete()
+
+# A move interrupted once the copy is committed, before the user is pinned to it
+crashed = users[2]
+crash_target = next(alias for alias in sharding.shard_aliases() if alias != sharding.contacts_db(crashed))
+with mock.patch.object(User, "save", side_effect=RuntimeError("crash")):
+    try:
+        sharding.move_user(crashed, crash_target)
+    except RuntimeError:
+        pass
+crashed.refresh_from_db()
+stray = Contact.objects.using(crash_target).filter(user=crashed).count()
+cleanup = io.StringIO()
+call_command("contacts_shards", "cleanup", stdout=cleanup)
+
+print(json.dumps({
+    "placements": {u.pk: sharding.contacts_db(u) for u in User.objects.all()},
+    "source": source,
+    "target": target,
+    "moved": moved,
+    "shard": user.contacts_shard,
+    "before": before,
+    "after": client.get("/api/contacts").json()["results"],
+    "search": [c["name"] for c in client.get("/api/contacts/search?q=Jane").json()["results"]],
+    "changes": client.get(f"/api/contacts/changes?since={token}").status_code,
+    "deleted": [deleted_id, deleted_shard],
+    "crashed": [crashed.pk, crashed.contacts_shard, sharding.contacts_db(crashed), crash_target],
+    "stray": stray,
+    "cleanup": cleanup.getvalue(),
+    "left": Contact.objects.using(crash_target).filter(user=crashed).count(),
+    "kept": Contact.objects.using(sharding.contacts_db(crashed)).filter(user=crashed).count(),
+}))
+"""
+
+
+class ShardPlacementTests(SimpleTestCase):
+    """Test cases for placing users' contacts on shards"""
+
+    def test_unsharded_uses_default(self):
+        """Test without shards every user's contacts stay in the default database"""
+        user = get_user_model()(pk=7)
+        self.assertEqual(sharding.contacts_db(user), DEFAULT_DB_ALIAS)
+        self.assertIsNone(sharding.user_using(user))
+        self.assertEqual(sharding.contacts_databases(), [DEFAULT_DB_ALIAS])
+
+    @override_settings(CONTACTS_SHARDS=SHARDS)
+    def test_hash_spreads_users(self):
+        """Test users are spread over the shards by a stable hash of their id"""
+        placements = [sharding.hashed_shard(user_id) for user_id in range(1, 101)]
+        self.assertEqual(set(placements), set(SHARDS))
+        self.assertEqual(placements, [sharding.hashed_shard(user_id) for user_id in range(1, 101)])
+
+    @override_settings(CONTACTS_SHARDS=SHARDS)
+    def test_pinned_user(self):
+        """Test a pinned user stays on the pinned database whatever the hash says"""
+        user = get_user_model()(pk=7, contacts_shard=DEFAULT_DB_ALIAS)
+        self.assertEqual(sharding.contacts_db(user), DEFAULT_DB_ALIAS)
+        user.contacts_shard = "contacts_shard_1"
+        self.assertEqual(Contact.objects.for_user(user).db, "contacts_shard_1")
+
+    @override_settings(CONTACTS_SHARDS=SHARDS)
+    def test_router(self):
+        """Test the router follows the user, the loading database and keeps users in the default database"""
+        router = ContactsShardRouter()
+        user = get_user_model()(pk=7, contacts_shard="contacts_shard_1")
+        contact = Contact(user=user)
+        self.assertEqual(router.db_for_write(Contact, instance=contact), "contacts_shard_1")
+        self.assertEqual(router.db_for_read(Telephone, instance=user), "contacts_shard_1")
+        contact._state.db = "contacts_shard_0"
+        self.assertEqual(router.db_for_read(Telephone, instance=contact), "contacts_shard_0")
+        self.assertEqual(router.db_for_read(get_user_model(), instance=contact), DEFAULT_DB_ALIAS)
+        self.assertTrue(router.allow_relation(contact, user))
+        self.assertTrue(router.allow_migrate("contacts_shard_0", "contacts"))
+        self.assertFalse(router.allow_migrate("contacts_shard_0", "user_auth"))
+        self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, "user_auth"))
+
+
+class ShardedDatabaseTests(SimpleTestCase):
+    """Test cases for the API and moves against real shard databases"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        environment = {
+            **os.environ,
+            "DJANGO_SECRET_KEY": "x",
+            "DJANGO_ENVIRONMENT": "development",
+            "CONTACTS_SHARD_COUNT": "2",
+            "DATABASE_NAME": os.path.join(directory.name, "db.sqlite3"),
+        }
+        cls.process = subprocess.run(
+            [sys.executable, "-c", WORKER], cwd=settings.BASE_DIR, env=environment,
+            capture_output=True, text=True, timeout=120,
+        )
+        cls.directory = directory.name
+
+    def run_worker(self):
+        """Result of the worker and the directory of its databases"""
+        self.assertEqual(self.process.returncode, 0, self.process.stderr)
+        return json.loads(self.process.stdout.splitlines()[-1]), self.directory
+
+    def test_contacts_live_on_shards(self):
+        """Test contacts are written to their user's shard and keep their ids when moved"""
+        result, directory = self.run_worker()
+
+        self.assertEqual(set(result["placements"].values()), set(SHARDS))
+        for alias in SHARDS:
+            with sqlite3.connect(os.path.join(directory, f"{alias}.sqlite3")) as db:
+                owners = {row[0] for row in db.execute("SELECT DISTINCT user_id FROM contacts_contact")}
+                self.assertFalse(db.execute("SELECT 1 FROM sqlite_master WHERE name = 'user_auth_user'").fetchone())
+            self.assertEqual(owners, {int(pk) for pk, placement in result["placements"].items() if placement == alias})
+        with sqlite3.connect(os.path.join(directory, "db.sqlite3")) as db:
+            self.assertEqual(db.execute("SELECT count(*) FROM contacts_contact").fetchone(), (0,))
+
+        self.assertEqual(result["moved"], 1)
+        self.assertEqual(result["shard"], result["target"])
+        self.assertEqual(result["after"], result["before"])
+        self.assertGreater(result["before"][0]["id"], sharding.ID_RANGE)
+        self.assertEqual(result["search"], ["Jane 0"])
+        self.assertEqual(result["changes"], 200)
+
+    def test_deleted_and_interrupted_users_leave_no_rows(self):
+        """Test a deleted user's contacts leave their shard and an interrupted move is cleaned up"""
+        result, directory = self.run_worker()
+        deleted_id, deleted_shard = result["deleted"]
+        with sqlite3.connect(os.path.join(directory, f"{deleted_shard}.sqlite3")) as db:
+            for table in sharding.ID_TABLES:
+                self.assertEqual(db.execute(f"SELECT count(*) FROM {table} WHERE user_id = ?", [deleted_id]).fetchone(), (0,))
+
+        crashed_id, shard, placement, target = result["crashed"]
+        self.assertNotEqual(placement, target)
+        self.assertEqual(result["stray"], 1)
+        self.assertIn(f"{target}: 1 users with stray rows ({crashed_id})", result["cleanup"])
+        self.assertEqual(result["left"], 0)
+        self.assertEqual(result["kept"], 1)
@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from core.utils.sqlite import production_database
+
+WORKER = """
+import sys, time
+import django
+from django.conf import settings
+from core.utils.sqlite import production_database
+
+path, profile, start_at, rounds = sys.argv[1], sys.argv[2], float(sys.argv[3]), int(sys.argv[4])
+database = production_database(path) if profile == "production" else {"ENGINE": "django.db.backends.sqlite3", "NAME": path}
+settings.configure(DATABASES={"default": database}, USE_TZ=True)
+django.setup()
+
+from django.db import OperationalError, connection, transaction
+
+time.sleep(max(0, start_at - time.time()))
+errors = 0
+for _ in range(rounds):
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COALESCE(MAX(n), 0) FROM counter")
+                (n,) = cursor.fetchone()
+                cursor.execute("INSERT INTO counter (n) VALUES (%s)", [n + 1])
+    except OperationalError:
+        errors += 1
+print(errors)
+"""
+
+class SQLiteProfileTests(SimpleTestCase):
+    """Test cases for the production SQLite profile under concurrent writers"""
+
+    workers = 6
+    rounds = 40
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "concurrency.sqlite3")
+        with sqlite3.connect(self.path) as db:
+            db.execute("CREATE TABLE counter (id INTEGER PRIMARY KEY, n INTEGER NOT NULL)")
+
+    def hammer(self, profile):
+        """Run read-then-write transactions from several processes at once, return the lock errors"""
+        start_at = str(time.time() + 2)
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", WORKER, self.path, profile, start_at, str(self.rounds)],
+                cwd=settings.BASE_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for _ in range(self.workers)
+        ]
+        errors = 0
+        for process in processes:
+            stdout, stderr = process.communicate(timeout=120)
+            self.assertEqual(process.returncode, 0, stderr)
+            errors += int(stdout)
+        return errors
+
+    def test_profile_settings(self):
+        """Test the profile turns on WAL, immediate transactions and persistent connections"""
+        database = production_database(self.path)
+        self.assertEqual(database["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertIn("PRAGMA journal_mode=WAL", database["OPTIONS"]["init_command"])
+        self.assertIn("PRAGMA synchronous=NORMAL", database["OPTIONS"]["init_command"])
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertGreater(database["CONN_MAX_AGE"], 0)
+
+    def test_stock_settings_hit_locks(self):
+        """Test the same load fails with "database is locked" on Django's default SQLite settings"""
+        self.assertGreater(self.hammer("stock"), 0)
+
+    def test_concurrent_writers_do_not_hit_locks(self):
+        """Test concurrent writer processes neither fail nor lose writes"""
+        self.assertEqual(self.hammer("production"), 0)
+
+        with sqlite3.connect(self.path) as db:
+            self.assertEqual(db.execute("PRAGMA journal_mode").fetchone(), ("wal",))
+            values = [n for (n,) in db.execute("SELECT n FROM counter ORDER BY n")]
+        self.assertEqual(values, list(range(1, self.workers * self.rounds + 1)))
@@ -1,8 +1,12 @@
 from django.urls import path
-from .views import ContactListView, SearchContactsView,ContactDetailView
+from .views import ContactListView, SearchContactsView,ContactDetailView,ContactBulkView,ContactExportView,ContactImportView,ContactChangesView
 
 urlpatterns = [
     path("", ContactListView.as_view(), name="contacts"),
     path("/<int:contact_id>", ContactDetailView.as_view(), name="contacts"),
-    path("/search", SearchContactsView.as_view(), name="search-contacts")
+    path("/search", SearchContactsView.as_view(), name="search-contacts"),
+    path("/bulk", ContactBulkView.as_view(), name="bulk-contacts"),
+    path("/export/<str:export_format>", ContactExportView.as_view(), name="export-contacts"),
+    path("/import", ContactImportView.as_view(), name="import-contacts"),
+    path("/changes", ContactChangesView.as_view(), name="contact-changes"),
 ]
@@ -0,0 +1,119 @@
+"""
+Per-user change versions for conditional requests and delta sync.
+
+Every write to a user's contacts starts by bumping `ContactsVersion.version`
+inside its transaction and stamps the contacts it touches (and the
+tombstones of what it deletes) with the new version. Bumping first takes the
+write lock (or the version row's lock) before any data changes, so versions
+are handed out in commit order: a reader can never see new data under an old
+version, and a client that has seen version `n` only needs rows stamped
+after `n`. List and search responses are tagged with the version, which lets
+`If-None-Match` and `If-Modified-Since` be answered with one primary key
+lookup and no serialization. Single contacts use their own `updated_at`.
+"""
+from functools import wraps
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Contact, ContactsVersion
+from .sharding import contacts_db
+
+
+def bump_version(user):
+    """Record a change to the contacts of `user` and return the new version, call it before writing"""
+    now = timezone.now()
+    using = contacts_db(user)
+    versions = ContactsVersion.objects.using(using).filter(user=user)
+    if not versions.update(version=F("version") + 1, updated_at=now):
+        try:
+            with transaction.atomic(using=using):
+                ContactsVersion.objects.using(using).create(user=user, version=1, updated_at=now)
+            return 1
+        except IntegrityError:
+            # Another request created the row first
+            versions.update(version=F("version") + 1, updated_at=now)
+    return versions.values_list("version", flat=True).get()
+
+
+def current_version(request):
+    """`(version, last change)` of the requesting user's contacts, looked up once per request"""
+    if not hasattr(request, "_contacts_version"):
+        row = ContactsVersion.objects.for_user(request.user).values_list("version", "updated_at").first()
+        request._contacts_version = row or (0, None)
+    return request._contacts_version
+
+
+async def acurrent_version(request, *args, **kwargs):
+    """`current_version` for async views, later `current_version` calls reuse the lookup"""
+    if not hasattr(request, "_contacts_version"):
+        row = await ContactsVersion.objects.for_user(request.user).values_list("version", "updated_at").afirst()
+        request._contacts_version = row or (0, None)
+    return request._contacts_version
+
+
+def preloads(loader):
+    """
+    Run the async `loader(request, *args, **kwargs)` before an async view method.
+
+    Django's `condition` calls the ETag and Last-Modified functions
+    synchronously, which can't query the database from an async view, so the
+    lookups they rely on are made here first and stored on the request.
+    """
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(view, request, *args, **kwargs):
+            await loader(request, *args, **kwargs)
+            return await method(view, request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def contacts_etag(request, *args, **kwargs):
+    """ETag of any list or search response, it changes with the user's version"""
+    return f"{request.user.pk}-{current_version(request)[0]}"
+
+
+def contacts_last_modified(request, *args, **kwargs):
+    return current_version(request)[1]
+
+
+def _has_query(request):
+    # Requests without a search query are rejected by the view and must not be answered with a 304
+    return bool(request.query_params.get("q", "").strip())
+
+
+def search_etag(request, *args, **kwargs):
+    return contacts_etag(request) if _has_query(request) else None
+
+
+def search_last_modified(request, *args, **kwargs):
+    return contacts_last_modified(request) if _has_query(request) else None
+
+
+def _contact_updated_at(request, contact_id):
+    if not hasattr(request, "_contact_updated_at"):
+        contact = Contact.objects.for_user(request.user).filter(id=contact_id)
+        request._contact_updated_at = contact.values_list("updated_at", flat=True).first()
+    return request._contact_updated_at
+
+
+async def acontact_updated_at(request, contact_id, *args, **kwargs):
+    """`_contact_updated_at` for async views"""
+    if not hasattr(request, "_contact_updated_at"):
+        contact = Contact.objects.for_user(request.user).filter(id=contact_id)
+        request._contact_updated_at = await contact.values_list("updated_at", flat=True).afirst()
+    return request._contact_updated_at
+
+
+def contact_etag(request, contact_id, *args, **kwargs):
+    """ETag of a single contact, None when it does not exist so the view answers with a 404"""
+    updated_at = _contact_updated_at(request, contact_id)
+    if updated_at is None:
+        return None
+    return f"{request.user.pk}-{contact_id}-{int(updated_at.timestamp() * 1_000_000)}"
+
+
+def contact_last_modified(request, contact_id, *args, **kwargs):
+    return _contact_updated_at(request, contact_id)
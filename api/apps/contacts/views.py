@@ -1,30 +1,82 @@
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from .models import Contact
+from . import bulk
+from . import exporters
+from . import importers
+from . import representations
+from . import response_cache
+from . import search as search_index
+from . import sync
+from . import versioning
+from .pagination import ContactCursorPagination, get_contact_paginator
 from .serializers import ContactSerializer
+from .sharding import contacts_db
+from core.utils.async_views import AsyncAPIView
 from core.utils.error_formatter import format_serializer_errors
-from django.db.models import Q
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
-class ContactPagination(PageNumberPagination):
-    """Custom pagination for contacts"""
-    page_size = 5
-    page_size_query_param = "page_size"
-    max_page_size = 50
+
+PAGINATION_PARAMETERS = [
+    OpenApiParameter(name="page", description="Page number", required=False, type=int),
+    OpenApiParameter(name="page_size", description="Number of items per page", required=False, type=int),
+    OpenApiParameter(name="pagination", description="Set to `cursor` for keyset pagination with `next`/`previous` cursor links", required=False, type=str, enum=["page", "cursor"]),
+    OpenApiParameter(name="cursor", description="Opaque cursor taken from a `next`/`previous` link (implies `pagination=cursor`)", required=False, type=str),
+    OpenApiParameter(name="count", description="Include the total `count` in cursor mode (costs an extra COUNT query)", required=False, type=bool),
+]
+
+CONDITIONAL_PARAMETERS = [
+    OpenApiParameter(name="If-None-Match", location=OpenApiParameter.HEADER, description="`ETag` of a previous response, answered with 304 when nothing changed", required=False, type=str),
+    OpenApiParameter(name="If-Modified-Since", location=OpenApiParameter.HEADER, description="`Last-Modified` of a previous response", required=False, type=str),
+]
+
+NOT_MODIFIED_RESPONSE = OpenApiResponse(description="Not Modified, the copy identified by `If-None-Match`/`If-Modified-Since` is current")
+
+
+@sync_to_async
+def save_contact(serializer):
+    """Save a validated ContactSerializer and return its data, both need the database"""
+    serializer.save()
+    return serializer.data
+
+
+def delete_contact(user, contact):
+    """Delete `contact` of `user`, leaving its tombstones for delta sync"""
+    with transaction.atomic(using=contacts_db(user)):
+        sync.record_deleted(user, Contact.objects.for_user(user).filter(pk=contact.pk), versioning.bump_version(user))
+        contact.delete()
+
+# Conditional GET for list and search responses, checked before anything is serialized
+contacts_condition = method_decorator(
+    condition(etag_func=versioning.contacts_etag, last_modified_func=versioning.contacts_last_modified)
+)
+search_condition = method_decorator(
+    condition(etag_func=versioning.search_etag, last_modified_func=versioning.search_last_modified)
+)
+contact_condition = method_decorator(
+    condition(etag_func=versioning.contact_etag, last_modified_func=versioning.contact_last_modified)
+)
 
 @extend_schema(tags=["Contacts"])
-class ContactListView(APIView):
+class ContactListView(AsyncAPIView):
     """Handles listing, creating """
     permission_classes = [IsAuthenticated]  # Require authentication
     @extend_schema(
         summary="List Contacts",
-        description="Retrieve all contacts of the authenticated user with pagination.",
-        parameters=[
-            OpenApiParameter(name="page", description="Page number", required=False, type=int),
-            OpenApiParameter(name="page_size", description="Number of items per page", required=False, type=int),
-        ],
+        description=(
+            "Retrieve all contacts of the authenticated user with pagination. Responses carry an `ETag` and "
+            "`Last-Modified` that change with any write to the user's contacts; send them back as "
+            "`If-None-Match`/`If-Modified-Since` to get a 304 when nothing changed."
+        ),
+        parameters=[*PAGINATION_PARAMETERS, *CONDITIONAL_PARAMETERS],
         responses={200: OpenApiResponse(
             description="Successful request",
             response=ContactSerializer(many=True),
@@ -45,17 +97,31 @@ class ContactListView(APIView):
                         }]},
                     response_only=True,
             ),]
-        )},
+        ),
+        304: NOT_MODIFIED_RESPONSE},
     )
+    @contacts_condition
+    @response_cache.cached_response("list")
     def get(self, request):
         """List all contacts for the authenticated user with pagination"""
-        contacts = Contact.objects.filter(user=request.user).order_by("-created_at")
+        contacts = representations.contact_rows(Contact.objects.for_user(request.user).order_by("-created_at"))
 
-        paginator = ContactPagination()
+        paginator = get_contact_paginator(request)
         result_page = paginator.paginate_queryset(contacts, request)
-        serializer = ContactSerializer(result_page, many=True)
 
-        return paginator.get_paginated_response(serializer.data)
+        return paginator.get_paginated_response(representations.represent_contacts(result_page, request.user))
+
+    @versioning.preloads(versioning.acurrent_version)
+    @contacts_condition
+    @response_cache.cached_response("list")
+    async def aget(self, request):
+        """`get` served from the event loop"""
+        contacts = representations.contact_rows(Contact.objects.for_user(request.user).order_by("-created_at"))
+
+        paginator = get_contact_paginator(request)
+        result_page = await paginator.apaginate_queryset(contacts, request)
+
+        return paginator.get_paginated_response(await representations.arepresent_contacts(result_page, request.user))
 
     @extend_schema(
         summary="Create Contact",
@@ -111,16 +177,261 @@ class ContactListView(APIView):
         if not serializer.is_valid():
             return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
 
-        serializer.save()
+        try:
+            serializer.save()
+        except serializers.ValidationError as exc:
+            return Response(format_serializer_errors(exc.detail), status=status.HTTP_400_BAD_REQUEST)
         return Response({"message": "Contact created successfully", "contact": serializer.data}, status=status.HTTP_201_CREATED)
+
+    async def apost(self, request):
+        """`post` served from the event loop"""
+        serializer = ContactSerializer(data=request.data, context={"request": request})
+
+        if not await sync_to_async(serializer.is_valid)():
+            return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            contact = await save_contact(serializer)
+        except serializers.ValidationError as exc:
+            return Response(format_serializer_errors(exc.detail), status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "Contact created successfully", "contact": contact}, status=status.HTTP_201_CREATED)
     
     
 @extend_schema(tags=["Contacts"])
-class ContactDetailView(APIView):
-    """Handles Update and Delete """
+class ContactBulkView(APIView):
+    """Handles creating, updating and deleting many contacts in one request"""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Bulk Create Contacts",
+        description=(
+            "Create up to `CONTACTS_BULK_MAX_ITEMS` contacts in one request. Every item is validated like "
+            "`POST /api/contacts`; valid items are inserted in a single transaction and invalid ones are "
+            "reported by their index. Responds 201 when every item was created, 207 when some failed "
+            "and 400 when none could be created."
+        ),
+        request=ContactSerializer(many=True),
+        responses={
+            201: OpenApiResponse(
+                description="All contacts created",
+                examples=[OpenApiExample(
+                    name="Successful Bulk Creation",
+                    value={"message": "2 of 2 contacts created successfully", "created": 2, "failed": 0,
+                           "results": [{"index": 0, "id": 1}, {"index": 1, "id": 2}]},
+                    response_only=True,
+                )],
+            ),
+            207: OpenApiResponse(
+                description="Some contacts could not be created",
+                examples=[OpenApiExample(
+                    name="Partial Bulk Creation",
+                    value={"message": "1 of 2 contacts created successfully", "created": 1, "failed": 1,
+                           "results": [{"index": 0, "id": 1},
+                                       {"index": 1, "message": "name, this field is required."}]},
+                    response_only=True,
+                )],
+            ),
+            400: OpenApiResponse(
+                description="Bad Request",
+                examples=[OpenApiExample(
+                    name="Not a list",
+                    value={"message": "Expected a list of contacts."},
+                    response_only=True,
+                )],
+            ),
+        },
+    )
+    def post(self, request):
+        """Validate and create a batch of contacts for the authenticated user"""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"message": "Expected a list of contacts."}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = bulk.max_bulk_contacts()
+        if len(items) > limit:
+            return Response({"message": f"A bulk request can contain at most {limit} contacts."}, status=status.HTTP_400_BAD_REQUEST)
+
+        valid, errors = bulk.validate_contacts(items, request)
+        try:
+            with transaction.atomic(using=contacts_db(request.user)):
+                contacts = bulk.insert_contacts(request.user, [data for _, data in valid])
+        except IntegrityError:
+            # Another request added one of these numbers after they were checked
+            return Response({"message": "telephones, a number in this batch was added by another request. please retry."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [{"index": index, "id": contact.id} for (index, _), contact in zip(valid, contacts)]
+        results += [{"index": index, "message": message} for index, message in errors]
+        results.sort(key=lambda result: result["index"])
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif contacts:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            "message": f"{len(contacts)} of {len(items)} contacts created successfully",
+            "created": len(contacts),
+            "failed": len(errors),
+            "results": results,
+        }, status=response_status)
+
+    @extend_schema(
+        summary="Bulk Update Contacts",
+        description=(
+            "Set the same field values on many contacts with a single UPDATE. Contacts are selected either "
+            "by `ids` or by an exact-match `filter` on city, country or postcode; only the authenticated "
+            "user's contacts are ever touched. Telephone numbers cannot be changed in bulk."
+        ),
+        request=bulk.ContactBulkUpdateSerializer,
+        responses={
+            200: OpenApiResponse(
+                description="Contacts updated",
+                examples=[OpenApiExample(
+                    name="Successful Bulk Update",
+                    value={"message": "2 contacts updated successfully", "updated": 2},
+                    response_only=True,
+                )],
+            ),
+            400: OpenApiResponse(
+                description="Validation Error",
+                examples=[OpenApiExample(
+                    name="Missing Selection",
+                    value={"message": "Provide either `ids` or `filter` to select contacts."},
+                    response_only=True,
+                )],
+            ),
+        },
+    )
+    def put(self, request):
+        """Update the selected contacts of the authenticated user"""
+        serializer = bulk.ContactBulkUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(using=contacts_db(request.user)):
+            updated = bulk.update_contacts(request.user, serializer.get_queryset(request.user), serializer.validated_data["changes"])
+        return Response({"message": f"{updated} contacts updated successfully", "updated": updated}, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Bulk Delete Contacts",
+        description=(
+            "Delete many contacts and their telephone numbers with one DELETE per table. Contacts are selected "
+            "either by `ids` or by an exact-match `filter` on city, country or postcode; only the authenticated "
+            "user's contacts are ever touched."
+        ),
+        request=bulk.ContactSelectionSerializer,
+        responses={
+            200: OpenApiResponse(
+                description="Contacts deleted",
+                examples=[OpenApiExample(
+                    name="Successful Bulk Deletion",
+                    value={"message": "2 contacts deleted successfully", "deleted": {"contacts": 2, "telephones": 3}},
+                    response_only=True,
+                )],
+            ),
+            400: OpenApiResponse(
+                description="Validation Error",
+                examples=[OpenApiExample(
+                    name="Missing Selection",
+                    value={"message": "Provide either `ids` or `filter` to select contacts."},
+                    response_only=True,
+                )],
+            ),
+        },
+    )
+    def delete(self, request):
+        """Delete the selected contacts of the authenticated user"""
+        serializer = bulk.ContactSelectionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(using=contacts_db(request.user)):
+            contacts, telephones = bulk.delete_contacts(request.user, serializer.get_queryset(request.user))
+        return Response({
+            "message": f"{contacts} contacts deleted successfully",
+            "deleted": {"contacts": contacts, "telephones": telephones},
+        }, status=status.HTTP_200_OK)
+
+
+@extend_schema(tags=["Contacts"])
+class ContactDetailView(AsyncAPIView):
+    """Handles Retrieve, Update and Delete """
+
+    def update_serializer(self, request, contact):
+        """Serializer of a PUT, `?replace=true` replaces the telephones instead of adding to them"""
+        replace = request.query_params.get("replace", "").lower() in ("1", "true", "yes")
+        return ContactSerializer(
+            contact, data=request.data, partial=True, context={"request": request, "replace_telephones": replace},
+        )
+
+    @extend_schema(
+        summary="Get Contact",
+        operation_id="contacts_detail_retrieve",
+        description=(
+            "Retrieve a single contact of the authenticated user. The `ETag` and `Last-Modified` headers follow the "
+            "contact's last change; send them back as `If-None-Match`/`If-Modified-Since` to get a 304."
+        ),
+        parameters=CONDITIONAL_PARAMETERS,
+        responses={
+            200: OpenApiResponse(
+                response=ContactSerializer,
+                description="Successful request",
+                examples=[OpenApiExample(
+                name="Successful request",
+                value={
+                            "id": 1,
+                            "name": "John Doe",
+                            "address_line_1": "123 Street",
+                            "city": "New York",
+                            "country": "USA",
+                            "postcode": "10001",
+                            "telephones": [{"number": "+123456789"}]
+                        },
+                response_only=True,
+            ),]
+            ),
+            304: NOT_MODIFIED_RESPONSE,
+            404: OpenApiResponse(
+                description="Contact Not Found",
+                examples=[OpenApiExample(
+                name="Contact Not Found",
+                value={"message": "Contact not found or you do not have permission to view it."},
+                response_only=True,
+            )
+                ]
+            )
+        },
+    )
+    @contact_condition
+    def get(self, request, contact_id):
+        """Retrieve a contact if it belongs to the authenticated user"""
+        contact = Contact.objects.for_user(request.user).with_telephones().filter(id=contact_id).first()
+        if contact is None:
+            return Response({"message": "Contact not found or you do not have permission to view it."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(ContactSerializer(contact).data, status=status.HTTP_200_OK)
+
+    @versioning.preloads(versioning.acontact_updated_at)
+    @contact_condition
+    async def aget(self, request, contact_id):
+        """`get` served from the event loop"""
+        contact = await Contact.objects.for_user(request.user).with_telephones().filter(id=contact_id).afirst()
+        if contact is None:
+            return Response({"message": "Contact not found or you do not have permission to view it."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(ContactSerializer(contact).data, status=status.HTTP_200_OK)
+
     @extend_schema(
         summary="Update Contact",
-        description="Partially update an existing contact if it belongs to the authenticated user.",
+        description=(
+            "Partially update an existing contact if it belongs to the authenticated user. Submitted telephone "
+            "numbers are added to the contact; with `replace=true` they replace its numbers instead, and only "
+            "the numbers that were added or removed are written."
+        ),
+        parameters=[
+            OpenApiParameter(name="replace", description="Replace the contact's telephone numbers with the submitted ones, deleting those left out", required=False, type=bool),
+        ],
         request=ContactSerializer,
         responses={
             200: OpenApiResponse(
@@ -155,17 +466,36 @@ class ContactDetailView(APIView):
     def put(self, request, contact_id):
         """Partially update a contact if it belongs to the authenticated user"""
         try:
-            contact = Contact.objects.get(id=contact_id, user=request.user)
+            contact = Contact.objects.for_user(request.user).get(id=contact_id)
         except Contact.DoesNotExist:
             return Response({"message": "Contact not found or you do not have permission to update it."}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = ContactSerializer(contact, data=request.data, partial=True, context={"request": request})
-
+        serializer = self.update_serializer(request, contact)
         if not serializer.is_valid():
             return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
 
-        serializer.save()
+        try:
+            serializer.save()
+        except serializers.ValidationError as exc:
+            return Response(format_serializer_errors(exc.detail), status=status.HTTP_400_BAD_REQUEST)
         return Response({"message": "Contact updated successfully", "contact": serializer.data}, status=status.HTTP_200_OK)
+
+    async def aput(self, request, contact_id):
+        """`put` served from the event loop"""
+        try:
+            contact = await Contact.objects.for_user(request.user).aget(id=contact_id)
+        except Contact.DoesNotExist:
+            return Response({"message": "Contact not found or you do not have permission to update it."}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = self.update_serializer(request, contact)
+        if not await sync_to_async(serializer.is_valid)():
+            return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            contact = await save_contact(serializer)
+        except serializers.ValidationError as exc:
+            return Response(format_serializer_errors(exc.detail), status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "Contact updated successfully", "contact": contact}, status=status.HTTP_200_OK)
     
     @extend_schema(
         summary="Delete Contact",
@@ -197,23 +527,34 @@ class ContactDetailView(APIView):
     def delete(self, request, contact_id):
         """Delete a contact if it belongs to the authenticated user"""
         try:
-            contact = Contact.objects.get(id=contact_id, user=request.user)
+            contact = Contact.objects.for_user(request.user).get(id=contact_id)
         except Contact.DoesNotExist:
             return Response({"message": "Contact not found or you do not have permission to delete it."}, status=status.HTTP_404_NOT_FOUND)
 
-        contact.delete()
+        delete_contact(request.user, contact)
+        return Response({"message": "Contact deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+    async def adelete(self, request, contact_id):
+        """`delete` served from the event loop"""
+        try:
+            contact = await Contact.objects.for_user(request.user).aget(id=contact_id)
+        except Contact.DoesNotExist:
+            return Response({"message": "Contact not found or you do not have permission to delete it."}, status=status.HTTP_404_NOT_FOUND)
+
+        await sync_to_async(delete_contact)(request.user, contact)
         return Response({"message": "Contact deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
 @extend_schema(tags=["Contacts"])
-class SearchContactsView(APIView):
+class SearchContactsView(AsyncAPIView):
     """API endpoint to search contacts by name or telephone number"""
-    pagination_class = ContactPagination()
 
     @extend_schema(
         summary="Search Contacts",
-        description="Search contacts by name or telephone number.",
+        description="Search contacts by name, address or telephone number. Results are ranked by relevance unless cursor pagination is used. Supports the same conditional requests as the contact list.",
         parameters=[
             OpenApiParameter(name="q", description="Search query (name or phone number)", required=True, type=str),
+            *PAGINATION_PARAMETERS,
+            *CONDITIONAL_PARAMETERS,
         ],
         responses={
             200: OpenApiResponse(
@@ -248,20 +589,261 @@ class SearchContactsView(APIView):
                     )
                 ],
             ),
+            304: NOT_MODIFIED_RESPONSE,
         },
     )
+    @search_condition
+    @response_cache.cached_response("search")
     def get(self, request):
+        """Search the authenticated user's contacts, best match first"""
+        query = request.query_params.get("q", "").strip()
+
+        if not query:
+            return Response({"message": "Search query is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        contacts = representations.contact_rows(Contact.objects.for_user(request.user))
+        paginator = get_contact_paginator(request)
+
+        if isinstance(paginator, ContactCursorPagination):
+            contacts = contacts.filter(search_index.search_filter(request.user, query))
+            paginated_contacts = paginator.paginate_queryset(contacts, request)
+        else:
+            ranked_ids = search_index.search_contact_ids(request.user, query)
+            page_ids = paginator.paginate_queryset(ranked_ids, request)
+            contacts_by_id = {row["id"]: row for row in contacts.filter(id__in=page_ids)}
+            paginated_contacts = [contacts_by_id[pk] for pk in page_ids if pk in contacts_by_id]
+
+        return paginator.get_paginated_response(representations.represent_contacts(paginated_contacts, request.user))
+
+    @versioning.preloads(versioning.acurrent_version)
+    @search_condition
+    @response_cache.cached_response("search")
+    async def aget(self, request):
+        """`get` served from the event loop"""
         query = request.query_params.get("q", "").strip()
 
         if not query:
             return Response({"message": "Search query is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        contacts = Contact.objects.filter(
-            Q(name__icontains=query) | Q(telephones__number__icontains=query),
-            user=request.user
-        ).distinct()
-        paginator = self.pagination_class
-        paginated_contacts = paginator.paginate_queryset(contacts, request)
-        serializer = ContactSerializer(paginated_contacts, many=True)
+        contacts = representations.contact_rows(Contact.objects.for_user(request.user))
+        paginator = get_contact_paginator(request)
+
+        if isinstance(paginator, ContactCursorPagination):
+            contacts = contacts.filter(search_index.search_filter(request.user, query))
+            paginated_contacts = await paginator.apaginate_queryset(contacts, request)
+        else:
+            ranked_ids = await sync_to_async(search_index.search_contact_ids)(request.user, query)
+            page_ids = await paginator.apaginate_queryset(ranked_ids, request)
+            contacts_by_id = {row["id"]: row async for row in contacts.filter(id__in=page_ids)}
+            paginated_contacts = [contacts_by_id[pk] for pk in page_ids if pk in contacts_by_id]
+
+        return paginator.get_paginated_response(await representations.arepresent_contacts(paginated_contacts, request.user))
+
+
+@extend_schema(tags=["Contacts"])
+class ContactExportView(APIView):
+    """Streams the authenticated user's whole address book"""
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Clients asking for text/csv or text/vcard must not be turned away before the export starts
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        summary="Export Contacts",
+        description=(
+            "Download every contact of the authenticated user as `csv`, `ndjson` or `vcard`. The file is "
+            "streamed while contacts are read from the database in chunks, so memory use does not grow "
+            "with the size of the address book. CSV telephone numbers are separated by `;`."
+        ),
+        responses={
+            (200, "text/csv"): OpenApiResponse(response=OpenApiTypes.STR, description="CSV file with one contact per row"),
+            (200, "application/x-ndjson"): OpenApiResponse(response=OpenApiTypes.STR, description="One JSON contact per line"),
+            (200, "text/vcard"): OpenApiResponse(response=OpenApiTypes.STR, description="vCard 3.0 file"),
+            400: OpenApiResponse(
+                description="Unsupported Format",
+                examples=[OpenApiExample(
+                    name="Unsupported Format",
+                    value={"message": "Unsupported export format, use one of csv, ndjson, vcard."},
+                    response_only=True,
+                )],
+            ),
+        },
+    )
+    def get(self, request, export_format):
+        """Stream all contacts of the authenticated user in the requested format"""
+        if export_format not in exporters.EXPORT_FORMATS:
+            formats = ", ".join(exporters.EXPORT_FORMATS)
+            return Response({"message": f"Unsupported export format, use one of {formats}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        _, content_type, extension = exporters.EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(exporters.export_contacts(request.user, export_format), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="contacts.{extension}"'
+        return response
+
+
+@extend_schema(tags=["Contacts"])
+class ContactImportView(APIView):
+    """Imports contacts from an uploaded CSV or vCard file"""
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(
+        summary="Import Contacts",
+        description=(
+            "Upload a `csv` (laid out like the CSV export) or `vcard` file in the `file` field. The format is "
+            "taken from `file_format` or the file extension. Rows are read as a stream and committed in "
+            "batches of `CONTACTS_IMPORT_BATCH_SIZE`; invalid rows are skipped, and invalid telephone numbers or "
+            "numbers already linked to another contact are dropped while the rest of the contact is imported. "
+            "When the file cannot be read to the end, the 400 response carries the report of the batches "
+            "committed before the error."
+        ),
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "file_format": {"type": "string", "enum": importers.IMPORT_FORMATS},
+                },
+                "required": ["file"],
+            }
+        },
+        responses={
+            200: OpenApiResponse(
+                description="File imported",
+                examples=[OpenApiExample(
+                    name="Successful Import",
+                    value={"message": "2 of 3 contacts imported successfully", "rows": 3, "created": 2,
+                           "failed_rows": 1, "skipped_numbers": 1,
+                           "issues": [{"row": 3, "message": "name, this field may not be blank."},
+                                      {"row": 4, "message": "telephones, the number 0123456789 is already linked to another contact."}]},
+                    response_only=True,
+                )],
+            ),
+            400: OpenApiResponse(
+                description="Bad Request",
+                examples=[
+                    OpenApiExample(
+                        name="Unsupported Format",
+                        value={"message": "Unsupported import format, use one of csv, vcard."},
+                        response_only=True,
+                    ),
+                    OpenApiExample(
+                        name="Unreadable File",
+                        value={"message": "'utf-8' codec can't decode byte 0xff in position 8192: invalid start byte. "
+                                          "1000 contacts were imported before the error.",
+                               "rows": 1000, "created": 1000, "failed_rows": 0, "skipped_numbers": 0, "issues": []},
+                        response_only=True,
+                    ),
+                ],
+            ),
+        },
+    )
+    def post(self, request):
+        """Import every contact of the uploaded file for the authenticated user"""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"message": "file, this field is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = request.data.get("file_format") or importers.detect_format(upload.name)
+        if import_format not in importers.IMPORT_FORMATS:
+            formats = ", ".join(importers.IMPORT_FORMATS)
+            return Response({"message": f"Unsupported import format, use one of {formats}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = importers.import_contacts(request.user, importers.open_text(upload), import_format)
+        except importers.ImportAborted as exc:
+            # Batches committed before the error stay imported, the report says how many
+            message = str(exc)
+            if exc.report.created:
+                message = f"{message.rstrip('.')}. {exc.report.created} contacts were imported before the error."
+            return Response({"message": message, **exc.report.as_dict()}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {"message": f"{report.created} of {report.rows} contacts imported successfully", **report.as_dict()},
+            status=status.HTTP_200_OK,
+        )
+
+
+@extend_schema(tags=["Contacts"])
+class ContactChangesView(APIView):
+    """Delta sync: what changed in the authenticated user's address book since a sync token"""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Contact Changes",
+        description=(
+            "Return the contacts created or updated since `since`, the ids of deleted contacts and the deleted "
+            "telephone numbers, together with a new `sync_token` to pass as `since` next time. Without `since` "
+            "every contact is returned. Changes come in pages of at most `limit` contacts and tombstones: while "
+            "`has_more` is true, pass `sync_token` as `since` to get the next page, and keep the token of the last "
+            "page for the next sync. Tombstones are kept for `CONTACTS_TOMBSTONE_RETENTION_DAYS`; older "
+            "tokens are answered with 410 and the client has to sync again from scratch."
+        ),
+        parameters=[
+            OpenApiParameter(name="since", description="`sync_token` of the previous sync or page", required=False, type=str),
+            OpenApiParameter(
+                name="limit", description="Most contacts and tombstones per page (default and maximum 1000)",
+                required=False, type=int,
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Changes since the token",
+                examples=[OpenApiExample(
+                    name="Changes",
+                    value={
+                        "sync_token": "42",
+                        "has_more": False,
+                        "contacts": [{
+                            "id": 1,
+                            "name": "John Doe",
+                            "address_line_1": "123 Street",
+                            "city": "New York",
+                            "country": "USA",
+                            "postcode": "10001",
+                            "telephones": [{"number": "+123456789"}]
+                        }],
+                        "deleted": {"contacts": [7], "telephones": [{"contact": 7, "number": "+987654321"}]},
+                    },
+                    response_only=True,
+                )],
+            ),
+            400: OpenApiResponse(
+                description="Bad Request",
+                examples=[OpenApiExample(
+                    name="Invalid Token",
+                    value={"message": "Invalid sync token."},
+                    response_only=True,
+                )],
+            ),
+            410: OpenApiResponse(
+                description="Token Expired",
+                examples=[OpenApiExample(
+                    name="Token Expired",
+                    value={"message": "Sync token expired, sync again without `since`."},
+                    response_only=True,
+                )],
+            ),
+        },
+    )
+    def get(self, request):
+        """Return the changes since the `since` sync token"""
+        try:
+            since = sync.parse_token(request.query_params.get("since"))
+        except ValueError:
+            return Response({"message": "Invalid sync token."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            token, has_more, contacts, deleted_contacts, deleted_telephones = sync.changes_since(
+                request.user, since, sync.page_limit(request.query_params.get("limit"))
+            )
+        except sync.SyncTokenExpired:
+            return Response({"message": "Sync token expired, sync again without `since`."}, status=status.HTTP_410_GONE)
 
-        return paginator.get_paginated_response(serializer.data)
\ No newline at end of file
+        return Response({
+            "sync_token": token,
+            "has_more": has_more,
+            "contacts": contacts,
+            "deleted": {"contacts": deleted_contacts, "telephones": deleted_telephones},
+        }, status=status.HTTP_200_OK)
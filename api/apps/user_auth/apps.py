@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UserAuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.user_auth'
+
+    def ready(self):
+        from . import schema  # noqa: F401 registers the OpenAPI extension
+        from .authentication import invalidate_cached_user
+
+        user_model = self.get_model("User")
+        post_save.connect(invalidate_cached_user, sender=user_model, dispatch_uid="user_auth_invalidate_saved_user")
+        post_delete.connect(invalidate_cached_user, sender=user_model, dispatch_uid="user_auth_invalidate_deleted_user")
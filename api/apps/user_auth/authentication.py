@@ -0,0 +1,92 @@
+"""
+JWT authentication that resolves the user from a short lived cache.
+
+simplejwt loads the user row on every request. Here the fields requests read
+are kept in the cache named by `AUTH_USER_CACHE_ALIAS` for
+`AUTH_USER_CACHE_TIMEOUT` seconds, so authenticated requests skip that query.
+The entry holds the user id, the md5 of the password hash access tokens carry
+and `CACHED_FIELDS`, never the hash itself; other fields are loaded from the
+database when first read. Saving or deleting a user drops the entry (see
+`UserAuthConfig.ready`), which covers deactivation and password changes. The
+cache has to be shared by every worker for that to reach all of them, as the
+production settings do; the timeout bounds staleness for writes that bypass
+model signals (`QuerySet.update`).
+
+The active and password checks run against the cached entry on every request,
+exactly as simplejwt runs them against the database row.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.utils.request_metrics import timed
+
+KEY_PREFIX = "user_auth:user"
+
+# User fields read by most authenticated requests, cached next to the id
+CACHED_FIELDS = ["is_active", "contacts_shard"]
+
+
+def get_cache():
+    return caches[getattr(settings, "AUTH_USER_CACHE_ALIAS", "default")]
+
+
+def cache_timeout():
+    """Seconds a user stays cached, 0 turns the cache off"""
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60)
+
+
+def user_key(user_id):
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop a saved or deleted user from the cache"""
+    get_cache().delete(user_key(getattr(instance, api_settings.USER_ID_FIELD)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reads the token's user from the cache before the database"""
+
+    def authenticate(self, request):
+        with timed("auth"):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        timeout = cache_timeout()
+        cached = get_cache().get(user_key(user_id)) if timeout else None
+        if cached is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            password_hash = get_md5_hash_password(user.password)
+            if timeout:
+                values = [getattr(user, name) for name in CACHED_FIELDS]
+                get_cache().set(user_key(user_id), (user.pk, password_hash, *values), timeout)
+        else:
+            pk, password_hash, *values = cached
+            user = self.cached_user(pk, values)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+    def cached_user(self, pk, values):
+        """User instance of a cache entry, its other fields are deferred"""
+        field_names = [self.user_model._meta.pk.attname, *CACHED_FIELDS]
+        return self.user_model.from_db(self.user_model.objects.db, field_names, [pk, *values])
@@ -0,0 +1,98 @@
+"""
+Refresh token blacklist with a cached JTI set in front of the database.
+
+With `BLACKLIST_AFTER_ROTATION` a refresh token can be used once. simplejwt
+asks the database whether the token is blacklisted on every refresh and then
+blacklists it. Here blacklisting is the check: `claim` inserts the
+`BlacklistedToken` row and a unique violation means the token was already
+used, so concurrent replays are settled by the database and the extra lookup
+is gone.
+
+Blacklisted JTIs are also kept in the cache until their token expires, so
+replays of known tokens are refused without touching the database. The cache
+is only ever a shortcut for refusing: a miss falls through to `claim`.
+
+Expired outstanding tokens, and their blacklist entries with them, are purged
+at most every `AUTH_TOKEN_PURGE_INTERVAL` seconds by the refresh that
+happens to run first, or by `manage.py purge_expired_tokens`.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+from .authentication import get_cache
+
+KEY_PREFIX = "user_auth:blacklisted"
+PURGE_KEY = "user_auth:blacklist:purged"
+
+
+def purge_interval():
+    """Seconds between purges of expired tokens, 0 leaves purging to the management command"""
+    return getattr(settings, "AUTH_TOKEN_PURGE_INTERVAL", 3600)
+
+
+def jti_key(jti):
+    return f"{KEY_PREFIX}:{jti}"
+
+
+def remember_blacklisted(token):
+    """Cache the token's JTI until the token expires"""
+    remaining = int(token["exp"] - aware_utcnow().timestamp())
+    if remaining > 0:
+        get_cache().set(jti_key(token[api_settings.JTI_CLAIM]), True, remaining)
+
+
+def is_known_blacklisted(token):
+    return bool(get_cache().get(jti_key(token[api_settings.JTI_CLAIM])))
+
+
+def claim(token):
+    """Blacklist `token`, raise TokenError when it already was"""
+    if is_known_blacklisted(token):
+        raise TokenError(_("Token is blacklisted"))
+
+    try:
+        with transaction.atomic():
+            outstanding, _created = OutstandingToken.objects.get_or_create(
+                jti=token[api_settings.JTI_CLAIM],
+                defaults={
+                    "user_id": token.get(api_settings.USER_ID_CLAIM),
+                    "created_at": token.current_time,
+                    "token": str(token),
+                    "expires_at": datetime_from_epoch(token["exp"]),
+                },
+            )
+            BlacklistedToken.objects.create(token=outstanding)
+    except IntegrityError:
+        remember_blacklisted(token)
+        raise TokenError(_("Token is blacklisted"))
+
+    remember_blacklisted(token)
+    purge_if_due()
+
+
+def purge_expired_tokens():
+    """Delete expired outstanding tokens and their blacklist entries, return the number of tokens deleted"""
+    expired = OutstandingToken.objects.filter(expires_at__lte=aware_utcnow())
+    _deleted, per_model = expired.delete()
+    return per_model.get(OutstandingToken._meta.label, 0)
+
+
+def purge_if_due():
+    """Purge expired tokens when no purge ran in the last `purge_interval()` seconds"""
+    interval = purge_interval()
+    if interval and get_cache().add(PURGE_KEY, True, interval):
+        purge_expired_tokens()
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """Refresh token whose blacklist check only consults the cached JTI set, see `claim`"""
+
+    def check_blacklist(self):
+        if is_known_blacklisted(self):
+            raise TokenError(_("Token is blacklisted"))
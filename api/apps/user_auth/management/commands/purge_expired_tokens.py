@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.user_auth.blacklist import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired refresh tokens from the outstanding list and the blacklist"
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_tokens()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired tokens."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='contacts_shard',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
@@ -30,6 +30,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False) 
 
     date_joined = models.DateTimeField(auto_now_add=True)
+    # Database alias pinning where the user's contacts live, blank follows the hash, see apps.contacts.sharding
+    contacts_shard = models.CharField(max_length=50, blank=True, default="")
 
     objects = UserManager()
 
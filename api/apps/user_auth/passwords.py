@@ -0,0 +1,83 @@
+"""
+Password verification with a bounded CPU budget.
+
+PBKDF2 takes a worker for the whole hash. With `AUTH_PASSWORD_HASH_WORKERS`
+set, logins verify passwords on a process-wide pool of that many threads
+(hashlib releases the GIL while hashing), and at most
+`AUTH_PASSWORD_HASH_QUEUE` further checks may wait for one. Beyond that
+`PasswordCheckBusy` is raised right away instead of piling up requests, so
+a burst of logins can only ever use that many cores and the rest of the API
+keeps its share. The default of 0 workers verifies inline through
+`django.contrib.auth.authenticate`.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model, hashers
+
+User = get_user_model()
+
+_lock = threading.Lock()
+_pool = None
+
+
+class PasswordCheckBusy(Exception):
+    """Every password check slot is taken, the client should retry shortly"""
+
+
+def hash_workers():
+    return getattr(settings, "AUTH_PASSWORD_HASH_WORKERS", 0)
+
+
+def hash_queue():
+    return getattr(settings, "AUTH_PASSWORD_HASH_QUEUE", 0)
+
+
+def _get_pool():
+    """`(executor, slots)` sized by the current settings"""
+    global _pool
+    size = (hash_workers(), hash_queue())
+    with _lock:
+        if _pool is None or _pool[0] != size:
+            if _pool is not None:
+                _pool[1].shutdown(wait=False)
+            executor = ThreadPoolExecutor(size[0], thread_name_prefix="password-check")
+            _pool = (size, executor, threading.BoundedSemaphore(sum(size)))
+        return _pool[1], _pool[2]
+
+
+def verify_password(password, encoded):
+    """`(is_correct, must_update)` for `password` against the `encoded` hash, computed on the pool"""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordCheckBusy()
+    try:
+        future = executor.submit(hashers.verify_password, password, encoded)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _future: slots.release())
+    return future.result()
+
+
+def authenticate(email, password):
+    """The active user with these credentials or None, like `django.contrib.auth.authenticate`"""
+    if not hash_workers():
+        return auth.authenticate(email=email, password=password)
+
+    try:
+        user = User._default_manager.get_by_natural_key(email)
+    except User.DoesNotExist:
+        user = None
+
+    # Unknown users still cost one hash so timing does not reveal which emails exist
+    is_correct, must_update = verify_password(password, user.password if user else hashers.make_password(None))
+    if user is None or not is_correct or not user.is_active:
+        return None
+
+    if must_update:
+        user.set_password(password)
+        user.save(update_fields=["password"])
+    return user
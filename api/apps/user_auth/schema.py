@@ -0,0 +1,6 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document CachedJWTAuthentication as the bearer JWT scheme it is"""
+    target_class = "apps.user_auth.authentication.CachedJWTAuthentication"
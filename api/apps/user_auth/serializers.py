@@ -1,8 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from core.utils.password_validator import CustomPasswordValidator
-from django.contrib.auth import authenticate
+from .passwords import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .blacklist import CachedBlacklistRefreshToken, claim
 User = get_user_model()
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -66,4 +70,33 @@ class UserLoginSerializer(serializers.Serializer):
         ).distinct()
 
         serializer = ContactSerializer(contacts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh serializer that blacklists rotated tokens without a separate blacklist lookup"""
+    token_class = CachedBlacklistRefreshToken
+
+    def validate(self, attrs):
+        """Check the user, use up the refresh token and return new tokens"""
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id and (user := User.objects.get(**{api_settings.USER_ID_FIELD: user_id})):
+            if not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            claim(refresh)
+        else:
+            RefreshToken.check_blacklist(refresh)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+
+        return data
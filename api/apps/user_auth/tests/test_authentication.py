@@ -0,0 +1,69 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from apps.user_auth.authentication import get_cache, user_key
+
+User = get_user_model()
+
+class CachedAuthenticationTests(APITestCase):
+    """Test cases for JWT authentication with a cached user"""
+
+    def setUp(self):
+        self.url = "/api/contacts/changes"
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+        self.authenticate(self.user)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def test_user_is_cached(self):
+        """Test the user query is only made by the first request"""
+        with self.assertNumQueries(5):
+            first = self.client.get(self.url)
+        with self.assertNumQueries(4):
+            second = self.client.get(self.url)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+
+    def test_password_hash_is_not_cached(self):
+        """Test the cache keeps the md5 access tokens carry instead of the password hash"""
+        self.client.get(self.url)
+        entry = get_cache().get(user_key(self.user.pk))
+
+        self.assertNotIn(self.user.password, entry)
+        self.assertEqual(entry, (self.user.pk, get_md5_hash_password(self.user.password), True, ""))
+
+    def test_deactivated_user_is_rejected(self):
+        """Test deactivating a user takes effect on the next request"""
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates_cache(self):
+        """Test a password change reloads the user"""
+        self.client.get(self.url)
+        self.user.set_password("New@12345")
+        self.user.save()
+
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+
+    def test_deleted_user_is_rejected(self):
+        """Test a deleted user can no longer authenticate"""
+        self.client.get(self.url)
+        self.user.delete()
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        """Test a zero timeout loads the user on every request"""
+        self.client.get(self.url)
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
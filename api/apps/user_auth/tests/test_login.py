@@ -1,6 +1,7 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 User = get_user_model()
 
@@ -8,6 +9,7 @@ class UserLoginTests(APITestCase):
     """Test cases for user login"""
 
     def setUp(self):
+        cache.clear()
         self.login_url = "/api/auth/login"
         self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
 
@@ -0,0 +1,139 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.settings import api_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password, verify_password
+from apps.user_auth import passwords
+
+User = get_user_model()
+
+RATES = {"login_ip": "5/min", "login_email": "3/min", "register_ip": "4/min", "register_email": "2/min"}
+
+@override_settings(REST_FRAMEWORK={**api_settings.user_settings, "DEFAULT_THROTTLE_RATES": RATES})
+class LoginThrottleTests(APITestCase):
+    """Test cases for the token bucket throttles of login and registration"""
+
+    def setUp(self):
+        cache.clear()
+        self.login_url = "/api/auth/login"
+        self.register_url = "/api/auth/register"
+        User.objects.create_user(email="test@example.com", password="Test@1234")
+
+    def login(self, email, password="WrongPass", ip="10.0.0.1"):
+        return self.client.post(self.login_url, {"email": email, "password": password}, REMOTE_ADDR=ip)
+
+    def test_email_bucket(self):
+        """Test one account can't be guessed from many addresses"""
+        for i in range(3):
+            self.assertEqual(self.login("test@example.com", ip=f"10.0.0.{i}").status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.login("TEST@example.com ", ip="10.0.0.9")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+        self.assertEqual(self.login("other@example.com", ip="10.0.0.9").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ip_bucket(self):
+        """Test one address can't spray many accounts"""
+        for i in range(5):
+            self.login(f"user{i}@example.com")
+        self.assertEqual(self.login("test@example.com", "Test@1234").status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login("test@example.com", "Test@1234", ip="10.0.0.2").status_code, status.HTTP_200_OK)
+
+    def test_spoofed_forwarded_for_keeps_the_bucket(self):
+        """Test a client can't get a fresh IP bucket by sending its own X-Forwarded-For"""
+        for i in range(5):
+            self.client.post(
+                self.login_url, {"email": f"user{i}@example.com", "password": "WrongPass"},
+                REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=f"192.0.2.{i}",
+            )
+        response = self.client.post(
+            self.login_url, {"email": "test@example.com", "password": "Test@1234"},
+            REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="192.0.2.99",
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_bucket_refills(self):
+        """Test tokens come back at the sustained rate"""
+        with mock.patch("apps.user_auth.throttling.TokenBucketThrottle.timer", return_value=1000.0):
+            for _ in range(3):
+                self.login("test@example.com")
+            self.assertEqual(self.login("test@example.com").status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with mock.patch("apps.user_auth.throttling.TokenBucketThrottle.timer", return_value=1020.0):
+            self.assertEqual(self.login("test@example.com").status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(self.login("test@example.com").status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_register_is_throttled(self):
+        """Test registration has its own buckets"""
+        for i in range(4):
+            self.client.post(self.register_url, {"email": f"new{i}@example.com", "password": "NewPass@123"})
+        response = self.client.post(self.register_url, {"email": "new9@example.com", "password": "NewPass@123"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.assertEqual(self.login("test@example.com", "Test@1234").status_code, status.HTTP_200_OK)
+
+
+@override_settings(AUTH_PASSWORD_HASH_WORKERS=2, AUTH_PASSWORD_HASH_QUEUE=0)
+class PasswordExecutorTests(APITestCase):
+    """Test cases for password verification on the bounded executor"""
+
+    def setUp(self):
+        cache.clear()
+        self.login_url = "/api/auth/login"
+        self.user = User.objects.create_user(email="test@example.com", password="Test@1234")
+
+    def test_login_on_executor(self):
+        """Test logins succeed and fail as they do inline"""
+        response = self.client.post(self.login_url, {"email": "test@example.com", "password": "Test@1234"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "test@example.com")
+
+        for data in ({"email": "test@example.com", "password": "WrongPass"}, {"email": "nobody@example.com", "password": "Test@1234"}):
+            response = self.client.post(self.login_url, data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data["message"], "Invalid email or password")
+
+    def test_inactive_user(self):
+        """Test inactive users can't log in"""
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(self.login_url, {"email": "test@example.com", "password": "Test@1234"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_outdated_hash_is_upgraded(self):
+        """Test hashes made with old parameters are replaced after a login"""
+        User.objects.filter(pk=self.user.pk).update(password=PBKDF2PasswordHasher().encode("Test@1234", "salt", iterations=1000))
+        self.client.post(self.login_url, {"email": "test@example.com", "password": "Test@1234"})
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+    def test_full_executor_answers_busy(self):
+        """Test logins over the budget are refused instead of queued"""
+        release = threading.Event()
+        started = threading.Barrier(3)
+
+        def slow_verify(password, encoded):
+            started.wait()
+            release.wait()
+            return verify_password(password, encoded)
+
+        with mock.patch("apps.user_auth.passwords.hashers.verify_password", slow_verify):
+            executor, slots = passwords._get_pool()
+            slots.acquire()
+            slots.acquire()
+            busy = [executor.submit(slow_verify, "x", make_password(None)) for _ in range(2)]
+            started.wait()
+
+            response = self.client.post(self.login_url, {"email": "test@example.com", "password": "Test@1234"})
+            release.set()
+            slots.release()
+            slots.release()
+            for future in busy:
+                future.result()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
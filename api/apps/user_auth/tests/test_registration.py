@@ -1,6 +1,7 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 User = get_user_model()
 
@@ -9,6 +10,7 @@ class UserRegistrationTests(APITestCase):
 
     def setUp(self):
         """Set up test environment"""
+        cache.clear()
         self.register_url = "/api/auth/register"
         self.user = User.objects.create_user(email="existing@example.com", password="Existing@1234")
 
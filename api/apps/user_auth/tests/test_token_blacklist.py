@@ -0,0 +1,84 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from apps.user_auth.authentication import get_cache
+
+User = get_user_model()
+
+class TokenBlacklistTests(APITestCase):
+    """Test cases for refresh token rotation and the blacklist"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.refresh_url = "/api/auth/refresh"
+        User.objects.create_user(email="test@example.com", password="Test@1234")
+        response = self.client.post("/api/auth/login", {"email": "test@example.com", "password": "Test@1234"})
+        self.refresh_token = response.data["refresh_token"]
+
+    def refresh(self, token):
+        return self.client.post(self.refresh_url, {"refresh": token})
+
+    def test_refresh_rotates_token(self):
+        """Test a refresh returns new tokens and blacklists the old refresh token"""
+        response = self.refresh(self.refresh_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+        self.assertNotEqual(response.data["refresh"], self.refresh_token)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+        self.assertEqual(self.refresh(response.data["refresh"]).status_code, status.HTTP_200_OK)
+
+    def test_reused_token_is_rejected(self):
+        """Test a rotated refresh token can't be used again, without a database query"""
+        self.refresh(self.refresh_token)
+        with self.assertNumQueries(0):
+            response = self.refresh(self.refresh_token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_database_is_the_backing_store(self):
+        """Test reuse is still rejected when the cache lost the token"""
+        self.refresh(self.refresh_token)
+        get_cache().clear()
+        self.assertEqual(self.refresh(self.refresh_token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_does_not_look_up_the_blacklist(self):
+        """Test blacklisting the token is the only blacklist query"""
+        with CaptureQueriesContext(connection) as queries:
+            self.refresh(self.refresh_token)
+        blacklist_queries = [query["sql"] for query in queries if "token_blacklist_blacklistedtoken" in query["sql"]]
+        self.assertEqual(len(blacklist_queries), 1)
+        self.assertTrue(blacklist_queries[0].startswith("INSERT"))
+
+    def test_expired_tokens_are_purged_periodically(self):
+        """Test the refresh purges expired tokens at most once per interval"""
+        OutstandingToken.objects.update(expires_at=timezone.now() - timedelta(days=1))
+        self.refresh(self.refresh_token)
+        self.assertEqual(OutstandingToken.objects.count(), 0)
+
+        response = self.client.post("/api/auth/login", {"email": "test@example.com", "password": "Test@1234"})
+        OutstandingToken.objects.update(expires_at=timezone.now() - timedelta(days=1))
+        self.refresh(response.data["refresh_token"])
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+
+    @override_settings(AUTH_TOKEN_PURGE_INTERVAL=0)
+    def test_purge_command(self):
+        """Test the purge command deletes only expired tokens"""
+        self.refresh(self.refresh_token)
+        OutstandingToken.objects.update(expires_at=timezone.now() - timedelta(days=1))
+        self.client.post("/api/auth/login", {"email": "test@example.com", "password": "Test@1234"})
+
+        stdout = StringIO()
+        call_command("purge_expired_tokens", stdout=stdout)
+
+        self.assertIn("Purged 1 expired tokens.", stdout.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
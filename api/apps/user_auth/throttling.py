@@ -0,0 +1,81 @@
+"""
+Token bucket throttles for the login and registration endpoints.
+
+Each scope in `REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]` describes a bucket:
+"5/min" holds up to 5 tokens and refills one every 12 seconds, so a client
+may burst up to the limit and then continues at the sustained rate. A bucket
+is two numbers in the cache, instead of the timestamp list DRF's own
+throttles keep per client.
+
+Requests are counted per client IP and per submitted email address, so one
+address can neither spray passwords at many accounts nor have a single
+account's password guessed from many addresses.
+"""
+import hashlib
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle whose rate is a refilling bucket rather than a sliding window"""
+
+    def get_rate(self):
+        # Read at request time so rate changes in settings apply
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        tokens, refilled_at = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (now - refilled_at) * self.num_requests / self.duration)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) * self.duration / self.num_requests
+            return False
+
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(TokenBucketThrottle):
+    """Bucket per client IP"""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class EmailThrottle(TokenBucketThrottle):
+    """Bucket per email address in the request body, requests without one are left to IPThrottle"""
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        ident = hashlib.md5(email.strip().lower().encode(), usedforsecurity=False).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = "login_ip"
+
+
+class LoginEmailThrottle(EmailThrottle):
+    scope = "login_email"
+
+
+class RegisterIPThrottle(IPThrottle):
+    scope = "register_ip"
+
+
+class RegisterEmailThrottle(EmailThrottle):
+    scope = "register_email"
@@ -3,7 +3,9 @@ from rest_framework.response import Response
 from rest_framework import permissions
 from rest_framework import status
 from drf_spectacular.utils import extend_schema, OpenApiExample
-from .serializers import UserRegistrationSerializer,UserLoginSerializer
+from .serializers import UserRegistrationSerializer,UserLoginSerializer,RotatingTokenRefreshSerializer
+from .passwords import PasswordCheckBusy
+from .throttling import LoginEmailThrottle, LoginIPThrottle, RegisterEmailThrottle, RegisterIPThrottle
 from core.utils.error_formatter import format_serializer_errors
 from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -13,11 +15,12 @@ from rest_framework_simplejwt.views import TokenRefreshView
 class RegisterUserView(APIView):
     """API endpoint for user registration"""
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterIPThrottle, RegisterEmailThrottle]
     @extend_schema(
     summary="Register user",
     description="Allows users to create an account with an email and password.",
     request=UserRegistrationSerializer,
-    responses={200: {"message": "User registered successfully"}, 400: { "message": "email, user with this email already exists."}},
+    responses={200: {"message": "User registered successfully"}, 400: { "message": "email, user with this email already exists."}, 429: {"detail": "Request was throttled."}},
     examples=[
          OpenApiExample(
             name="Successful Response",
@@ -56,11 +59,12 @@ class RegisterUserView(APIView):
 class LoginUserView(APIView):
     """API endpoint for user login"""
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
     @extend_schema(
     summary="User Login",
     description="Allows users to log in with their email and password to obtain access and refresh tokens.",
     request=UserLoginSerializer,
-    responses={200: {"access_token": "JWT access token", "refresh_token": "JWT refresh token", "email":"Users registered email"}, 400: {"message": "Invalid email or password"}},
+    responses={200: {"access_token": "JWT access token", "refresh_token": "JWT refresh token", "email":"Users registered email"}, 400: {"message": "Invalid email or password"}, 429: {"detail": "Request was throttled."}, 503: {"message": "Too many logins in progress, please try again shortly."}},
     examples=[
         OpenApiExample(
             name="Successful Response",
@@ -79,12 +83,27 @@ class LoginUserView(APIView):
             response_only=True,
             status_codes=[400] 
         ),
+        OpenApiExample(
+            name="Too many attempts",
+            description="Example of a login attempt over the per IP or per email rate",
+            value={"detail": "Request was throttled. Expected available in 12 seconds."},
+            response_only=True,
+            status_codes=[429] 
+        ),
     ]
 )
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
 
-        if not serializer.is_valid():
+        try:
+            is_valid = serializer.is_valid()
+        except PasswordCheckBusy:
+            return Response(
+                {"message": "Too many logins in progress, please try again shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+        if not is_valid:
             return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
 
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
@@ -95,6 +114,8 @@ class LoginUserView(APIView):
     description="""
         This endpoint allows users to refresh their JWT access token using a valid refresh token.
         If the refresh token is expired or invalid, the request will be denied.
+        Refresh tokens are rotated: the response carries a new refresh token and
+        the one sent is blacklisted, so it can only be used once.
     """,
     request={
         "application/json": {
@@ -102,7 +123,7 @@ class LoginUserView(APIView):
         }
     },
     responses={
-        200: {"access": "string (New JWT access token)"},
+        200: {"access": "string (New JWT access token)", "refresh": "string (New JWT refresh token)"},
         401: {
             "detail": "Token is invalid or expired",
             "code": "token_not_valid"
@@ -118,7 +139,7 @@ class LoginUserView(APIView):
         OpenApiExample(
             name="Successful Refresh Token",
             description="Example of a successful token refresh",
-            value={"access": "new_JWT_access_token"},
+            value={"access": "new_JWT_access_token", "refresh": "new_JWT_refresh_token"},
             request_only=False,
         ),
         OpenApiExample(
@@ -134,4 +155,4 @@ class LoginUserView(APIView):
 
 class CustomTokenRefreshView(TokenRefreshView):
     """Customized Token Refresh View for documentation"""
-    pass
\ No newline at end of file
+    serializer_class = RotatingTokenRefreshSerializer
\ No newline at end of file
@@ -14,5 +14,8 @@ from django.core.asgi import get_asgi_application
 
 ENV = os.getenv("DJANGO_ENVIRONMENT", "development")
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", f"backend.settings.{ENV}")
+# Served from an event loop, views with async handlers run those unless told otherwise
+if not os.getenv("DJANGO_ASYNC_VIEWS"):
+    os.environ["DJANGO_ASYNC_VIEWS"] = "True"
 
 application = get_asgi_application()
@@ -30,12 +30,16 @@ INSTALLED_APPS = [
     "apps.contacts",
     "apps.user_auth",
     "rest_framework_simplejwt",
+    "rest_framework_simplejwt.token_blacklist",
     "drf_spectacular"
 ]
 
 
 MIDDLEWARE = [
+    # Outermost so its Server-Timing covers the whole request, see core.utils.request_metrics
+    "core.utils.request_metrics.RequestMetricsMiddleware",
     'django.middleware.security.SecurityMiddleware',
+    "core.utils.routing.ReadReplicaMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -45,6 +49,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Contacts live on their user's shard, see apps.contacts.sharding. Reads of GET
+# requests go to DATABASE_READ_ALIAS when a settings module defines one
+DATABASE_ROUTERS = ["apps.contacts.sharding.ContactsShardRouter", "core.utils.routing.ReadReplicaRouter"]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -66,6 +74,8 @@ AUTH_USER_MODEL = "user_auth.User"
 ROOT_URLCONF = "backend.urls"
 WSGI_APPLICATION = "backend.wsgi.application"
 ASGI_APPLICATION = "backend.asgi.application"
+# Views with async handlers serve those instead of their sync ones, on under ASGI, see core.utils.async_views
+ASYNC_VIEWS = os.getenv("DJANGO_ASYNC_VIEWS", "False") == "True"
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -86,14 +96,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 REST_FRAMEWORK = {
    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.user_auth.authentication.CachedJWTAuthentication",
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated', 
     ],
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.utils.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5, 
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Token buckets of the auth endpoints, see apps.user_auth.throttling
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": os.getenv("AUTH_THROTTLE_LOGIN_IP", "30/min"),
+        "login_email": os.getenv("AUTH_THROTTLE_LOGIN_EMAIL", "10/min"),
+        "register_ip": os.getenv("AUTH_THROTTLE_REGISTER_IP", "20/hour"),
+        "register_email": os.getenv("AUTH_THROTTLE_REGISTER_EMAIL", "5/hour"),
+    },
+    # Proxies in front of the API, used to find the client IP in X-Forwarded-For. Without one the header
+    # comes from the client, so REMOTE_ADDR is used; production.py sets 1 for nginx
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES") or "0"),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -110,6 +134,54 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+# Largest batch accepted by POST /api/contacts/bulk
+CONTACTS_BULK_MAX_ITEMS = int(os.getenv("CONTACTS_BULK_MAX_ITEMS", "10000"))
+# Rows committed per transaction by contact imports
+CONTACTS_IMPORT_BATCH_SIZE = int(os.getenv("CONTACTS_IMPORT_BATCH_SIZE", "1000"))
+# Days deletions are kept for delta sync, see apps.contacts.sync
+CONTACTS_TOMBSTONE_RETENTION_DAYS = int(os.getenv("CONTACTS_TOMBSTONE_RETENTION_DAYS", "30"))
+# Database aliases users' contacts are spread over, none keeps them in the default database.
+# Settings modules add a database per alias, see apps.contacts.sharding
+CONTACTS_SHARDS = [f"contacts_shard_{index}" for index in range(int(os.getenv("CONTACTS_SHARD_COUNT", "0")))]
+
+# Requests slower than this many ms are logged with their slowest queries, unset turns the log off
+REQUEST_METRICS_SLOW_MS = int(os.getenv("REQUEST_METRICS_SLOW_MS")) if os.getenv("REQUEST_METRICS_SLOW_MS") else None
+# Statements included in a slow request log entry
+REQUEST_METRICS_SLOW_QUERIES = int(os.getenv("REQUEST_METRICS_SLOW_QUERIES", "5"))
+
+# Contact list and search responses are cached per user, see apps.contacts.response_cache.
+# Any Django cache backend works, e.g. django.core.cache.backends.filebased.FileBasedCache
+# with a directory as location, or a shared Redis/Memcached cache.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "contacts": {
+        "BACKEND": os.getenv("CONTACTS_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CONTACTS_CACHE_LOCATION", "contacts"),
+        "TIMEOUT": int(os.getenv("CONTACTS_CACHE_TIMEOUT", "300")),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CONTACTS_CACHE_MAX_ENTRIES", "10000")),
+            "CULL_FREQUENCY": int(os.getenv("CONTACTS_CACHE_CULL_FREQUENCY", "3")),
+        },
+    },
+    "auth": {
+        "BACKEND": os.getenv("AUTH_USER_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("AUTH_USER_CACHE_LOCATION", "auth"),
+    },
+}
+CONTACTS_CACHE_ALIAS = "contacts"
+CONTACTS_CACHE_TIMEOUT = CACHES["contacts"]["TIMEOUT"]
+
+# Authenticated users are cached between requests, see apps.user_auth.authentication
+AUTH_USER_CACHE_ALIAS = "auth"
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", "60"))
+# Threads verifying login passwords and checks allowed to wait for one, see apps.user_auth.passwords
+AUTH_PASSWORD_HASH_WORKERS = int(os.getenv("AUTH_PASSWORD_HASH_WORKERS", "0"))
+AUTH_PASSWORD_HASH_QUEUE = int(os.getenv("AUTH_PASSWORD_HASH_QUEUE", "8"))
+# Seconds between purges of expired refresh tokens, see apps.user_auth.blacklist
+AUTH_TOKEN_PURGE_INTERVAL = int(os.getenv("AUTH_TOKEN_PURGE_INTERVAL", "3600"))
+
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS =(*default_headers,)
 CORS_ALLOW_METHODS = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
\ No newline at end of file
@@ -9,6 +9,11 @@ DATABASES = {
         "NAME": DATABASE_DIR / os.getenv("DATABASE_NAME", "db.sqlite3"),
     }
 }
+for alias in CONTACTS_SHARDS:
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": DATABASES["default"]["NAME"].with_name(f"{alias}.sqlite3"),
+    }
 
 
 
@@ -1,4 +1,5 @@
 from .base import *
+from core.utils.sqlite import production_database, replica_database
 
 print("in production settings")
 DEBUG = False
@@ -7,12 +8,28 @@ ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",")
 
 CORS_ALLOWED_ORIGINS =os.getenv("CORS_ALLOWED_ORIGINS_", "http://localhost").split(",")
 
+# Behind nginx (see docker/nginx/nginx.conf), which appends the client IP to X-Forwarded-For
+REST_FRAMEWORK["NUM_PROXIES"] = int(os.getenv("NUM_PROXIES") or "1")
+
+# WAL, busy timeout, immediate transactions and persistent connections, see core.utils.sqlite
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": DATABASE_DIR / os.getenv("DATABASE_NAME", "db.sqlite3"),
-    }
+    "default": production_database(DATABASE_DIR / os.getenv("DATABASE_NAME", "db.sqlite3")),
 }
+# GET requests read through a read-only connection of the same file, see core.utils.routing
+if os.getenv("DATABASE_READ_REPLICA", "True") == "True":
+    DATABASES["replica"] = replica_database(DATABASE_DIR / os.getenv("DATABASE_NAME", "db.sqlite3"))
+    DATABASE_READ_ALIAS = "replica"
+# One file per contacts shard next to the default database, see apps.contacts.sharding
+for alias in CONTACTS_SHARDS:
+    DATABASES[alias] = production_database(DATABASES["default"]["NAME"].with_name(f"{alias}.sqlite3"))
+
+# Saving a user has to drop its cached entry in every gunicorn worker, so they share the cache through files
+if not os.getenv("AUTH_USER_CACHE_BACKEND"):
+    CACHES["auth"]["BACKEND"] = "django.core.cache.backends.filebased.FileBasedCache"
+    CACHES["auth"]["LOCATION"] = os.getenv("AUTH_USER_CACHE_LOCATION") or str(BASE_DIR / "cache" / "auth")
+
+# Slow requests are logged as JSON lines on the request_metrics logger, see core.utils.request_metrics
+REQUEST_METRICS_SLOW_MS = int(os.getenv("REQUEST_METRICS_SLOW_MS", "500"))
 
 LOGGER_FILE=BASE_DIR/"logs"
 LOGGER_FILE.mkdir(exist_ok=True)
@@ -43,5 +60,10 @@ LOGGING = {
             "level": "INFO",
             "propagate": True,
         },
+        "request_metrics": {
+            "handlers": ["console", "file"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
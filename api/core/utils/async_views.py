@@ -0,0 +1,76 @@
+"""
+Views with async handlers next to their sync ones, picked by deployment.
+
+DRF dispatches requests synchronously, so under ASGI every request to an
+`APIView` holds a thread-pool thread for its whole duration. An
+`AsyncAPIView` also defines coroutine handlers, named after the sync ones
+with an `a` prefix (`aget`, `apost`, ...). With `ASYNC_VIEWS` on, which
+`backend.asgi` does, it dispatches on the event loop and awaits them. DRF's
+authentication, permission and throttle checks are sync (they may hit the
+database or the cache), so they run together in one `sync_to_async` call
+before the handler. Everything else (request parsing, exception handling,
+content negotiation and rendering) is DRF's own code.
+
+Under WSGI the view is a plain `APIView` running the sync handlers: Django
+would run async views through `async_to_sync`, a new event loop per request
+that makes them far slower than their sync versions.
+"""
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.functional import classproperty
+from rest_framework.views import APIView
+
+
+def async_views_enabled():
+    """Whether the process serves the async handlers of `AsyncAPIView`s"""
+    return getattr(settings, "ASYNC_VIEWS", False)
+
+
+class AsyncAPIView(APIView):
+    """APIView with coroutine handlers served without a thread under ASGI, and sync ones under WSGI"""
+
+    # Set from `ASYNC_VIEWS` when the URLconf builds the view, see `as_view`
+    serve_async = False
+
+    @classproperty
+    def view_is_async(cls):
+        return async_views_enabled()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Django marks the view function async or not here, dispatch has to follow the same choice
+        initkwargs.setdefault("serve_async", cls.view_is_async)
+        return super().as_view(**initkwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.serve_async:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """`dispatch` awaiting the `a`-prefixed handlers"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            method = request.method.lower()
+            if method in self.http_method_names:
+                handler = getattr(self, f"a{method}", None) or getattr(self, method, self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                # DRF's `options` and the methods without an async version
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
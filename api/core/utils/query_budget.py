@@ -0,0 +1,62 @@
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block of code runs more SQL queries than it is allowed"""
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail when the wrapped code runs more than `max_queries` SQL queries.
+
+    Usable as a context manager or as a decorator:
+
+        with query_budget(3):
+            client.get("/api/contacts?page_size=50")
+
+        @query_budget(3)
+        def test_list(self): ...
+    """
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS):
+        self.max_queries = max_queries
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self.context) > self.max_queries:
+            statements = "\n".join(f"{i}. {query['sql']}" for i, query in enumerate(self.context.captured_queries, 1))
+            raise QueryBudgetExceeded(
+                f"{len(self.context)} queries executed, budget is {self.max_queries}:\n{statements}"
+            )
+        return False
+
+
+class QueryBudgetMixin:
+    """Test case helpers to keep endpoints free of N+1 queries"""
+
+    def count_queries(self, func, using=DEFAULT_DB_ALIAS):
+        """Return the number of queries run by `func()`"""
+        with CaptureQueriesContext(connections[using]) as context:
+            func()
+        return len(context)
+
+    def assertQueryCountConstant(self, request_for_size, sizes=(1, 50), using=DEFAULT_DB_ALIAS):
+        """
+        Assert the query count does not grow with the page size.
+
+        `request_for_size` is called with each size in `sizes` and should issue
+        the request under test, e.g. `lambda size: self.client.get(f"{url}?page_size={size}")`.
+        """
+        counts = {size: self.count_queries(lambda: request_for_size(size), using) for size in sizes}
+        if len(set(counts.values())) != 1:
+            raise QueryBudgetExceeded(f"Query count grows with page size: {counts}")
+        return counts[sizes[0]]
@@ -0,0 +1,139 @@
+"""
+`EXPLAIN QUERY PLAN` of the SQL a block of code runs, on SQLite.
+
+`capture_plans` records every statement run on a connection and explains
+them when the block exits. `PlanIssue`s point out what an index
+should have saved:
+
+- full scans: "SCAN <table>" reads the whole table, "SCAN <table> USING
+  INDEX" the whole index, e.g. to avoid sorting;
+- temporary B-trees: "USE TEMP B-TREE FOR ORDER BY/GROUP BY/DISTINCT" sorts
+  or deduplicates the rows in memory because no index delivers them in order;
+- partition scans: "SEARCH <table> USING INDEX <index> (user_id=?)", where
+  `user_id` is the column `partitions` gives for `table`, reads every row
+  of the partition, e.g. all the telephones of a user to find those of a
+  few contacts. Statements with a LIMIT stop early and are not flagged.
+
+Scans of virtual tables (FTS5, json_each), subqueries and constant rows are
+not flagged.
+
+    with capture_plans(partitions={"contacts_contact": "user_id"}) as plans:
+        client.get("/api/contacts")
+    for plan in plans:
+        print(plan.sql, plan.issues)
+"""
+import re
+from contextlib import ContextDecorator
+from dataclasses import dataclass, field
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+FULL_SCAN = "full scan"
+FULL_INDEX_SCAN = "full index scan"
+TEMP_BTREE = "temp b-tree"
+PARTITION_SCAN = "partition scan"
+
+# Statements worth explaining, transaction control and pragmas are skipped
+EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+SCAN = re.compile(r"^SCAN (?P<table>\S+)(?P<rest>.*)$")
+SEARCH = re.compile(r"^SEARCH (?P<table>\S+) USING (?:COVERING )?INDEX \S+ \((?P<constraints>[^)]*)\)$")
+LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+TEMP_BTREE_USE = re.compile(r"^USE TEMP B-TREE FOR (?P<purpose>.+)$")
+
+
+@dataclass(frozen=True)
+class PlanIssue:
+    """A step of a plan an index could have avoided"""
+
+    kind: str
+    table: str
+    detail: str
+
+    def __str__(self):
+        return f"{self.kind}: {self.detail}"
+
+
+@dataclass
+class QueryPlan:
+    """A statement and the steps of its plan"""
+
+    sql: str
+    params: tuple
+    steps: list = field(default_factory=list)
+    partitions: dict = field(default_factory=dict)
+
+    @property
+    def issues(self):
+        return plan_issues(self.steps, {} if LIMIT.search(self.sql) else self.partitions)
+
+    def tree(self):
+        """The plan indented like the sqlite3 shell prints it"""
+        depths, lines = {0: -1}, []
+        for step_id, parent, detail in self.steps:
+            depths[step_id] = depths.get(parent, -1) + 1
+            lines.append(f"{'  ' * depths[step_id]}{detail}")
+        return "\n".join(lines)
+
+
+def plan_issues(steps, partitions=None):
+    """`PlanIssue`s among `(id, parent, detail)` plan steps, `partitions` maps tables to their partition column"""
+    partitions = partitions or {}
+    issues = []
+    for _, _, detail in steps:
+        if match := SCAN.match(detail):
+            table, rest = match["table"], match["rest"]
+            if table.startswith("(") or table == "CONSTANT" or "VIRTUAL TABLE" in rest or "CONSTANT ROW" in rest:
+                continue
+            if " INDEX " in rest:
+                issues.append(PlanIssue(FULL_INDEX_SCAN, table, detail))
+            else:
+                issues.append(PlanIssue(FULL_SCAN, table, detail))
+        elif (match := SEARCH.match(detail)) and match["constraints"] == f"{partitions.get(match['table'])}=?":
+            issues.append(PlanIssue(PARTITION_SCAN, match["table"], detail))
+        elif match := TEMP_BTREE_USE.match(detail):
+            issues.append(PlanIssue(TEMP_BTREE, "", detail))
+    return issues
+
+
+def explain(sql, params=(), using=DEFAULT_DB_ALIAS):
+    """`(id, parent, detail)` steps of the plan SQLite picks for `sql`"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [(step_id, parent, detail) for step_id, parent, _, detail in cursor.fetchall()]
+
+
+class capture_plans(ContextDecorator):
+    """
+    Record the statements run on `using` and explain them on exit.
+
+    The context value is the list of `QueryPlan`s, filled when the block
+    exits. Statements run more than once are explained once.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, partitions=None):
+        self.using = using
+        self.partitions = dict(partitions or {})
+        self.plans = []
+
+    def _record(self, execute, sql, params, many, context):
+        if not many and EXPLAINABLE.match(sql):
+            self.statements.setdefault((sql, tuple(params or ())), None)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        if connections[self.using].vendor != "sqlite":
+            raise NotImplementedError("Query plans can only be captured on SQLite.")
+        self.statements = {}
+        self.wrapper = connections[self.using].execute_wrapper(self._record)
+        self.wrapper.__enter__()
+        return self.plans
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wrapper.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            self.plans.extend(
+                QueryPlan(sql, params, explain(sql, params, self.using), self.partitions)
+                for sql, params in self.statements
+            )
+        return False
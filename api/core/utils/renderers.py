@@ -0,0 +1,32 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.utils.request_metrics import timed
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Produces the same compact UTF-8 output as DRF's `JSONRenderer` with
+    `UNICODE_JSON` and `COMPACT_JSON` on. Types orjson does not handle
+    natively, and datetimes (DRF trims them to milliseconds), are handed to
+    DRF's own encoder so values render exactly as before.
+    """
+    media_type = "application/json"
+    format = "json"
+    charset = None
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        with timed("render"):
+            content = orjson.dumps(data, default=self.encoder.default, option=self.options)
+        # Escaped by DRF too: valid JSON, but line terminators in JavaScript
+        if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+            content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return content
@@ -0,0 +1,189 @@
+"""
+Per-request SQL and timing instrumentation.
+
+`RequestMetricsMiddleware` collects, for every request, the number of SQL
+queries and their total time, the time spent authenticating, serializing and
+rendering, and the view that answered. The numbers are sent back in a
+`Server-Timing` header, and requests slower than `REQUEST_METRICS_SLOW_MS`
+are logged as one JSON line on the `request_metrics` logger together with
+their slowest statements.
+
+Queries are timed by an execute wrapper (see `connection.execute_wrapper`)
+installed on every database connection when it opens, so this works with
+`DEBUG=False` and costs two clock reads per query. The metrics of the current
+request live in a context variable, which follows the request into
+`sync_to_async` threads. Phases timed with `timed()` leave out the SQL run
+inside them, so no time is counted twice.
+
+Streaming responses are measured until their first byte is ready, not until
+the body has been sent.
+"""
+import heapq
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger("request_metrics")
+
+_current = ContextVar("request_metrics", default=None)
+
+# Longest statement kept for the slow request log
+SQL_PREVIEW_LENGTH = 500
+
+
+def slow_threshold_ms():
+    """Requests slower than this many milliseconds are logged, None turns the log off"""
+    return getattr(settings, "REQUEST_METRICS_SLOW_MS", None)
+
+
+def slow_query_count():
+    """Number of the slowest statements included in a slow request log entry"""
+    return getattr(settings, "REQUEST_METRICS_SLOW_QUERIES", 5)
+
+
+class RequestMetrics:
+    """Timings of one request, in seconds"""
+
+    def __init__(self, slowest=5):
+        self.started = perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.phases = {}
+        self.slowest = []
+        self.keep_slowest = slowest
+        self._order = count()
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.sql_time += duration
+        entry = (duration, next(self._order), sql)
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest, entry)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def add_phase(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def elapsed(self):
+        return perf_counter() - self.started
+
+    def slowest_queries(self):
+        """The slowest statements, slowest first"""
+        return [
+            {"ms": round(duration * 1000, 2), "sql": sql[:SQL_PREVIEW_LENGTH]}
+            for duration, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+    def server_timing(self, total):
+        """`Server-Timing` header value"""
+        entries = [f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"']
+        entries += [f"{name};dur={duration * 1000:.1f}" for name, duration in self.phases.items()]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block, less its SQL time, to `phase` of the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started, sql_time = perf_counter(), metrics.sql_time
+    try:
+        yield
+    finally:
+        metrics.add_phase(phase, perf_counter() - started - (metrics.sql_time - sql_time))
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper timing the statements of the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, perf_counter() - started)
+
+
+# Connected on import, which happens while apps load (apps.user_auth.authentication uses `timed`),
+# before any connection opens
+@receiver(connection_created, dispatch_uid="request_metrics_install_query_recorder")
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class RequestMetricsMiddleware:
+    """Time every request, send a Server-Timing header and log slow requests"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics(slow_query_count())
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics(slow_query_count())
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = metrics.elapsed()
+        response["Server-Timing"] = metrics.server_timing(total)
+
+        threshold = slow_threshold_ms()
+        if threshold is not None and total * 1000 >= threshold:
+            logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": request.method,
+                "path": request.path,
+                "view": view_name(request),
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 2),
+                "db_ms": round(metrics.sql_time * 1000, 2),
+                "queries": metrics.queries,
+                **{f"{name}_ms": round(duration * 1000, 2) for name, duration in metrics.phases.items()},
+                "slowest_queries": metrics.slowest_queries(),
+            }))
+        return response
+
+
+def view_name(request):
+    """Dotted path of the view that answered `request`, None when no URL matched"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = getattr(match.func, "view_class", match.func)
+    return f"{view.__module__}.{view.__qualname__}"
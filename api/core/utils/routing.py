@@ -0,0 +1,81 @@
+"""
+Routing of reads to a read-only connection of the same SQLite database.
+
+When `DATABASE_READ_ALIAS` names a database (see
+`core.utils.sqlite.replica_database`), `ReadReplicaMiddleware` marks GET and
+HEAD requests as reads and `ReadReplicaRouter` sends their queries to that
+alias, so long searches and exports don't queue behind the writers' lock on
+the primary connection. Everything else stays on the primary:
+
+- requests with other methods,
+- any read after the request wrote, so it sees its own write,
+- reads inside a transaction on the primary, which must see its snapshot.
+
+Without `DATABASE_READ_ALIAS` the router leaves every query to the default.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# "read" during GET/HEAD requests, "primary" once something was written
+_routing = ContextVar("database_routing", default=None)
+
+
+def read_alias():
+    """Alias reads should use when nothing forces the primary"""
+    return getattr(settings, "DATABASE_READ_ALIAS", None) or DEFAULT_DB_ALIAS
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = read_alias()
+        if alias == DEFAULT_DB_ALIAS or _routing.get() != "read":
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if _routing.get() == "read":
+            _routing.set("primary")
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == read_alias() and db != DEFAULT_DB_ALIAS:
+            return False
+        return None
+
+
+class ReadReplicaMiddleware:
+    """Route the queries of GET and HEAD requests to the read alias"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            # Keeps async views off the thread pool under ASGI
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _routing.set("read" if request.method in ("GET", "HEAD") else None)
+        try:
+            return self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+    async def __acall__(self, request):
+        token = _routing.set("read" if request.method in ("GET", "HEAD") else None)
+        try:
+            return await self.get_response(request)
+        finally:
+            _routing.reset(token)
@@ -0,0 +1,70 @@
+"""
+SQLite database profile for several gunicorn workers sharing one file.
+
+- `journal_mode=WAL` lets readers run while a writer commits and replaces the
+  rollback journal's fsyncs with appends to the log; `synchronous=NORMAL` is
+  the durable setting for WAL (a power loss may drop the last commits but
+  never corrupts the file).
+- `busy_timeout` makes a connection wait for the write lock instead of
+  failing with "database is locked".
+- Transactions begin `IMMEDIATE`, so they take the write lock up front.
+  A deferred transaction that reads first and writes later cannot wait for
+  the lock (SQLite would deadlock) and fails right away whatever the timeout.
+- `mmap_size`, `cache_size` and `temp_store` keep hot pages and temporary
+  b-trees in memory.
+
+`replica_database` is a read-only connection of the same file, which reads
+can be routed to (see core.utils.routing).
+
+The pragmas run once per connection through the backend's `init_command`,
+when Django opens it, and `CONN_MAX_AGE` keeps connections, and with them
+the page cache, across requests, with `CONN_HEALTH_CHECKS` replacing any that
+went bad.
+"""
+import os
+
+
+def pragmas():
+    """Pragmas of the profile, tunable through the environment"""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.getenv("DATABASE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("DATABASE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Negative sizes are in KiB
+        "cache_size": int(os.getenv("DATABASE_CACHE_SIZE", str(-64 * 1024))),
+        "temp_store": "MEMORY",
+    }
+
+
+def init_command(values=None):
+    return ";".join(f"PRAGMA {name}={value}" for name, value in (values or pragmas()).items())
+
+
+def production_database(name):
+    """`DATABASES` entry of the concurrent profile for the SQLite file `name`"""
+    values = pragmas()
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        "CONN_MAX_AGE": int(os.getenv("DATABASE_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "timeout": values["busy_timeout"] / 1000,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": init_command(values),
+        },
+    }
+
+
+def replica_database(name):
+    """`DATABASES` entry of a read-only connection to the SQLite file of `production_database(name)`"""
+    database = production_database(name)
+    values = {key: value for key, value in pragmas().items() if key not in ("journal_mode", "synchronous")}
+    database.update(
+        NAME=f"file:{name}?mode=ro",
+        OPTIONS={"uri": True, "timeout": database["OPTIONS"]["timeout"], "init_command": init_command({**values, "query_only": 1})},
+        # Tests run against the test copy of the primary instead
+        TEST={"MIRROR": "default"},
+    )
+    return database